@@ -20,6 +20,7 @@ from os import makedirs, path as ospath
 from urllib3.exceptions import HTTPError
 from requests import get as RequestsGet, exceptions as RequestsExceptions
 from .core.config_manager import Config
+from .core.task_dict import TaskDict
 
 # from faulthandler import enable as faulthandler_enable
 # faulthandler_enable()
@@ -60,7 +61,7 @@ nzb_options = {}
 queued_dl = {}
 queued_up = {}
 status_dict = {}
-task_dict = {}
+task_dict = TaskDict()
 rss_dict = {}
 non_queued_dl = set()
 non_queued_up = set()
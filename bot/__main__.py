@@ -135,8 +135,8 @@ async def main():
         restart_notification(),
         telegraph.create_account(),
         rclone_serve_booter(),
-        sync_to_async(start_aria2_listener, wait=False),
     )
+    start_aria2_listener()
     create_help_buttons()
     add_handlers()
     TgClient.bot.add_handler(
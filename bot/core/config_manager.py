@@ -1,21 +1,29 @@
 from importlib import import_module
 
+# 0 is a real setting for these, don't skip it as an unset value
+ZERO_ALLOWED = ["BULK_ADMISSION_RATE", "GDRIVE_SEARCH_TIMEOUT"]
+FLOAT_VARS = ["BULK_ADMISSION_RATE"]
+
 
 class Config:
     AS_DOCUMENT = False
     AUTHORIZED_CHATS = ""
     BASE_URL = ""
     BASE_URL_PORT = 80
+    BULK_ADMISSION_RATE = 1
     BOT_TOKEN = ""
     CMD_SUFFIX = ""
     DATABASE_URL = ""
     DEFAULT_UPLOAD = "rc"
+    DIRECT_PARALLEL_DOWNLOADS = 4
     DOWNLOAD_DIR = "/usr/src/app/downloads/"
     EQUAL_SPLITS = False
     EXTENSION_FILTER = ""
     FFMPEG_CMDS = {}
     FILELION_API = ""
     GDRIVE_ID = ""
+    GDRIVE_SEARCH_TIMEOUT = 15
+    GDRIVE_WORKERS = 8
     INCOMPLETE_TASK_NOTIFIER = False
     INDEX_URL = ""
     IS_TEAM_DRIVE = False
@@ -24,7 +32,9 @@ class Config:
     LEECH_DUMP_CHAT = ""
     LEECH_FILENAME_PREFIX = ""
     LEECH_SPLIT_SIZE = 2097152000
+    LISTENER_MAX_INTERVAL = 30
     MEDIA_GROUP = False
+    MEDIA_PROBE_CONCURRENCY = 0
     MIXED_LEECH = False
     NAME_SUBSTITUTE = ""
     OWNER_ID = 0
@@ -33,6 +43,7 @@ class Config:
     QUEUE_UPLOAD = 0
     RCLONE_FLAGS = ""
     RCLONE_PATH = ""
+    RCLONE_RCD = False
     RCLONE_SERVE_URL = ""
     RCLONE_SERVE_USER = ""
     RCLONE_SERVE_PASS = ""
@@ -104,11 +115,13 @@ class Config:
         for attr in dir(settings):
             if hasattr(cls, attr):
                 value = getattr(settings, attr)
-                if not value:
+                if not value and not (attr in ZERO_ALLOWED and value == 0):
                     continue
                 if isinstance(value, str):
                     value = value.strip()
-                if attr == "DEFAULT_UPLOAD" and value != "gd":
+                if attr in FLOAT_VARS:
+                    value = float(value)
+                elif attr == "DEFAULT_UPLOAD" and value != "gd":
                     value = "rc"
                 elif attr == "DOWNLOAD_DIR" and not value.endswith("/"):
                     value = f"{value}/"
@@ -138,7 +151,9 @@ class Config:
     def load_dict(cls, config_dict):
         for key, value in config_dict.items():
             if hasattr(cls, key):
-                if key == "DEFAULT_UPLOAD" and value != "gd":
+                if key in FLOAT_VARS:
+                    value = float(value)
+                elif key == "DEFAULT_UPLOAD" and value != "gd":
                     value = "rc"
                 elif key == "DOWNLOAD_DIR":
                     if not value.endswith("/"):
@@ -0,0 +1,53 @@
+class TaskDict(dict):
+    def __init__(self):
+        super().__init__()
+        self._gids = {}
+        self._mid_gids = {}
+        self.pending = set()
+
+    def __setitem__(self, mid, task):
+        if mid in self:
+            self._drop(mid)
+        super().__setitem__(mid, task)
+        self.index(task)
+
+    def __delitem__(self, mid):
+        super().__delitem__(mid)
+        self._drop(mid)
+
+    def pop(self, mid, *args):
+        self._drop(mid)
+        return super().pop(mid, *args)
+
+    def clear(self):
+        super().clear()
+        self._gids.clear()
+        self._mid_gids.clear()
+        self.pending.clear()
+
+    def _drop(self, mid):
+        self.pending.discard(mid)
+        for gid in self._mid_gids.pop(mid, ()):
+            if self._gids.get(gid) == mid:
+                del self._gids[gid]
+
+    def index(self, task):
+        mid = task.listener.mid
+        try:
+            gid = task.gid()
+        except Exception:
+            self.pending.add(mid)
+            return
+        self.pending.discard(mid)
+        self.alias(gid, task)
+
+    def alias(self, gid, task):
+        mid = task.listener.mid
+        if gid and self.get(mid) is task:
+            self._gids[gid] = mid
+            self._mid_gids.setdefault(mid, set()).add(gid)
+
+    def get_by_gid(self, gid):
+        if (mid := self._gids.get(gid)) is not None:
+            return self.get(mid)
+        return None
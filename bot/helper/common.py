@@ -1,6 +1,6 @@
 from aiofiles.os import path as aiopath, remove, makedirs, listdir
 from asyncio import sleep, gather
-from os import walk, path as ospath
+from os import path as ospath
 from secrets import token_urlsafe
 from aioshutil import move, rmtree
 from pyrogram.enums import ChatAction
@@ -19,7 +19,8 @@ from .. import (
 )
 from ..core.config_manager import Config
 from ..core.mltb_client import TgClient
-from .ext_utils.bot_utils import new_task, sync_to_async, get_size_bytes
+from .ext_utils.bot_utils import new_task, get_size_bytes
+from .ext_utils.bulk_job import BulkJob
 from .ext_utils.bulk_links import extract_bulk_links
 from .mirror_leech_utils.gdrive_utils.list import GoogleDriveList
 from .mirror_leech_utils.rclone_utils.list import RcloneList
@@ -31,9 +32,9 @@ from .ext_utils.files_utils import (
     is_first_archive_split,
     is_archive,
     is_archive_split,
-    get_path_size,
     split_file,
     SevenZ,
+    FileManifest,
 )
 from .ext_utils.links_utils import (
     is_gdrive_id,
@@ -45,6 +46,8 @@ from .ext_utils.media_utils import (
     create_thumb,
     take_ss,
     get_document_type,
+    classify_media,
+    probe_cache,
     FFMpeg,
 )
 from .telegram_helper.message_utils import (
@@ -114,8 +117,17 @@ class TaskConfig:
         self.thumb = None
         self.extension_filter = []
         self.files_to_proceed = []
+        self.manifest = FileManifest()
+        self.bulk_job = None
         self.is_super_chat = self.message.chat.type.name in ["SUPERGROUP", "CHANNEL"]
 
+    @property
+    def task_link(self):
+        # bulk links share one message, their mid tells their records apart
+        if self.mid == self.message.id:
+            return self.message.link
+        return f"{self.message.link}?task={self.mid}"
+
     def get_token_path(self, dest):
         if dest.startswith("mtp:"):
             return f"tokens/{self.user_id}.pickle"
@@ -457,6 +469,8 @@ class TaskConfig:
 
     @new_task
     async def run_multi(self, input_list, obj):
+        if self.bulk_job is not None:
+            return
         await sleep(7)
         if not self.multi_tag and self.multi > 1:
             self.multi_tag = token_urlsafe(3)
@@ -520,44 +534,19 @@ class TaskConfig:
             self.bulk = await extract_bulk_links(self.message, bulk_start, bulk_end)
             if len(self.bulk) == 0:
                 raise ValueError("Bulk Empty!")
-            b_msg = input_list[:1]
             self.options = input_list[1:]
             index = self.options.index("-b")
             del self.options[index]
             if bulk_start or bulk_end:
                 del self.options[index + 1]
             self.options = " ".join(self.options)
-            b_msg.append(f"{self.bulk[0]} -i {len(self.bulk)} {self.options}")
-            msg = " ".join(b_msg)
-            if len(self.bulk) > 2:
-                self.multi_tag = token_urlsafe(3)
-                multi_tags.add(self.multi_tag)
-                msg += f"\nCancel Multi: <code>/{BotCommands.CancelTaskCommand[1]} {self.multi_tag}</code>"
-            nextmsg = await send_message(self.message, msg)
-            nextmsg = await self.client.get_messages(
-                chat_id=self.message.chat.id, message_ids=nextmsg.id
-            )
-            if self.message.from_user:
-                nextmsg.from_user = self.user
-            else:
-                nextmsg.sender_chat = self.user
-            await obj(
-                self.client,
-                nextmsg,
-                self.is_qbit,
-                self.is_leech,
-                self.is_jd,
-                self.is_nzb,
-                self.same_dir,
-                self.bulk,
-                self.multi_tag,
-                self.options,
-            ).new_event()
         except:
             await send_message(
                 self.message,
                 "Reply to text file or to telegram message that have links seperated by new line!",
             )
+            return
+        await BulkJob(self, obj, input_list[0], self.bulk, self.options).run()
 
     async def proceed_extract(self, dl_path, gid):
         pswd = self.extract if isinstance(self.extract, str) else ""
@@ -565,7 +554,7 @@ class TaskConfig:
         if self.is_file and is_archive(dl_path):
             self.files_to_proceed.append(dl_path)
         else:
-            for dirpath, _, files in await sync_to_async(walk, dl_path, topdown=False):
+            for dirpath, files in await self.manifest.walk(dl_path):
                 for file_ in files:
                     if (
                         is_first_archive_split(file_)
@@ -581,7 +570,7 @@ class TaskConfig:
         LOGGER.info(f"Extracting: {self.name}")
         async with task_dict_lock:
             task_dict[self.mid] = SevenZStatus(self, sevenz, gid, "Extract")
-        for dirpath, _, files in await sync_to_async(walk, self.dir, topdown=False):
+        for dirpath, files in await self.manifest.walk(self.dir):
             for file_ in files:
                 if (
                     is_first_archive_split(file_)
@@ -594,12 +583,14 @@ class TaskConfig:
                     if not self.is_file:
                         self.subname = file_
                     code = await sevenz.extract(f_path, t_path, pswd)
+                    await self.manifest.add(t_path)
             if code == 0:
                 for file_ in files:
                     if is_archive_split(file_) or is_archive(file_):
                         del_path = ospath.join(dirpath, file_)
                         try:
                             await remove(del_path)
+                            self.manifest.remove(del_path)
                         except:
                             self.is_cancelled = True
         return t_path if self.is_file and code == 0 else dl_path
@@ -656,6 +647,7 @@ class TaskConfig:
                     await makedirs(new_folder, exist_ok=True)
                     file_path = f"{new_folder}/{name}"
                     await move(dl_path, file_path)
+                    self.manifest.remove(dl_path)
                     if not checked:
                         checked = True
                         async with task_dict_lock:
@@ -689,10 +681,9 @@ class TaskConfig:
                     else:
                         await move(file_path, dl_path)
                         await rmtree(new_folder)
+                    await self.manifest.add(dl_path)
                 else:
-                    for dirpath, _, files in await sync_to_async(
-                        walk, dl_path, topdown=False
-                    ):
+                    for dirpath, files in await self.manifest.walk(dl_path):
                         for file_ in files:
                             var_cmd = cmd.copy()
                             if self.is_cancelled:
@@ -723,17 +714,21 @@ class TaskConfig:
                                 await cpu_eater_lock.acquire()
                                 self.progress = True
                             LOGGER.info(f"Running ffmpeg cmd for: {f_path}")
-                            self.subsize = await get_path_size(f_path)
+                            self.subsize = await self.manifest.size(f_path)
                             self.subname = file_
                             res = await ffmpeg.ffmpeg_cmds(var_cmd, f_path)
+                            for output in res or []:
+                                await self.manifest.add(output)
                             if res and delete_files:
                                 await remove(f_path)
+                                self.manifest.remove(f_path)
                                 if len(res) == 1:
                                     file_name = ospath.basename(res[0])
                                     if file_name.startswith("ffmpeg"):
                                         newname = file_name.split(".", 1)[-1]
                                         newres = ospath.join(dirpath, newname)
                                         await move(res[0], newres)
+                                        self.manifest.move(res[0], newres)
         finally:
             if checked:
                 cpu_eater_lock.release()
@@ -773,15 +768,20 @@ class TaskConfig:
                 return dl_path
             new_path = ospath.join(up_dir, new_name)
             await move(dl_path, new_path)
+            self.manifest.move(dl_path, new_path)
+            probe_cache.move(dl_path, new_path)
             return new_path
         else:
-            for dirpath, _, files in await sync_to_async(walk, dl_path, topdown=False):
+            for dirpath, files in await self.manifest.walk(dl_path):
                 for file_ in files:
                     f_path = ospath.join(dirpath, file_)
                     new_name = perform_substitution(file_, self.name_sub)
                     if not new_name:
                         continue
-                    await move(f_path, ospath.join(dirpath, new_name))
+                    new_path = ospath.join(dirpath, new_name)
+                    await move(f_path, new_path)
+                    self.manifest.move(f_path, new_path)
+                    probe_cache.move(f_path, new_path)
             return dl_path
 
     async def generate_screenshots(self, dl_path):
@@ -798,14 +798,22 @@ class TaskConfig:
                         move(dl_path, f"{new_folder}/{name}"),
                         move(res, new_folder),
                     )
+                    self.manifest.remove(dl_path)
+                    self.manifest.remove(res)
+                    await self.manifest.add(new_folder)
                     return new_folder
         else:
             LOGGER.info(f"Creating Screenshot for: {dl_path}")
-            for dirpath, _, files in await sync_to_async(walk, dl_path, topdown=False):
-                for file_ in files:
-                    f_path = ospath.join(dirpath, file_)
-                    if (await get_document_type(f_path))[0]:
-                        await take_ss(f_path, ss_nb)
+            all_files = [
+                ospath.join(dirpath, file_)
+                for dirpath, files in await self.manifest.walk(dl_path)
+                for file_ in files
+            ]
+            async for f_path, (is_video, _, _) in classify_media(all_files):
+                if self.is_cancelled:
+                    break
+                if is_video and (res := await take_ss(f_path, ss_nb)):
+                    await self.manifest.add(res)
         return dl_path
 
     async def convert_media(self, dl_path, gid):
@@ -850,13 +858,16 @@ class TaskConfig:
         if self.is_file:
             all_files.append(dl_path)
         else:
-            for dirpath, _, files in await sync_to_async(walk, dl_path, topdown=False):
+            for dirpath, files in await self.manifest.walk(dl_path):
                 for file_ in files:
                     f_path = ospath.join(dirpath, file_)
                     all_files.append(f_path)
 
+        doc_types = {}
+        async for f_path, doc_type in classify_media(all_files):
+            doc_types[f_path] = doc_type
         for f_path in all_files:
-            is_video, is_audio, _ = await get_document_type(f_path)
+            is_video, is_audio, _ = doc_types[f_path]
             if (
                 is_video
                 and vext
@@ -899,7 +910,7 @@ class TaskConfig:
                     if self.is_file:
                         self.subsize = self.size
                     else:
-                        self.subsize = await get_path_size(f_path)
+                        self.subsize = await self.manifest.size(f_path)
                         self.subname = ospath.basename(f_path)
                     if f_type == "video":
                         res = await ffmpeg.convert_video(f_path, vext)
@@ -911,6 +922,8 @@ class TaskConfig:
                         except:
                             self.is_cancelled = True
                             return False
+                        self.manifest.remove(f_path)
+                        await self.manifest.add(res)
                         if self.is_file:
                             return res
         return dl_path
@@ -931,11 +944,18 @@ class TaskConfig:
             file_ = ospath.basename(dl_path)
             self.files_to_proceed[dl_path] = file_
         else:
-            for dirpath, _, files in await sync_to_async(walk, dl_path, topdown=False):
-                for file_ in files:
-                    f_path = ospath.join(dirpath, file_)
-                    if (await get_document_type(f_path))[0]:
-                        self.files_to_proceed[f_path] = file_
+            all_files = [
+                ospath.join(dirpath, file_)
+                for dirpath, files in await self.manifest.walk(dl_path)
+                for file_ in files
+            ]
+            videos = set()
+            async for f_path, (is_video, _, _) in classify_media(all_files):
+                if is_video:
+                    videos.add(f_path)
+            for f_path in all_files:
+                if f_path in videos:
+                    self.files_to_proceed[f_path] = ospath.basename(f_path)
         if self.files_to_proceed:
             ffmpeg = FFMpeg(self)
             async with task_dict_lock:
@@ -949,7 +969,7 @@ class TaskConfig:
                     if self.is_file:
                         self.subsize = self.size
                     else:
-                        self.subsize = await get_path_size(f_path)
+                        self.subsize = await self.manifest.size(f_path)
                         self.subname = file_
                     res = await ffmpeg.sample_video(
                         f_path, sample_duration, part_duration
@@ -961,7 +981,12 @@ class TaskConfig:
                             move(f_path, f"{new_folder}/{file_}"),
                             move(res, f"{new_folder}/SAMPLE.{file_}"),
                         )
+                        self.manifest.remove(f_path)
+                        self.manifest.remove(res)
+                        await self.manifest.add(new_folder)
                         return new_folder
+                    elif res:
+                        await self.manifest.add(res)
         return dl_path
 
     async def proceed_compress(self, dl_path, gid):
@@ -972,6 +997,7 @@ class TaskConfig:
             await makedirs(new_folder, exist_ok=True)
             new_dl_path = f"{new_folder}/{name}"
             await move(dl_path, new_dl_path)
+            self.manifest.move(dl_path, new_dl_path)
             dl_path = new_dl_path
             up_path = f"{new_dl_path}.zip"
             self.is_file = False
@@ -980,19 +1006,21 @@ class TaskConfig:
         sevenz = SevenZ(self)
         async with task_dict_lock:
             task_dict[self.mid] = SevenZStatus(self, sevenz, gid, "Zip")
-        return await sevenz.zip(dl_path, up_path, pswd)
+        res = await sevenz.zip(dl_path, up_path, pswd)
+        await self.manifest.add(ospath.dirname(up_path))
+        return res
 
     async def proceed_split(self, dl_path, gid):
         self.files_to_proceed = {}
         if self.is_file:
-            f_size = await get_path_size(dl_path)
+            f_size = await self.manifest.size(dl_path)
             if f_size > self.split_size:
                 self.files_to_proceed[dl_path] = [f_size, ospath.basename(dl_path)]
         else:
-            for dirpath, _, files in await sync_to_async(walk, dl_path, topdown=False):
+            for dirpath, files in await self.manifest.walk(dl_path):
                 for file_ in files:
                     f_path = ospath.join(dirpath, file_)
-                    f_size = await get_path_size(f_path)
+                    f_size = await self.manifest.size(f_path)
                     if f_size > self.split_size:
                         self.files_to_proceed[f_path] = [f_size, file_]
         if self.files_to_proceed:
@@ -1025,3 +1053,5 @@ class TaskConfig:
                         await remove(f_path)
                     except:
                         self.is_cancelled = True
+                    self.manifest.remove(f_path)
+                await self.manifest.refresh_dir(ospath.dirname(f_path))
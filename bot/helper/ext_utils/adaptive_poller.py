@@ -0,0 +1,66 @@
+from asyncio import Event, TimeoutError, wait_for
+from time import time
+
+from ...core.config_manager import Config
+
+# tick outcomes reported by the listeners: BUSY when something changed state or is
+# about to finish, ACTIVE while downloads are running, IDLE when only seeding/waiting.
+BUSY = 0
+ACTIVE = 1
+IDLE = 2
+
+
+class AdaptivePoller:
+    def __init__(self, name, min_interval=1, interval=3):
+        self.name = name
+        self.min_interval = min_interval
+        self.base_interval = interval
+        self.interval = interval
+        self._wake = Event()
+        self._tick_start = 0
+        self.ticks = 0
+        self.rpc_calls = 0
+        self.total_latency = 0
+        self.max_latency = 0
+
+    def start_tick(self):
+        self._tick_start = time()
+
+    def rpc(self, count=1):
+        self.rpc_calls += count
+
+    def end_tick(self, state):
+        latency = time() - self._tick_start
+        self.ticks += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        if state == BUSY:
+            self.interval = self.min_interval
+        elif state == ACTIVE:
+            self.interval = self.base_interval
+        else:
+            ceiling = max(Config.LISTENER_MAX_INTERVAL, self.base_interval)
+            self.interval = min(max(self.interval, self.base_interval) * 2, ceiling)
+
+    def wake(self):
+        self.interval = self.min_interval
+        self._wake.set()
+
+    async def sleep(self):
+        try:
+            await wait_for(self._wake.wait(), self.interval)
+        except TimeoutError:
+            pass
+        self._wake.clear()
+
+    def stats(self):
+        return {
+            "interval": self.interval,
+            "ticks": self.ticks,
+            "rpc_calls": self.rpc_calls,
+            "avg_latency": self.total_latency / self.ticks if self.ticks else 0,
+            "max_latency": self.max_latency,
+        }
+
+
+POLLERS = {name: AdaptivePoller(name) for name in ("qb", "nzb", "jd")}
@@ -0,0 +1,79 @@
+from aria2p import Download
+from threading import Lock
+from time import time
+
+from ... import LOGGER, aria2
+
+STATUS_KEYS = [
+    "gid",
+    "status",
+    "totalLength",
+    "completedLength",
+    "uploadLength",
+    "downloadSpeed",
+    "uploadSpeed",
+    "connections",
+    "numSeeders",
+    "seeder",
+    "followedBy",
+    "following",
+    "belongsTo",
+    "infoHash",
+    "bittorrent",
+    "dir",
+    "files",
+    "errorCode",
+    "errorMessage",
+]
+
+
+class Aria2Sync:
+    def __init__(self, max_age=1, max_results=1000):
+        self._max_age = max_age
+        self._max_results = max_results
+        self._lock = Lock()
+        self._downloads = {}
+        self.last_sync = 0
+
+    def refresh(self, force=False):
+        with self._lock:
+            if not force and time() - self.last_sync < self._max_age:
+                return
+            try:
+                res = aria2.client.multicall2(
+                    [
+                        (aria2.client.TELL_ACTIVE, [STATUS_KEYS]),
+                        (
+                            aria2.client.TELL_WAITING,
+                            [0, self._max_results, STATUS_KEYS],
+                        ),
+                        (
+                            aria2.client.TELL_STOPPED,
+                            [0, self._max_results, STATUS_KEYS],
+                        ),
+                    ]
+                )
+            except Exception as e:
+                LOGGER.error(f"{e}: Aria2c, Error while syncing downloads")
+                return
+            downloads = {}
+            for result in res:
+                if not isinstance(result, list):
+                    LOGGER.error(f"Aria2c, Error while syncing downloads: {result}")
+                    continue
+                for struct in result[0]:
+                    downloads[struct["gid"]] = Download(aria2, struct)
+            self._downloads = downloads
+            self.last_sync = time()
+
+    def invalidate(self, gid=None):
+        if gid is not None:
+            self._downloads.pop(gid, None)
+        self.last_sync = 0
+
+    def get(self, gid):
+        self.refresh()
+        return self._downloads.get(gid)
+
+
+aria2_sync = Aria2Sync()
@@ -1,7 +1,10 @@
-from httpx import AsyncClient
+from httpx import AsyncClient, Limits
 from asyncio.subprocess import PIPE
+from collections import OrderedDict, deque
 from functools import partial, wraps
-from concurrent.futures import ThreadPoolExecutor
+from time import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Condition, Lock, local
 from asyncio import (
     create_subprocess_exec,
     create_subprocess_shell,
@@ -21,18 +24,173 @@ from .help_messages import (
 
 COMMAND_USAGE = {}
 
-THREAD_POOL = ThreadPoolExecutor(max_workers=3000)
+
+class ExecutorPool:
+    def __init__(self, name, max_workers):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+        self._lock = Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.total_wait = 0
+        self.max_wait = 0
+
+    def _wrap(self, pfunc):
+        submitted = time()
+        with self._lock:
+            self.queued += 1
+
+        def _run():
+            wait = time() - submitted
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            try:
+                return pfunc()
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+
+        return _run
+
+    def run(self, pfunc):
+        return bot_loop.run_in_executor(self._executor, self._wrap(pfunc))
+
+    def submit(self, pfunc):
+        # for blocking code outside the loop, returns a concurrent future
+        future = self._executor.submit(self._wrap(pfunc))
+        future.add_done_callback(self._on_cancel)
+        return future
+
+    def _on_cancel(self, future):
+        # a future cancelled while queued never runs, it never leaves the queue count
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    def stats(self):
+        with self._lock:
+            avg_wait = self.total_wait / self.completed if self.completed else 0
+            return {
+                "workers": self.max_workers,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "avg_wait": avg_wait,
+                "max_wait": self.max_wait,
+            }
+
+
+# rpc: short client calls (qBittorrent, aria2, Drive metadata), fs: tree walks and
+# file sniffing, transfer: blocking calls that live as long as a download/upload.
+# transfer bodies hand listener callbacks back to the loop with wait=False, those
+# callbacks start more transfer work and waiting on them can starve a full pool.
+# worker: the fan-out of transfers (Drive files, folder crawls) through TaskPool,
+# its jobs never wait on other worker jobs so a full pool only queues them.
+# search: one Drive query per configured drive, each thread keeps its services.
+THREAD_POOLS = {
+    "rpc": ExecutorPool("rpc", 32),
+    "fs": ExecutorPool("fs", 8),
+    "transfer": ExecutorPool("transfer", 128),
+    "worker": ExecutorPool("worker", 64),
+    "search": ExecutorPool("search", 16),
+}
+
+task_slot = local()
+
+
+def current_slot():
+    """the TaskPool slot running on this thread, None outside of one"""
+    return getattr(task_slot, "value", None)
+
+
+class TaskPool:
+    """one task's share of the worker pool, runs at most max_workers jobs at once"""
+
+    def __init__(self, max_workers, pool="worker"):
+        self._pool = THREAD_POOLS[pool]
+        # slots are unique per TaskPool, helpers key their per-worker clients by them
+        self._slots = [object() for _ in range(max(max_workers, 1))]
+        self._pending = deque()
+        self._running = 0
+        self._shutdown = False
+        self._cond = Condition()
+
+    def submit(self, func, *args, **kwargs):
+        future = Future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            self._pending.append((future, partial(func, *args, **kwargs)))
+        self._start()
+        return future
+
+    def _start(self):
+        while True:
+            with self._cond:
+                if not self._slots or not self._pending:
+                    return
+                future, pfunc = self._pending.popleft()
+                if not future.set_running_or_notify_cancel():
+                    self._cond.notify_all()
+                    continue
+                slot = self._slots.pop()
+                self._running += 1
+            self._pool.submit(partial(self._run, slot, future, pfunc))
+
+    def _run(self, slot, future, pfunc):
+        task_slot.value = slot
+        try:
+            result = pfunc()
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+        finally:
+            task_slot.value = None
+            with self._cond:
+                self._slots.append(slot)
+                self._running -= 1
+                self._cond.notify_all()
+            self._start()
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        with self._cond:
+            self._shutdown = True
+            if cancel_futures:
+                while self._pending:
+                    self._pending.popleft()[0].cancel()
+            if wait:
+                self._cond.wait_for(lambda: not self._running and not self._pending)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        return False
 
 
 class SetInterval:
-    def __init__(self, interval, action, *args, **kwargs):
+    def __init__(self, interval, action, *args, align=False, **kwargs):
         self.interval = interval
         self.action = action
+        self.align = align
         self.task = bot_loop.create_task(self._set_interval(*args, **kwargs))
 
     async def _set_interval(self, *args, **kwargs):
         while True:
-            await sleep(self.interval)
+            if self.align:
+                await sleep(self.interval - time() % self.interval)
+            else:
+                await sleep(self.interval)
             await self.action(*args, **kwargs)
 
     def cancel(self):
@@ -173,13 +331,49 @@ def get_size_bytes(size):
     return size
 
 
+CONTENT_TYPE_TTL = 600
+CONTENT_TYPE_CACHE_SIZE = 1000
+content_type_cache = OrderedDict()
+http_client = None
+
+
+def get_http_client():
+    global http_client
+    if http_client is None or http_client.is_closed:
+        http_client = AsyncClient(
+            follow_redirects=True,
+            verify=False,
+            timeout=20,
+            limits=Limits(max_connections=64, max_keepalive_connections=16),
+        )
+    return http_client
+
+
 async def get_content_type(url):
+    if (cached := content_type_cache.get(url)) is not None:
+        if time() - cached[0] < CONTENT_TYPE_TTL:
+            content_type_cache.move_to_end(url)
+            return cached[1]
+        del content_type_cache[url]
+    client = get_http_client()
+    content_type = None
     try:
-        async with AsyncClient() as client:
-            response = await client.get(url, allow_redirects=True, verify=False)
-            return response.headers.get("Content-Type")
+        response = await client.head(url)
+        if response.status_code < 400:
+            content_type = response.headers.get("Content-Type")
+        if content_type is None:
+            async with client.stream(
+                "GET", url, headers={"Range": "bytes=0-0"}
+            ) as response:
+                content_type = response.headers.get("Content-Type")
     except:
         return None
+    if content_type is not None:
+        content_type_cache[url] = (time(), content_type)
+        content_type_cache.move_to_end(url)
+        while len(content_type_cache) > CONTENT_TYPE_CACHE_SIZE:
+            content_type_cache.popitem(last=False)
+    return content_type
 
 
 def update_user_ldata(id_, key, value):
@@ -213,9 +407,9 @@ def new_task(func):
     return wrapper
 
 
-async def sync_to_async(func, *args, wait=True, **kwargs):
+async def sync_to_async(func, *args, wait=True, pool="rpc", **kwargs):
     pfunc = partial(func, *args, **kwargs)
-    future = bot_loop.run_in_executor(THREAD_POOL, pfunc)
+    future = THREAD_POOLS[pool].run(pfunc)
     return await future if wait else future
 
 
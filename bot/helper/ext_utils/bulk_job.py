@@ -0,0 +1,108 @@
+from asyncio import sleep
+from copy import copy
+from secrets import token_urlsafe
+from time import time
+
+from ... import LOGGER, bot_loop, multi_tags, task_dict_lock, intervals
+from ...core.config_manager import Config
+from ..telegram_helper.bot_commands import BotCommands
+from ..telegram_helper.message_utils import (
+    send_message,
+    edit_message,
+    send_status_message,
+)
+from .bot_utils import new_task
+
+
+class BulkJob:
+    def __init__(self, listener, obj, command, links, options):
+        self.listener = listener
+        self._obj = obj
+        self._command = command
+        self._links = links
+        self._options = options
+        self._status_msg = None
+        self._last_edit = 0
+        self.total = len(links)
+        self.admitted = 0
+        self.cancelled = False
+
+    def _summary(self):
+        listener = self.listener
+        msg = f"<b>Bulk Task</b> by {listener.tag}\n"
+        msg += f"<b>Links:</b> {self.total} | <b>Started:</b> {self.admitted}"
+        if self.cancelled:
+            msg += "\n\nMulti Task has been cancelled!"
+        elif self.admitted == self.total:
+            msg += "\n\nAll links have been added!"
+        elif listener.multi_tag:
+            msg += f"\n\nCancel Multi: <code>/{BotCommands.CancelTaskCommand[1]} {listener.multi_tag}</code>"
+        return msg
+
+    async def _update_summary(self, force=False):
+        if self._status_msg is None or isinstance(self._status_msg, str):
+            return
+        if not force and time() - self._last_edit < Config.STATUS_UPDATE_INTERVAL:
+            return
+        self._last_edit = time()
+        await edit_message(self._status_msg, self._summary(), block=False)
+
+    def _create_task(self, link, index, remaining):
+        listener = self.listener
+        message = copy(listener.message)
+        message.text = " ".join(
+            [self._command, f"{link} -i {remaining} {self._options}"]
+        )
+        message.reply_to_message = None
+        task = self._obj(
+            listener.client,
+            message,
+            listener.is_qbit,
+            listener.is_leech,
+            listener.is_jd,
+            listener.is_nzb,
+            listener.same_dir,
+            [],
+            listener.multi_tag,
+            self._options,
+        )
+        # links share the bulk message, the link number keeps their mids apart,
+        # cancel, force start and select reach them by gid or multi tag
+        task.mid = f"{listener.mid}_{index}"
+        task.dir = f"{Config.DOWNLOAD_DIR}{task.mid}"
+        task.bulk_job = self
+        return task
+
+    @new_task
+    async def run(self):
+        listener = self.listener
+        if self.total > 1 and not listener.multi_tag:
+            listener.multi_tag = token_urlsafe(3)
+            multi_tags.add(listener.multi_tag)
+        multi_tag = listener.multi_tag
+        await listener.get_tag(listener.message.text.split("\n"))
+        self._status_msg = await send_message(listener.message, self._summary())
+        delay = 1 / Config.BULK_ADMISSION_RATE if Config.BULK_ADMISSION_RATE else 0
+        try:
+            for index, link in enumerate(self._links, start=1):
+                if intervals["stopAll"]:
+                    break
+                remaining = self.total - index + 1
+                if multi_tag and multi_tag not in multi_tags:
+                    self.cancelled = True
+                    async with task_dict_lock:
+                        for fd_name in listener.same_dir:
+                            listener.same_dir[fd_name]["total"] -= remaining
+                    await send_status_message(listener.message)
+                    break
+                task = self._create_task(link, index, remaining)
+                bot_loop.create_task(task.new_event())
+                self.admitted += 1
+                await self._update_summary()
+                if remaining > 1:
+                    await sleep(delay)
+        except Exception as e:
+            LOGGER.error(f"Bulk Task: {e}")
+        finally:
+            multi_tags.discard(multi_tag)
+            await self._update_summary(force=True)
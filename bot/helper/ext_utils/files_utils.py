@@ -2,7 +2,7 @@ from aioshutil import rmtree as aiormtree
 from asyncio import create_subprocess_exec, sleep, wait_for
 from asyncio.subprocess import PIPE
 from magic import Magic
-from os import walk, path as ospath, makedirs, readlink
+from os import walk, path as ospath, makedirs, readlink, scandir
 from re import split as re_split, I, search as re_search, escape
 from shutil import rmtree
 from subprocess import run as srun
@@ -161,7 +161,9 @@ def exit_clean_up(signal, frame):
 
 async def clean_unwanted(opath):
     LOGGER.info(f"Cleaning unwanted files/folders: {opath}")
-    for dirpath, _, files in await sync_to_async(walk, opath, topdown=False):
+    for dirpath, _, files in await sync_to_async(
+        lambda: list(walk(opath, topdown=False)), pool="fs"
+    ):
         for filee in files:
             f_path = ospath.join(dirpath, filee)
             if (
@@ -172,7 +174,9 @@ async def clean_unwanted(opath):
                 await remove(f_path)
         if dirpath.endswith(".unwanted"):
             await aiormtree(dirpath, ignore_errors=True)
-    for dirpath, _, files in await sync_to_async(walk, opath, topdown=False):
+    for dirpath, _, files in await sync_to_async(
+        lambda: list(walk(opath, topdown=False)), pool="fs"
+    ):
         if not await listdir(dirpath):
             await rmdir(dirpath)
 
@@ -183,7 +187,7 @@ async def get_path_size(opath):
         if await aiopath.islink(opath):
             opath = await aioreadlink(opath)
         return await aiopath.getsize(opath)
-    for root, _, files in await sync_to_async(walk, opath):
+    for root, _, files in await sync_to_async(lambda: list(walk(opath)), pool="fs"):
         for f in files:
             abs_path = ospath.join(root, f)
             if await aiopath.islink(abs_path):
@@ -195,7 +199,7 @@ async def get_path_size(opath):
 async def count_files_and_folders(opath, extension_filter):
     total_files = 0
     total_folders = 0
-    for _, dirs, files in await sync_to_async(walk, opath):
+    for _, dirs, files in await sync_to_async(lambda: list(walk(opath)), pool="fs"):
         total_files += len(files)
         for f in files:
             if f.lower().endswith(tuple(extension_filter)):
@@ -204,6 +208,181 @@ async def count_files_and_folders(opath, extension_filter):
     return total_folders, total_files
 
 
+class FileManifest:
+    def __init__(self):
+        self._files = {}
+        # dirpath -> (file names, dir names), so changes only touch their subtree
+        self._dirs = {}
+        self._roots = set()
+
+    def _covered(self, path):
+        return any(
+            path == root or path.startswith(f"{root}/") for root in self._roots
+        )
+
+    def _link(self, path, is_dir):
+        while True:
+            parent, name = ospath.split(path)
+            created = False
+            if (node := self._dirs.get(parent)) is None:
+                if parent == path or not self._covered(parent):
+                    return
+                node = self._dirs[parent] = (set(), set())
+                created = True
+            (node[1] if is_dir else node[0]).add(name)
+            if not created:
+                return
+            path, is_dir = parent, True
+
+    def _unlink(self, path, is_dir):
+        parent, name = ospath.split(path)
+        if (node := self._dirs.get(parent)) is not None:
+            (node[1] if is_dir else node[0]).discard(name)
+
+    def _subtree(self, path):
+        dirs = [path]
+        for dirpath in dirs:
+            dirs.extend(f"{dirpath}/{name}" for name in self._dirs[dirpath][1])
+        return dirs
+
+    def _add_file(self, path, st):
+        self._files[path] = st
+        self._link(path, False)
+
+    def _add_dir(self, path):
+        if path not in self._dirs:
+            self._dirs[path] = (set(), set())
+            self._link(path, True)
+
+    def _drop(self, path):
+        if self._files.pop(path, None) is not None:
+            self._unlink(path, False)
+            return
+        if path not in self._dirs:
+            return
+        for dirpath in self._subtree(path):
+            for name in self._dirs.pop(dirpath)[0]:
+                self._files.pop(f"{dirpath}/{name}", None)
+        self._unlink(path, True)
+
+    def _scan(self, path):
+        self._drop(path)
+        if ospath.isfile(path):
+            self._add_file(path, (ospath.getsize(path), ospath.getmtime(path)))
+            return
+        if not ospath.isdir(path):
+            return
+        self._add_dir(path)
+        stack = [path]
+        while stack:
+            dirpath = stack.pop()
+            try:
+                entries = scandir(dirpath)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            self._add_dir(entry.path)
+                            stack.append(entry.path)
+                        elif entry.is_file():
+                            st = entry.stat()
+                            self._add_file(entry.path, (st.st_size, st.st_mtime))
+                    except OSError:
+                        continue
+
+    def _scan_files(self, dirpath):
+        self._add_dir(dirpath)
+        names = self._dirs[dirpath][0]
+        for name in names:
+            self._files.pop(f"{dirpath}/{name}", None)
+        names.clear()
+        try:
+            with scandir(dirpath) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        st = entry.stat()
+                        self._add_file(entry.path, (st.st_size, st.st_mtime))
+        except OSError:
+            pass
+
+    async def _ensure(self, path):
+        if not self._covered(path):
+            await self.scan(path)
+
+    async def scan(self, path):
+        path = ospath.normpath(path)
+        await sync_to_async(self._scan, path, pool="fs")
+        self._roots.add(path)
+
+    async def add(self, path):
+        path = ospath.normpath(path)
+        if self._covered(path):
+            await sync_to_async(self._scan, path, pool="fs")
+
+    async def refresh_dir(self, dirpath):
+        dirpath = ospath.normpath(dirpath)
+        if self._covered(dirpath):
+            await sync_to_async(self._scan_files, dirpath, pool="fs")
+
+    def remove(self, path):
+        self._drop(ospath.normpath(path))
+
+    def move(self, src, dst):
+        src, dst = ospath.normpath(src), ospath.normpath(dst)
+        self._drop(dst)
+        if (st := self._files.pop(src, None)) is not None:
+            self._unlink(src, False)
+            self._add_file(dst, st)
+            return
+        if src not in self._dirs:
+            return
+        self._unlink(src, True)
+        for dirpath in self._subtree(src):
+            node = self._dirs.pop(dirpath)
+            new_dirpath = f"{dst}{dirpath[len(src):]}"
+            self._dirs[new_dirpath] = node
+            for name in node[0]:
+                self._files[f"{new_dirpath}/{name}"] = self._files.pop(
+                    f"{dirpath}/{name}"
+                )
+        self._link(dst, True)
+
+    async def size(self, path):
+        path = ospath.normpath(path)
+        await self._ensure(path)
+        if (entry := self._files.get(path)) is not None:
+            return entry[0]
+        if path not in self._dirs:
+            return 0
+        return sum(
+            self._files[f"{dirpath}/{name}"][0]
+            for dirpath in self._subtree(path)
+            for name in self._dirs[dirpath][0]
+        )
+
+    async def walk(self, path):
+        path = ospath.normpath(path)
+        await self._ensure(path)
+        if path not in self._dirs:
+            return []
+        # deepest dirs first, like os.walk(topdown=False)
+        dirs = sorted(self._subtree(path), key=lambda d: d.count("/"), reverse=True)
+        return [(dirpath, list(self._dirs[dirpath][0])) for dirpath in dirs]
+
+    async def count(self, path, extension_filter):
+        total_files = 0
+        total_folders = -1
+        for _, files in await self.walk(path):
+            total_folders += 1
+            total_files += len(files)
+            for f in files:
+                if f.lower().endswith(tuple(extension_filter)):
+                    total_files -= 1
+        return max(total_folders, 0), total_files
+
+
 def get_base_name(orig_path):
     extension = next((ext for ext in ARCH_EXT if orig_path.lower().endswith(ext)), "")
     if extension != "":
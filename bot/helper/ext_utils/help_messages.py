@@ -280,6 +280,7 @@ MIRROR_HELP_DICT = {
     "New-Name": new_name,
     "DL-Auth": "<b>Direct link authorization</b>: -au -ap\n\n/cmd link -au username -ap password",
     "Headers": "<b>Direct link custom headers</b>: -h\n\n/cmd link -h key: value key1: value1",
+    "Parallel-Downloads": "<b>Direct link parallel downloads</b>: -pd\n\nNumber of files from a folder link downloaded at the same time.\n/cmd link -pd 5",
     "Extract/Zip": extract_zip,
     "Select-Files": "<b>Bittorrent/JDownloader/Sabnzbd File Selection</b>: -s\n\n/cmd link -s or by replying to file/link",
     "Torrent-Seed": seed,
@@ -0,0 +1,78 @@
+from asyncio import Event
+from collections import OrderedDict
+from time import time
+
+from ... import LOGGER, bot_loop
+
+LISTING_CACHE_TTL = 60
+
+
+class Listing:
+    def __init__(self):
+        self.items = []
+        self.done = False
+        self.error = None
+        self.time = time()
+        self._event = Event()
+
+    def _notify(self):
+        self._event.set()
+        self._event = Event()
+
+    def extend(self, items):
+        if items:
+            self.items.extend(items)
+            self._notify()
+
+    def finish(self, error=None):
+        self.error = error
+        self.done = True
+        self.time = time()
+        self._notify()
+
+    async def wait(self, count=None):
+        while not self.done and (count is None or len(self.items) < count):
+            await self._event.wait()
+
+
+class ListingCache:
+    """directory listings shared by the rclone and gdrive browsers"""
+
+    def __init__(self, ttl=LISTING_CACHE_TTL, max_entries=256):
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key, producer):
+        listing = self._entries.get(key)
+        if listing is not None and (
+            not listing.done
+            or listing.error is None
+            and time() - listing.time < self._ttl
+        ):
+            self._entries.move_to_end(key)
+            return listing
+        listing = Listing()
+        self._entries[key] = listing
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        bot_loop.create_task(self._produce(key, listing, producer))
+        return listing
+
+    async def _produce(self, key, listing, producer):
+        try:
+            await producer(listing)
+        except Exception as e:
+            LOGGER.error(f"While listing {key}: {e}")
+            listing.finish(e)
+        else:
+            if not listing.done:
+                listing.finish()
+        if listing.error is not None and self._entries.get(key) is listing:
+            del self._entries[key]
+
+    def invalidate(self, key):
+        self._entries.pop(key, None)
+
+
+listing_cache = ListingCache()
@@ -1,18 +1,21 @@
 from PIL import Image
-from aiofiles.os import remove, path as aiopath, makedirs
+from aiofiles.os import remove, path as aiopath, makedirs, stat as aiostat
 from asyncio import (
     create_subprocess_exec,
     gather,
     wait_for,
     sleep,
+    Queue,
 )
 from asyncio.subprocess import PIPE
+from collections import OrderedDict
+from json import loads, JSONDecodeError
 from os import path as ospath, cpu_count
 from re import search as re_search, escape
 from time import time
 from aioshutil import rmtree
 
-from ... import LOGGER
+from ... import LOGGER, bot_loop
 from ...core.config_manager import Config
 from .bot_utils import cmd_exec, sync_to_async
 from .files_utils import get_mime_type, is_archive, is_archive_split
@@ -28,30 +31,109 @@ async def create_thumb(msg, _id=""):
     await makedirs(path, exist_ok=True)
     photo_dir = await msg.download()
     output = ospath.join(path, f"{_id}.jpg")
-    await sync_to_async(Image.open(photo_dir).convert("RGB").save, output, "JPEG")
+    await sync_to_async(
+        Image.open(photo_dir).convert("RGB").save, output, "JPEG", pool="fs"
+    )
     await remove(photo_dir)
     return output
 
 
-async def get_media_info(path):
-    try:
-        result = await cmd_exec(
-            [
-                "ffprobe",
-                "-hide_banner",
-                "-loglevel",
-                "error",
-                "-print_format",
-                "json",
-                "-show_format",
-                path,
-            ]
+class MediaProbeCache:
+    def __init__(self, max_size=2048):
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._pending = {}
+
+    async def _key(self, path):
+        try:
+            st = await aiostat(path)
+        except OSError:
+            return None
+        return path, st.st_size, st.st_mtime_ns
+
+    def _get(self, key):
+        if (entry := self._entries.get(key)) is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _put(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    async def _run(self, key, attr, func, keep=None):
+        entry = self._get(key)
+        if entry is not None and attr in entry:
+            return entry[attr]
+        pkey = (key, attr)
+        if (task := self._pending.get(pkey)) is None:
+            task = self._pending[pkey] = bot_loop.create_task(func(key[0]))
+        try:
+            value = await task
+        finally:
+            self._pending.pop(pkey, None)
+        if value is not None and (keep is None or keep(value)):
+            entry = self._get(key) or {}
+            entry[attr] = value
+            self._put(key, entry)
+        return value
+
+    async def mime_type(self, path):
+        if (key := await self._key(path)) is None:
+            return await sync_to_async(get_mime_type, path, pool="fs")
+        return await self._run(
+            key, "mime", lambda p: sync_to_async(get_mime_type, p, pool="fs")
         )
-    except Exception as e:
-        LOGGER.error(f"Get Media Info: {e}. Mostly File not found! - File: {path}")
+
+    async def probe(self, path):
+        if (key := await self._key(path)) is None:
+            return await self._ffprobe(path)
+        # failed probes may be transient (file still being written), don't keep them
+        return await self._run(
+            key, "probe", self._ffprobe, lambda res: res["code"] == 0 and res["data"]
+        )
+
+    async def _ffprobe(self, path):
+        try:
+            stdout, stderr, code = await cmd_exec(
+                [
+                    "ffprobe",
+                    "-hide_banner",
+                    "-loglevel",
+                    "error",
+                    "-print_format",
+                    "json",
+                    "-show_format",
+                    "-show_streams",
+                    path,
+                ]
+            )
+        except Exception as e:
+            LOGGER.error(f"FFprobe: {e}. Mostly File not found! - File: {path}")
+            return None
+        data = {}
+        if stdout and code == 0:
+            try:
+                data = loads(stdout)
+            except JSONDecodeError:
+                LOGGER.error(f"FFprobe: invalid output for {path}: {stdout}")
+        return {"data": data, "stderr": stderr, "code": code}
+
+    def move(self, src, dst):
+        for key in [key for key in self._entries if key[0] == src]:
+            self._entries[(dst, *key[1:])] = self._entries.pop(key)
+
+
+probe_cache = MediaProbeCache()
+
+
+async def get_media_info(path):
+    result = await probe_cache.probe(path)
+    if result is None:
         return 0, None, None
-    if result[0] and result[2] == 0:
-        fields = eval(result[0]).get("format")
+    if result["code"] == 0:
+        fields = result["data"].get("format")
         if fields is None:
             LOGGER.error(f"get_media_info: {result}")
             return 0, None, None
@@ -71,26 +153,11 @@ async def get_document_type(path):
         or re_search(r".+(\.|_)(rar|7z|zip|bin)(\.0*\d+)?$", path)
     ):
         return is_video, is_audio, is_image
-    mime_type = await sync_to_async(get_mime_type, path)
+    mime_type = await probe_cache.mime_type(path)
     if mime_type.startswith("image"):
         return False, False, True
-    try:
-        result = await cmd_exec(
-            [
-                "ffprobe",
-                "-hide_banner",
-                "-loglevel",
-                "error",
-                "-print_format",
-                "json",
-                "-show_streams",
-                path,
-            ]
-        )
-        if result[1] and mime_type.startswith("video"):
-            is_video = True
-    except Exception as e:
-        LOGGER.error(f"Get Document Type: {e}. Mostly File not found! - File: {path}")
+    result = await probe_cache.probe(path)
+    if result is None:
         if mime_type.startswith("audio"):
             return False, True, False
         if not mime_type.startswith("video") and not mime_type.endswith("octet-stream"):
@@ -98,8 +165,10 @@ async def get_document_type(path):
         if mime_type.startswith("video"):
             is_video = True
         return is_video, is_audio, is_image
-    if result[0] and result[2] == 0:
-        fields = eval(result[0]).get("streams")
+    if result["stderr"] and mime_type.startswith("video"):
+        is_video = True
+    if result["code"] == 0:
+        fields = result["data"].get("streams")
         if fields is None:
             LOGGER.error(f"get_document_type: {result}")
             return is_video, is_audio, is_image
@@ -112,6 +181,93 @@ async def get_document_type(path):
     return is_video, is_audio, is_image
 
 
+NON_MEDIA_EXTENSIONS = (
+    ".txt",
+    ".nfo",
+    ".srt",
+    ".ass",
+    ".ssa",
+    ".sub",
+    ".idx",
+    ".vtt",
+    ".json",
+    ".xml",
+    ".html",
+    ".htm",
+    ".url",
+    ".md5",
+    ".sfv",
+    ".torrent",
+    ".pdf",
+    ".epub",
+    ".doc",
+    ".docx",
+    ".exe",
+    ".msi",
+    ".apk",
+    ".iso",
+    ".py",
+    ".db",
+)
+
+NON_MEDIA_SIGNATURES = (
+    b"%PDF",
+    b"PK\x03\x04",
+    b"Rar!\x1a\x07",
+    b"7z\xbc\xaf\x27\x1c",
+    b"\x1f\x8b",
+    b"BZh",
+    b"\xfd7zXZ\x00",
+    b"\x7fELF",
+    b"MZ",
+    b"SQLite format 3",
+)
+
+
+def _read_signature(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read(16)
+    except OSError:
+        return b""
+
+
+async def is_non_media(path):
+    if path.lower().endswith(NON_MEDIA_EXTENSIONS):
+        return True
+    head = await sync_to_async(_read_signature, path, pool="fs")
+    return not head or head.startswith(NON_MEDIA_SIGNATURES)
+
+
+async def classify_media(paths, limit=None):
+    paths = list(paths)
+    limit = min(
+        limit or Config.MEDIA_PROBE_CONCURRENCY or cpu_count() or 1, len(paths)
+    )
+    pending = iter(paths)
+    results = Queue()
+
+    async def worker():
+        for path in pending:
+            try:
+                if await is_non_media(path):
+                    result = False, False, False
+                else:
+                    result = await get_document_type(path)
+            except Exception as e:
+                LOGGER.error(f"Classify Media: {e} - File: {path}")
+                result = False, False, False
+            await results.put((path, result))
+
+    workers = [bot_loop.create_task(worker()) for _ in range(limit)]
+    try:
+        for _ in range(len(paths)):
+            yield await results.get()
+    finally:
+        for task in workers:
+            task.cancel()
+
+
 async def take_ss(video_file, ss_nb) -> bool:
     duration = (await get_media_info(video_file))[0]
     if duration != 0:
@@ -0,0 +1,75 @@
+from qbittorrentapi import TorrentDictionary
+from threading import Lock
+from time import time
+
+from ... import LOGGER, qbittorrent_client
+
+
+class QbSync:
+    def __init__(self, max_age=1):
+        self._max_age = max_age
+        self._lock = Lock()
+        self._rid = 0
+        self._raw = {}
+        self._torrents = {}
+        self._tags = {}
+        self._changed = set()
+        self.last_sync = 0
+
+    def refresh(self, force=False):
+        with self._lock:
+            if not force and time() - self.last_sync < self._max_age:
+                return
+            try:
+                data = qbittorrent_client.sync_maindata(rid=self._rid)
+            except Exception as e:
+                LOGGER.error(f"{e}: Qbittorrent, while syncing main data")
+                return
+            if data.get("full_update"):
+                self._raw.clear()
+                self._torrents.clear()
+            changed = data.get("torrents") or {}
+            self._changed.update(changed)
+            for hash_, fields in changed.items():
+                raw = self._raw.setdefault(hash_, {"hash": hash_})
+                raw.update(fields)
+                self._torrents[hash_] = TorrentDictionary(raw, qbittorrent_client)
+            for hash_ in data.get("torrents_removed") or []:
+                self._raw.pop(hash_, None)
+                self._torrents.pop(hash_, None)
+                self._changed.discard(hash_)
+            self._tags = {tor.tags: tor for tor in self._torrents.values()}
+            self._rid = data.get("rid", 0)
+            self.last_sync = time()
+
+    def reset(self):
+        with self._lock:
+            self._rid = 0
+            self._raw.clear()
+            self._torrents.clear()
+            self._tags.clear()
+            self._changed.clear()
+            self.last_sync = 0
+
+    def pop_changed(self):
+        with self._lock:
+            changed = self._changed
+            self._changed = set()
+        return changed
+
+    def requeue(self, hashes):
+        # dispatch failed, report these again on the next tick
+        with self._lock:
+            self._changed.update(h for h in hashes if h in self._torrents)
+
+    def torrents(self):
+        return list(self._torrents.values())
+
+    def get_by_tag(self, tag):
+        return self._tags.get(tag)
+
+    def get_by_hash(self, hash_):
+        return self._torrents.get(hash_)
+
+
+qb_sync = QbSync()
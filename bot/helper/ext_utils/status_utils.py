@@ -54,13 +54,14 @@ STATUSES = {
 
 
 async def get_task_by_gid(gid: str):
-    async with task_dict_lock:
-        for tk in task_dict.values():
+    if tk := task_dict.get_by_gid(gid):
+        return tk
+    for mid in list(task_dict.pending):
+        if (tk := task_dict.get(mid)) is not None:
             if hasattr(tk, "seeding"):
                 await sync_to_async(tk.update)
-            if tk.gid() == gid:
-                return tk
-        return None
+            task_dict.index(tk)
+    return task_dict.get_by_gid(gid)
 
 
 def get_specific_tasks(status, user_id):
@@ -163,11 +164,97 @@ def get_progress_bar_string(pct):
     return f"[{p_str}]"
 
 
+_render_cache = {"tick": None, "status": {}, "fragment": {}, "footer": None}
+
+
+def clear_render_cache():
+    _render_cache["tick"] = None
+
+
+def _get_render_cache():
+    tick = round(time() / Config.STATUS_UPDATE_INTERVAL)
+    if _render_cache["tick"] != tick:
+        _render_cache.update(tick=tick, status={}, fragment={}, footer=None)
+    return _render_cache
+
+
+def _cached_status(cache, task):
+    if (st := cache["status"].get(task)) is None:
+        st = cache["status"][task] = task.status()
+    return st
+
+
+def _get_cached_tasks(cache, status, user_id):
+    tasks = [
+        tk for tk in task_dict.values() if not user_id or tk.listener.user_id == user_id
+    ]
+    if status == "All":
+        return tasks
+    return [
+        tk
+        for tk in tasks
+        if (st := _cached_status(cache, tk)) == status
+        or status == MirrorStatus.STATUS_DOWNLOAD
+        and st not in STATUSES.values()
+    ]
+
+
+async def _render_task(task, tstatus):
+    msg = f"<code>{escape(f'{task.name()}')}</code>"
+    if task.listener.subname:
+        msg += f"\n<i>{task.listener.subname}</i>"
+    if (
+        tstatus not in [MirrorStatus.STATUS_SEED, MirrorStatus.STATUS_QUEUEUP]
+        and task.listener.progress
+    ):
+        progress = (
+            await task.progress()
+            if iscoroutinefunction(task.progress)
+            else task.progress()
+        )
+        msg += f"\n{get_progress_bar_string(progress)} {progress}"
+        if task.listener.subname:
+            subsize = f"/{get_readable_file_size(task.listener.subsize)}"
+            ac = len(task.listener.files_to_proceed)
+            count = f"({task.listener.proceed_count}/{ac or '?'})"
+        else:
+            subsize = ""
+            count = ""
+        msg += f"\n<b>Processed:</b> {task.processed_bytes()}{subsize} {count}"
+        msg += f"\n<b>Size:</b> {task.size()}"
+        msg += f"\n<b>Speed:</b> {task.speed()}"
+        msg += f"\n<b>ETA:</b> {task.eta()}"
+        if hasattr(task, "seeders_num"):
+            try:
+                msg += f"\n<b>Seeders:</b> {task.seeders_num()} | <b>Leechers:</b> {task.leechers_num()}"
+            except:
+                pass
+    elif tstatus == MirrorStatus.STATUS_SEED:
+        msg += f"\n<b>Size: </b>{task.size()}"
+        msg += f"\n<b>Speed: </b>{task.seed_speed()}"
+        msg += f" | <b>Uploaded: </b>{task.uploaded_bytes()}"
+        msg += f"\n<b>Ratio: </b>{task.ratio()}"
+        msg += f" | <b>Time: </b>{task.seeding_time()}"
+    else:
+        msg += f"\n<b>Size: </b>{task.size()}"
+    msg += f"\n<b>Gid: </b><code>{task.gid()}</code>\n\n"
+    return msg
+
+
+async def _render_footer():
+    msg = f"<b>CPU:</b> {cpu_percent()}% | <b>TEMP:</b> {await get_cpu_temp()} | <b>FREE:</b> {get_readable_file_size(disk_usage(Config.DOWNLOAD_DIR).free)}"
+    msg += f"\n<b>RAM:</b> {virtual_memory().percent}% | <b>UPTIME:</b> {get_readable_time(time() - bot_start_time)}"
+    return msg
+
+
 async def get_readable_message(sid, is_user, page_no=1, status="All", page_step=1):
     msg = ""
     button = None
 
-    tasks = await sync_to_async(get_specific_tasks, status, sid if is_user else None)
+    cache = _get_render_cache()
+    tasks = await sync_to_async(
+        _get_cached_tasks, cache, status, sid if is_user else None
+    )
 
     STATUS_LIMIT = Config.STATUS_LIMIT
     tasks_no = len(tasks)
@@ -183,49 +270,15 @@ async def get_readable_message(sid, is_user, page_no=1, status="All", page_step=
     for index, task in enumerate(
         tasks[start_position : STATUS_LIMIT + start_position], start=1
     ):
-        tstatus = await sync_to_async(task.status) if status == "All" else status
+        st = await sync_to_async(_cached_status, cache, task)
+        tstatus = st if status == "All" else status
         if task.listener.is_super_chat:
             msg += f"<b>{index + start_position}.<a href='{task.listener.message.link}'>{tstatus}</a>: </b>"
         else:
             msg += f"<b>{index + start_position}.{tstatus}: </b>"
-        msg += f"<code>{escape(f'{task.name()}')}</code>"
-        if task.listener.subname:
-            msg += f"\n<i>{task.listener.subname}</i>"
-        if (
-            tstatus not in [MirrorStatus.STATUS_SEED, MirrorStatus.STATUS_QUEUEUP]
-            and task.listener.progress
-        ):
-            progress = (
-                await task.progress()
-                if iscoroutinefunction(task.progress)
-                else task.progress()
-            )
-            msg += f"\n{get_progress_bar_string(progress)} {progress}"
-            if task.listener.subname:
-                subsize = f"/{get_readable_file_size(task.listener.subsize)}"
-                ac = len(task.listener.files_to_proceed)
-                count = f"({task.listener.proceed_count}/{ac or '?'})"
-            else:
-                subsize = ""
-                count = ""
-            msg += f"\n<b>Processed:</b> {task.processed_bytes()}{subsize} {count}"
-            msg += f"\n<b>Size:</b> {task.size()}"
-            msg += f"\n<b>Speed:</b> {task.speed()}"
-            msg += f"\n<b>ETA:</b> {task.eta()}"
-            if hasattr(task, "seeders_num"):
-                try:
-                    msg += f"\n<b>Seeders:</b> {task.seeders_num()} | <b>Leechers:</b> {task.leechers_num()}"
-                except:
-                    pass
-        elif tstatus == MirrorStatus.STATUS_SEED:
-            msg += f"\n<b>Size: </b>{task.size()}"
-            msg += f"\n<b>Speed: </b>{task.seed_speed()}"
-            msg += f" | <b>Uploaded: </b>{task.uploaded_bytes()}"
-            msg += f"\n<b>Ratio: </b>{task.ratio()}"
-            msg += f" | <b>Time: </b>{task.seeding_time()}"
-        else:
-            msg += f"\n<b>Size: </b>{task.size()}"
-        msg += f"\n<b>Gid: </b><code>{task.gid()}</code>\n\n"
+        if (fragment := cache["fragment"].get(task)) is None:
+            fragment = cache["fragment"][task] = await _render_task(task, st)
+        msg += fragment
 
     if len(msg) == 0:
         if status == "All":
@@ -248,8 +301,9 @@ async def get_readable_message(sid, is_user, page_no=1, status="All", page_step=
                 buttons.data_button(label, f"status {sid} st {status_value}")
     buttons.data_button("♻️", f"status {sid} ref", position="header")
     button = buttons.build_menu(8)
-    msg += f"<b>CPU:</b> {cpu_percent()}% | <b>TEMP:</b> {await get_cpu_temp()} | <b>FREE:</b> {get_readable_file_size(disk_usage(Config.DOWNLOAD_DIR).free)}"
-    msg += f"\n<b>RAM:</b> {virtual_memory().percent}% | <b>UPTIME:</b> {get_readable_time(time() - bot_start_time)}"
+    if cache["footer"] is None:
+        cache["footer"] = await _render_footer()
+    msg += cache["footer"]
     return msg, button
 
 
@@ -9,6 +9,7 @@ from ... import (
     LOGGER,
 )
 from ...core.config_manager import Config
+from ..mirror_leech_utils.gdrive_utils.dup_index import drive_index
 from ..mirror_leech_utils.gdrive_utils.search import GoogleDriveSearch
 from .bot_utils import sync_to_async, get_telegraph_list
 from .files_utils import get_base_name
@@ -39,6 +40,9 @@ async def stop_duplicate_check(listener):
             name = None
 
     if name is not None:
+        # a fresh local index answers misses, hits are confirmed by the live search
+        if await drive_index.lookup(listener.up_dest, name) is False:
+            return False, None
         telegraph_content, contents_no = await sync_to_async(
             GoogleDriveSearch(stop_dup=True, no_multi=listener.is_clone).drive_list,
             name,
@@ -4,6 +4,7 @@ from time import time
 
 from ... import aria2, task_dict_lock, task_dict, LOGGER, intervals
 from ...core.config_manager import Config
+from ..ext_utils.aria2_sync import aria2_sync
 from ..ext_utils.bot_utils import loop_thread, bt_selection_buttons, sync_to_async
 from ..ext_utils.files_utils import clean_unwanted
 from ..ext_utils.status_utils import get_task_by_gid
@@ -18,6 +19,7 @@ from ..telegram_helper.message_utils import (
 
 @loop_thread
 async def _on_download_started(api, gid):
+    aria2_sync.invalidate(gid)
     download = await sync_to_async(api.get_download, gid)
     if download.options.follow_torrent == "false":
         return
@@ -54,6 +56,7 @@ async def _on_download_started(api, gid):
 
 @loop_thread
 async def _on_download_complete(api, gid):
+    aria2_sync.invalidate(gid)
     try:
         download = await sync_to_async(api.get_download, gid)
     except:
@@ -63,7 +66,8 @@ async def _on_download_complete(api, gid):
     if download.followed_by_ids:
         new_gid = download.followed_by_ids[0]
         LOGGER.info(f"Gid changed from {gid} to {new_gid}")
-        if task := await get_task_by_gid(new_gid):
+        if task := await get_task_by_gid(gid):
+            task_dict.alias(new_gid, task)
             task.listener.is_torrent = True
             if Config.BASE_URL and task.listener.select:
                 if not task.queued:
@@ -91,6 +95,7 @@ async def _on_download_complete(api, gid):
 
 @loop_thread
 async def _on_bt_download_complete(api, gid):
+    aria2_sync.invalidate(gid)
     seed_start_time = time()
     await sleep(1)
     download = await sync_to_async(api.get_download, gid)
@@ -152,6 +157,7 @@ async def _on_bt_download_complete(api, gid):
 
 @loop_thread
 async def _on_download_stopped(_, gid):
+    aria2_sync.invalidate(gid)
     await sleep(4)
     if task := await get_task_by_gid(gid):
         await task.listener.on_download_error("Dead torrent!")
@@ -159,6 +165,7 @@ async def _on_download_stopped(_, gid):
 
 @loop_thread
 async def _on_download_error(api, gid):
+    aria2_sync.invalidate(gid)
     await sleep(1)
     LOGGER.info(f"onDownloadError: {gid}")
     error = "None"
@@ -175,8 +182,10 @@ async def _on_download_error(api, gid):
 
 
 def start_aria2_listener():
+    # aria2p runs the websocket loop on its own daemon thread, it must not pin
+    # one of the transfer pool's slots for the bot's whole lifetime
     aria2.listen_to_notifications(
-        threaded=False,
+        threaded=True,
         on_download_start=_on_download_started,
         on_download_error=_on_download_error,
         on_download_stop=_on_download_stopped,
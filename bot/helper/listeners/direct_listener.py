@@ -1,80 +1,160 @@
 from time import sleep
 
 from ... import LOGGER, aria2
+from ...core.config_manager import Config
+from ..ext_utils.aria2_sync import aria2_sync
 from ..ext_utils.bot_utils import async_to_sync, sync_to_async
 
 
 class DirectListener:
-    def __init__(self, path, listener, a2c_opt):
+    def __init__(self, path, listener, a2c_opt, parallel=0):
         self.listener = listener
         self._path = path
         self._a2c_opt = a2c_opt
+        self._parallel = max(parallel or Config.DIRECT_PARALLEL_DOWNLOADS or 1, 1)
         self._proc_bytes = 0
         self._failed = 0
-        self.download_task = None
+        self._index = 0
+        self.download_tasks = {}
         self.name = self.listener.name
+        self._contents = None
 
     @property
     def processed_bytes(self):
-        if self.download_task:
-            return self._proc_bytes + self.download_task.completed_length
-        return self._proc_bytes
+        return self._proc_bytes + sum(
+            task.completed_length for task in list(self.download_tasks.values())
+        )
 
     @property
     def speed(self):
-        return self.download_task.download_speed if self.download_task else 0
+        return sum(task.download_speed for task in list(self.download_tasks.values()))
+
+    @property
+    def is_waiting(self):
+        tasks = list(self.download_tasks.values())
+        return bool(tasks) and all(task.is_waiting for task in tasks)
+
+    def _add_download(self, content):
+        a2c_opt = self._a2c_opt.copy()
+        if content["path"]:
+            a2c_opt["dir"] = f"{self._path}/{content['path']}"
+        else:
+            a2c_opt["dir"] = self._path
+        filename = content["filename"]
+        a2c_opt["out"] = filename
+        try:
+            task = aria2.add_uris([content["url"]], a2c_opt, position=0)
+        except Exception as e:
+            self._failed += 1
+            LOGGER.error(f"Unable to download {filename} due to: {e}")
+            return False
+        self.download_tasks[task.gid] = task
+        return True
+
+    @property
+    def _streaming(self):
+        # folder links may still be crawled while the first files download
+        return hasattr(self._contents, "cancel")
+
+    def _fill_slots(self, contents):
+        streaming = self._streaming
+        if streaming and not self.download_tasks:
+            contents.wait(self._index + 1)
+        added = False
+        while len(self.download_tasks) < self._parallel and self._index < len(
+            contents
+        ):
+            added = self._add_download(contents[self._index]) or added
+            self._index += 1
+        if streaming:
+            self.listener.size = contents.total_size
+        if added:
+            aria2_sync.invalidate()
+        return self._index < len(contents) or (streaming and not contents.done)
+
+    def _check_downloads(self):
+        completed = []
+        failed = []
+        for gid, task in list(self.download_tasks.items()):
+            if (update := aria2_sync.get(gid)) is None:
+                # outside the snapshot window, ask aria2 for this gid only
+                try:
+                    update = aria2.get_download(gid)
+                except Exception as e:
+                    LOGGER.error(f"{e}: Direct download, while updating {task.name}")
+            task = update or task
+            self.download_tasks[gid] = task
+            if error_message := task.error_message:
+                LOGGER.error(f"Unable to download {task.name} due to: {error_message}")
+                failed.append(task)
+            elif task.is_complete:
+                completed.append(task)
+        for task in completed:
+            self._proc_bytes += task.total_length
+            del self.download_tasks[task.gid]
+        for task in failed:
+            self._failed += 1
+            del self.download_tasks[task.gid]
+        try:
+            if completed:
+                aria2.remove(completed, force=True)
+            if failed:
+                aria2.remove(failed, force=True, files=True)
+        except Exception as e:
+            LOGGER.error(f"{e}: Direct download, while removing finished files")
 
     def download(self, contents):
         self.is_downloading = True
-        for content in contents:
+        self._contents = contents
+        pending = True
+        while pending or self.download_tasks:
             if self.listener.is_cancelled:
                 break
-            if content["path"]:
-                self._a2c_opt["dir"] = f"{self._path}/{content['path']}"
-            else:
-                self._a2c_opt["dir"] = self._path
-            filename = content["filename"]
-            self._a2c_opt["out"] = filename
-            try:
-                self.download_task = aria2.add_uris(
-                    [content["url"]], self._a2c_opt, position=0
-                )
-            except Exception as e:
-                self._failed += 1
-                LOGGER.error(f"Unable to download {filename} due to: {e}")
+            if self._streaming and contents.error is not None:
+                break
+            if pending:
+                pending = self._fill_slots(contents)
+            if not self.download_tasks:
                 continue
-            self.download_task = self.download_task.live
-            while True:
-                if self.listener.is_cancelled:
-                    if self.download_task:
-                        self.download_task.remove(True, True)
-                    break
-                self.download_task = self.download_task.live
-                if error_message := self.download_task.error_message:
-                    self._failed += 1
-                    LOGGER.error(
-                        f"Unable to download {self.download_task.name} due to: {error_message}"
-                    )
-                    self.download_task.remove(True, True)
-                    break
-                elif self.download_task.is_complete:
-                    self._proc_bytes += self.download_task.total_length
-                    self.download_task.remove(True)
-                    break
-                sleep(1)
-            self.download_task = None
+            sleep(1)
+            self._check_downloads()
         if self.listener.is_cancelled:
+            self._stop_crawl()
+            self._remove_all()
             return
+        if self._streaming:
+            if contents.error is not None:
+                self._remove_all()
+                async_to_sync(
+                    self.listener.on_download_error, str(contents.error), wait=False
+                )
+                return
+            self.listener.size = contents.total_size
         if self._failed == len(contents):
             async_to_sync(
-                self.listener.on_download_error, "All files are failed to download!"
+                self.listener.on_download_error,
+                "All files are failed to download!",
+                wait=False,
             )
             return
-        async_to_sync(self.listener.on_download_complete)
+        async_to_sync(self.listener.on_download_complete, wait=False)
+
+    def _stop_crawl(self):
+        if self._streaming:
+            self._contents.cancel()
+
+    def _remove_all(self):
+        if tasks := list(self.download_tasks.values()):
+            self.download_tasks.clear()
+            try:
+                aria2.remove(tasks, force=True, files=True)
+            except Exception as e:
+                LOGGER.error(f"{e}: Direct download, while removing files")
 
     async def cancel_task(self):
         self.listener.is_cancelled = True
         LOGGER.info(f"Cancelling Download: {self.listener.name}")
         await self.listener.on_download_error("Download Cancelled by User!")
-        if self.download_task:
-            await sync_to_async(self.download_task.remove, force=True, files=True)
+        # wakes a download thread still waiting for the crawl to find files
+        self._stop_crawl()
+        await sync_to_async(self._remove_all)
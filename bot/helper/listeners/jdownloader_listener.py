@@ -1,10 +1,11 @@
-from asyncio import sleep
-
 from ... import intervals, jd_listener_lock, jd_downloads
+from ..ext_utils.adaptive_poller import POLLERS, BUSY, ACTIVE, IDLE
 from ..ext_utils.bot_utils import new_task
 from ..ext_utils.jdownloader_booter import jdownloader
 from ..ext_utils.status_utils import get_task_by_gid
 
+poller = POLLERS["jd"]
+
 
 @new_task
 async def remove_download(gid):
@@ -44,18 +45,23 @@ async def _on_download_complete(gid):
 @new_task
 async def _jd_listener():
     while True:
-        await sleep(3)
+        await poller.sleep()
+        poller.start_tick()
         async with jd_listener_lock:
             if len(jd_downloads) == 0:
                 intervals["jd"] = ""
                 break
             try:
+                poller.rpc()
                 packages = await jdownloader.device.downloads.query_packages(
                     [{"finished": True, "saveTo": True}]
                 )
             except:
+                poller.end_tick(ACTIVE)
                 continue
 
+            activity = IDLE
+
             all_packages = {pack["uuid"]: pack for pack in packages}
             for d_gid, d_dict in list(jd_downloads.items()):
                 if d_dict["status"] == "down":
@@ -70,7 +76,10 @@ async def _jd_listener():
                             if pk["saveTo"].startswith(path)
                         ]
                     if len(jd_downloads[d_gid]["ids"]) == 0:
+                        activity = BUSY
                         await remove_download(d_gid)
+                    else:
+                        activity = min(activity, ACTIVE)
 
             if completed_packages := [
                 pack["uuid"] for pack in packages if pack.get("finished", False)
@@ -81,11 +90,14 @@ async def _jd_listener():
                             did in completed_packages for did in d_dict["ids"]
                         )
                         if is_finished:
+                            activity = BUSY
                             jd_downloads[d_gid]["status"] = "done"
                             await _on_download_complete(d_gid)
+        poller.end_tick(activity)
 
 
 async def on_download_start():
     async with jd_listener_lock:
+        poller.wake()
         if not intervals["jd"]:
             intervals["jd"] = await _jd_listener()
@@ -1,4 +1,4 @@
-from asyncio import sleep, gather
+from asyncio import gather
 
 from ... import (
     intervals,
@@ -8,10 +8,13 @@ from ... import (
     task_dict_lock,
     LOGGER,
 )
+from ..ext_utils.adaptive_poller import POLLERS, BUSY, ACTIVE, IDLE
 from ..ext_utils.bot_utils import new_task
 from ..ext_utils.status_utils import get_task_by_gid
 from ..ext_utils.task_manager import stop_duplicate_check
 
+poller = POLLERS["nzb"]
+
 
 async def _remove_job(nzo_id, mid):
     res1, _ = await gather(
@@ -57,8 +60,11 @@ async def _on_download_complete(nzo_id):
 @new_task
 async def _nzb_listener():
     while not intervals["stopAll"]:
+        activity = IDLE
+        poller.start_tick()
         async with nzb_listener_lock:
             try:
+                poller.rpc(2)
                 jobs = (await sabnzbd_client.get_history())["history"]["slots"]
                 downloads = (await sabnzbd_client.get_downloads())["queue"]["slots"]
                 if len(nzb_jobs) == 0:
@@ -68,7 +74,10 @@ async def _nzb_listener():
                     nzo_id = job["nzo_id"]
                     if nzo_id not in nzb_jobs:
                         continue
-                    if job["status"] == "Completed":
+                    if job["status"] not in ["Completed", "Failed"]:
+                        # verifying, repairing or extracting
+                        activity = BUSY
+                    elif job["status"] == "Completed":
                         if not nzb_jobs[nzo_id]["uploaded"]:
                             nzb_jobs[nzo_id]["uploaded"] = True
                             await _on_download_complete(nzo_id)
@@ -82,6 +91,15 @@ async def _nzb_listener():
                     if dl["labels"] and dl["labels"][0] == "ALTERNATIVE":
                         await _on_download_error("Duplicated Job!", nzo_id)
                         continue
+                    try:
+                        near_done = float(dl["percentage"]) >= 95
+                    except:
+                        near_done = False
+                    if near_done or dl["status"] != nzb_jobs[nzo_id]["status"]:
+                        activity = BUSY
+                    else:
+                        activity = min(activity, ACTIVE)
+                    nzb_jobs[nzo_id]["status"] = dl["status"]
                     if (
                         dl["status"] == "Downloading"
                         and not nzb_jobs[nzo_id]["stop_dup_check"]
@@ -90,8 +108,10 @@ async def _nzb_listener():
                         nzb_jobs[nzo_id]["stop_dup_check"] = True
                         await _stop_duplicate(nzo_id)
             except Exception as e:
+                activity = ACTIVE
                 LOGGER.error(str(e))
-        await sleep(3)
+        poller.end_tick(activity)
+        await poller.sleep()
 
 
 async def on_download_start(nzo_id):
@@ -101,5 +121,6 @@ async def on_download_start(nzo_id):
             "stop_dup_check": False,
             "status": "Downloading",
         }
+        poller.wake()
         if not intervals["nzb"]:
             intervals["nzb"] = await _nzb_listener()
@@ -12,8 +12,10 @@ from ... import (
     LOGGER,
 )
 from ...core.config_manager import Config
+from ..ext_utils.adaptive_poller import POLLERS, BUSY, ACTIVE, IDLE
 from ..ext_utils.bot_utils import new_task, sync_to_async
 from ..ext_utils.files_utils import clean_unwanted
+from ..ext_utils.qbit_sync import qb_sync
 from ..ext_utils.status_utils import get_readable_time, get_task_by_gid
 from ..ext_utils.task_manager import stop_duplicate_check
 from ..mirror_leech_utils.status_utils.qbit_status import QbittorrentStatus
@@ -31,12 +33,13 @@ async def _remove_torrent(hash_, tag):
 
 
 @new_task
-async def _on_download_error(err, tor, button=None):
+async def _on_download_error(err, tor, button=None, stop=True):
     LOGGER.info(f"Cancelling Download: {tor.name}")
     ext_hash = tor.hash
     if task := await get_task_by_gid(ext_hash[:12]):
         await task.listener.on_download_error(err, button)
-    await sync_to_async(qbittorrent_client.torrents_stop, torrent_hashes=ext_hash)
+    if stop:
+        await sync_to_async(qbittorrent_client.torrents_stop, torrent_hashes=ext_hash)
     #await sleep(0.3)
     #await _remove_torrent(ext_hash, tor.tags)
 
@@ -112,90 +115,137 @@ async def _on_download_complete(tor):
     #    await _remove_torrent(ext_hash, tag)
 
 
+# states that need attention every tick even when qbittorrent reports no change
+WATCH_STATES = ("metaDL", "stalledDL")
+DOWNLOAD_STATES = ("downloading", "forcedDL", "queuedDL", "stalledDL", "metaDL")
+watched_tags = set()
+poller = POLLERS["qb"]
+
+
+def _activity(tag, tor_info):
+    state = tor_info.state
+    last_state = qb_torrents[tag].get("state")
+    qb_torrents[tag]["state"] = state
+    if state != last_state or state.startswith("checking"):
+        return BUSY
+    if state in DOWNLOAD_STATES:
+        return BUSY if tor_info.progress >= 0.95 else ACTIVE
+    return IDLE
+
+
+async def _dispatch(tag, tor_info, batch):
+    state = tor_info.state
+    if state in WATCH_STATES:
+        watched_tags.add(tag)
+    else:
+        watched_tags.discard(tag)
+    if state == "metaDL":
+        qb_torrents[tag]["stalled_time"] = time()
+        if (
+            Config.TORRENT_TIMEOUT
+            and time() - qb_torrents[tag]["start_time"] >= Config.TORRENT_TIMEOUT
+        ):
+            await _on_download_error("Dead Torrent!", tor_info, stop=False)
+            batch["stop"].append(tor_info.hash)
+            watched_tags.discard(tag)
+        else:
+            batch["reannounce"].append(tor_info.hash)
+    elif state == "downloading":
+        qb_torrents[tag]["stalled_time"] = time()
+        if not qb_torrents[tag]["stop_dup_check"]:
+            qb_torrents[tag]["stop_dup_check"] = True
+            await _stop_duplicate(tor_info)
+    elif state == "stalledDL":
+        if (
+            not qb_torrents[tag]["rechecked"]
+            and 0.99989999999999999 < tor_info.progress < 1
+        ):
+            msg = f"Force recheck - Name: {tor_info.name} Hash: "
+            msg += f"{tor_info.hash} Downloaded Bytes: {tor_info.downloaded} "
+            msg += f"Size: {tor_info.size} Total Size: {tor_info.total_size}"
+            LOGGER.warning(msg)
+            batch["recheck"].append(tor_info.hash)
+            qb_torrents[tag]["rechecked"] = True
+        elif (
+            Config.TORRENT_TIMEOUT
+            and time() - qb_torrents[tag]["stalled_time"] >= Config.TORRENT_TIMEOUT
+        ):
+            await _on_download_error("Dead Torrent!", tor_info, stop=False)
+            batch["stop"].append(tor_info.hash)
+            watched_tags.discard(tag)
+        else:
+            batch["reannounce"].append(tor_info.hash)
+    elif state == "missingFiles":
+        batch["recheck"].append(tor_info.hash)
+    elif state == "error":
+        await _on_download_error(
+            "No enough space for this torrent on device", tor_info, stop=False
+        )
+        batch["stop"].append(tor_info.hash)
+    elif (
+        tor_info.completion_on != -1
+        and not qb_torrents[tag]["uploaded"]
+        and state not in ["checkingUP", "checkingDL", "checkingResumeData"]
+    ):
+        qb_torrents[tag]["uploaded"] = True
+        await _on_download_complete(tor_info)
+    elif state in ["stoppedUP", "stoppedDL"] and qb_torrents[tag]["seeding"]:
+        qb_torrents[tag]["seeding"] = False
+        await _on_seed_finish(tor_info)
+        await sleep(0.5)
+
+
+async def _run_batch(batch):
+    for action, hashes in batch.items():
+        if hashes:
+            poller.rpc()
+            await sync_to_async(
+                getattr(qbittorrent_client, f"torrents_{action}"),
+                torrent_hashes=hashes,
+            )
+
+
 @new_task
 async def _qb_listener():
     while True:
+        activity = IDLE
+        poller.start_tick()
+        changed = set()
         async with qb_listener_lock:
             try:
-                torrents = await sync_to_async(qbittorrent_client.torrents_info)
-                if len(torrents) == 0:
+                poller.rpc()
+                await sync_to_async(qb_sync.refresh, force=True)
+                if not qb_sync.torrents():
+                    watched_tags.clear()
+                    qb_sync.pop_changed()
                     intervals["qb"] = ""
                     break
-                for tor_info in torrents:
-                    tag = tor_info.tags
-                    if tag not in qb_torrents:
+                updates = {}
+                changed = qb_sync.pop_changed()
+                for hash_ in changed:
+                    tor_info = qb_sync.get_by_hash(hash_)
+                    if tor_info is not None and tor_info.tags in qb_torrents:
+                        updates[tor_info.tags] = tor_info
+                for tag in list(watched_tags):
+                    if tag in updates:
                         continue
-                    state = tor_info.state
-                    if state == "metaDL":
-                        qb_torrents[tag]["stalled_time"] = time()
-                        if (
-                            Config.TORRENT_TIMEOUT
-                            and time() - qb_torrents[tag]["start_time"]
-                            >= Config.TORRENT_TIMEOUT
-                        ):
-                            await _on_download_error("Dead Torrent!", tor_info)
-                        else:
-                            await sync_to_async(
-                                qbittorrent_client.torrents_reannounce,
-                                torrent_hashes=tor_info.hash,
-                            )
-                    elif state == "downloading":
-                        qb_torrents[tag]["stalled_time"] = time()
-                        if not qb_torrents[tag]["stop_dup_check"]:
-                            qb_torrents[tag]["stop_dup_check"] = True
-                            await _stop_duplicate(tor_info)
-                    elif state == "stalledDL":
-                        if (
-                            not qb_torrents[tag]["rechecked"]
-                            and 0.99989999999999999 < tor_info.progress < 1
-                        ):
-                            msg = f"Force recheck - Name: {tor_info.name} Hash: "
-                            msg += f"{tor_info.hash} Downloaded Bytes: {tor_info.downloaded} "
-                            msg += f"Size: {tor_info.size} Total Size: {tor_info.total_size}"
-                            LOGGER.warning(msg)
-                            await sync_to_async(
-                                qbittorrent_client.torrents_recheck,
-                                torrent_hashes=tor_info.hash,
-                            )
-                            qb_torrents[tag]["rechecked"] = True
-                        elif (
-                            Config.TORRENT_TIMEOUT
-                            and time() - qb_torrents[tag]["stalled_time"]
-                            >= Config.TORRENT_TIMEOUT
-                        ):
-                            await _on_download_error("Dead Torrent!", tor_info)
-                        else:
-                            await sync_to_async(
-                                qbittorrent_client.torrents_reannounce,
-                                torrent_hashes=tor_info.hash,
-                            )
-                    elif state == "missingFiles":
-                        await sync_to_async(
-                            qbittorrent_client.torrents_recheck,
-                            torrent_hashes=tor_info.hash,
-                        )
-                    elif state == "error":
-                        await _on_download_error(
-                            "No enough space for this torrent on device", tor_info
-                        )
-                    elif (
-                        tor_info.completion_on != -1
-                        and not qb_torrents[tag]["uploaded"]
-                        and state
-                        not in ["checkingUP", "checkingDL", "checkingResumeData"]
-                    ):
-                        qb_torrents[tag]["uploaded"] = True
-                        await _on_download_complete(tor_info)
-                    elif (
-                        state in ["stoppedUP", "stoppedDL"]
-                        and qb_torrents[tag]["seeding"]
+                    if tag not in qb_torrents or not (
+                        tor_info := qb_sync.get_by_tag(tag)
                     ):
-                        qb_torrents[tag]["seeding"] = False
-                        await _on_seed_finish(tor_info)
-                        await sleep(0.5)
+                        watched_tags.discard(tag)
+                        continue
+                    updates[tag] = tor_info
+                batch = {"reannounce": [], "recheck": [], "stop": []}
+                for tag, tor_info in updates.items():
+                    activity = min(activity, _activity(tag, tor_info))
+                    await _dispatch(tag, tor_info, batch)
+                await _run_batch(batch)
             except Exception as e:
+                activity = ACTIVE
+                qb_sync.requeue(changed)
                 LOGGER.error(str(e))
-        await sleep(3)
+        poller.end_tick(activity)
+        await poller.sleep()
 
 
 async def on_download_start(tag):
@@ -208,5 +258,7 @@ async def on_download_start(tag):
             "uploaded": False,
             "seeding": False,
         }
+        watched_tags.add(tag)
+        poller.wake()
         if not intervals["qb"]:
             intervals["qb"] = await _qb_listener()
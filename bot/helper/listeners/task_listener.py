@@ -22,17 +22,16 @@ from ..common import TaskConfig
 from ..ext_utils.bot_utils import sync_to_async, is_empty_or_blank
 from ..ext_utils.db_handler import database
 from ..ext_utils.files_utils import (
-    get_path_size,
     clean_download,
     clean_target,
     join_files,
     create_recursive_symlink,
     get_mime_type,
-    count_files_and_folders,
 )
 from ..ext_utils.links_utils import is_gdrive_id
 from ..ext_utils.status_utils import get_readable_file_size
 from ..ext_utils.task_manager import start_from_queued, check_running_tasks
+from ..mirror_leech_utils.gdrive_utils.dup_index import drive_index
 from ..mirror_leech_utils.gdrive_utils.upload import GoogleDriveUpload
 from ..mirror_leech_utils.rclone_utils.transfer import RcloneTransferHelper
 from ..mirror_leech_utils.status_utils.gdrive_status import GoogleDriveStatus
@@ -94,7 +93,7 @@ class TaskListener(TaskConfig):
             and Config.DATABASE_URL
         ):
             await database.add_incomplete_task(
-                self.message.chat.id, self.message.link, self.tag
+                self.message.chat.id, self.task_link, self.tag
             )
 
     async def on_download_complete(self):
@@ -173,13 +172,15 @@ class TaskListener(TaskConfig):
                 return
 
         dl_path = f"{self.dir}/{self.name}"
-        self.size = await get_path_size(dl_path)
+        await self.manifest.scan(self.dir)
+        self.size = await self.manifest.size(dl_path)
         self.is_file = await aiopath.isfile(dl_path)
 
         if self.seed:
             self.up_dir = f"{self.dir}10000"
             up_path = f"{self.up_dir}/{self.name}"
             await create_recursive_symlink(self.dir, self.up_dir)
+            await self.manifest.scan(self.up_dir)
             LOGGER.info(f"Shortcut created: {dl_path} -> {up_path}")
         else:
             up_path = dl_path
@@ -192,6 +193,7 @@ class TaskListener(TaskConfig):
 
         if self.join and not self.is_file:
             await join_files(up_path)
+            await self.manifest.add(up_path)
 
         if self.extract and not self.is_nzb:
             up_path = await self.proceed_extract(up_path, gid)
@@ -199,7 +201,7 @@ class TaskListener(TaskConfig):
                 return
             self.is_file = await aiopath.isfile(up_path)
             up_dir, self.name = up_path.rsplit("/", 1)
-            self.size = await get_path_size(up_dir)
+            self.size = await self.manifest.size(up_dir)
             self.subname = ""
             self.subsize = 0
             self.files_to_proceed = []
@@ -215,7 +217,7 @@ class TaskListener(TaskConfig):
                 return
             self.is_file = await aiopath.isfile(up_path)
             up_dir, self.name = up_path.rsplit("/", 1)
-            self.size = await get_path_size(up_dir)
+            self.size = await self.manifest.size(up_dir)
             self.subname = ""
             self.subsize = 0
             self.files_to_proceed = []
@@ -235,7 +237,7 @@ class TaskListener(TaskConfig):
                 return
             self.is_file = await aiopath.isfile(up_path)
             up_dir, self.name = up_path.rsplit("/", 1)
-            self.size = await get_path_size(up_dir)
+            self.size = await self.manifest.size(up_dir)
 
         if self.convert_audio or self.convert_video:
             up_path = await self.convert_media(
@@ -246,7 +248,7 @@ class TaskListener(TaskConfig):
                 return
             self.is_file = await aiopath.isfile(up_path)
             up_dir, self.name = up_path.rsplit("/", 1)
-            self.size = await get_path_size(up_dir)
+            self.size = await self.manifest.size(up_dir)
             self.subname = ""
             self.subsize = 0
             self.files_to_proceed = []
@@ -259,7 +261,7 @@ class TaskListener(TaskConfig):
                 return
             self.is_file = await aiopath.isfile(up_path)
             up_dir, self.name = up_path.rsplit("/", 1)
-            self.size = await get_path_size(up_dir)
+            self.size = await self.manifest.size(up_dir)
             self.subname = ""
             self.subsize = 0
             self.files_to_proceed = []
@@ -281,7 +283,7 @@ class TaskListener(TaskConfig):
             self.progress = True
 
         up_dir, self.name = up_path.rsplit("/", 1)
-        self.size = await get_path_size(up_dir)
+        self.size = await self.manifest.size(up_dir)
 
         if self.is_leech and not self.compress:
             await self.proceed_split(up_path, gid)
@@ -304,7 +306,7 @@ class TaskListener(TaskConfig):
                 return
             LOGGER.info(f"Start from Queued/Upload: {self.name}")
 
-        self.size = await get_path_size(up_dir)
+        self.size = await self.manifest.size(up_dir)
 
         if self.is_leech:
             LOGGER.info(f"Leech Name: {self.name}")
@@ -325,12 +327,12 @@ class TaskListener(TaskConfig):
             #    update_status_message(self.message.chat.id),
             #    sync_to_async(drive.upload),
             #)
+            folders, files = await self.manifest.count(up_path, self.extension_filter)
             new_dir = f"{Config.DOWNLOAD_DIR}{self.name}"
             LOGGER.info(f"Renaming {self.dir} to {new_dir}")
             await rename(self.dir, new_dir)
             self.dir = new_dir
             up_path = f"{new_dir}/{self.name}"
-            folders, files = await count_files_and_folders(up_path, self.extension_filter)
             mime_type = get_mime_type(up_path) if await aiopath.isfile(up_path) else "Folder"
             if self.is_ytdlp is True:
                 ytdl_path = f"{Config.DOWNLOAD_DIR}ytdl"
@@ -364,7 +366,7 @@ class TaskListener(TaskConfig):
             and Config.INCOMPLETE_TASK_NOTIFIER
             and Config.DATABASE_URL
         ):
-            await database.rm_complete_task(self.message.link)
+            await database.rm_complete_task(self.task_link)
         msg = f"<b>Name: </b><code>{escape(self.name)}</code>\n\n<b>Size: </b>{get_readable_file_size(self.size)}"
         if error_msg:
             msg += f"\n\n<b>Error: </b><code>{error_msg}</code>\n"
@@ -387,6 +389,8 @@ class TaskListener(TaskConfig):
                 if fmsg != "":
                     await send_message(self.message, msg + fmsg)
         else:
+            if not rclone_path and dir_id:
+                drive_index.add(self.up_dest, self.name, dir_id)
             msg += f"\n\n<b>Type: </b>{mime_type}"
             if mime_type == "Folder":
                 msg += f"\n<b>SubFolders: </b>{folders}"
@@ -468,7 +472,7 @@ class TaskListener(TaskConfig):
             and Config.INCOMPLETE_TASK_NOTIFIER
             and Config.DATABASE_URL
         ):
-            await database.rm_complete_task(self.message.link)
+            await database.rm_complete_task(self.task_link)
 
         async with queue_dict_lock:
             if self.mid in queued_dl:
@@ -506,7 +510,7 @@ class TaskListener(TaskConfig):
             and Config.INCOMPLETE_TASK_NOTIFIER
             and Config.DATABASE_URL
         ):
-            await database.rm_complete_task(self.message.link)
+            await database.rm_complete_task(self.task_link)
 
         async with queue_dict_lock:
             if self.mid in queued_dl:
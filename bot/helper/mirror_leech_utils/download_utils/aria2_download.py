@@ -2,6 +2,7 @@ from aiofiles.os import remove, path as aiopath
 
 from .... import aria2, task_dict_lock, task_dict, LOGGER
 from ....core.config_manager import Config
+from ...ext_utils.aria2_sync import aria2_sync
 from ...ext_utils.bot_utils import bt_selection_buttons, sync_to_async, is_empty_or_blank
 from ...ext_utils.task_manager import check_running_tasks
 from ...mirror_leech_utils.status_utils.aria2_status import Aria2Status
@@ -49,6 +50,7 @@ async def add_aria2c_download(listener, dpath, header, ratio, seed_time, max_dow
 
     gid = download.gid
     name = download.name
+    aria2_sync.invalidate()
     async with task_dict_lock:
         task_dict[listener.mid] = Aria2Status(listener, gid, queued=add_to_queue)
     if add_to_queue:
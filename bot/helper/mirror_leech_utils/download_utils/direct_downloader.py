@@ -8,12 +8,18 @@ from .... import (
 from ...ext_utils.bot_utils import sync_to_async
 from ...ext_utils.task_manager import check_running_tasks, stop_duplicate_check
 from ...listeners.direct_listener import DirectListener
+from ...mirror_leech_utils.download_utils.direct_link_generator import FolderContents
 from ...mirror_leech_utils.status_utils.direct_status import DirectStatus
 from ...mirror_leech_utils.status_utils.queue_status import QueueStatus
 from ...telegram_helper.message_utils import send_status_message
 
 
-async def add_direct_download(listener, path):
+def _stop_crawl(contents):
+    if isinstance(contents, FolderContents):
+        contents.cancel()
+
+
+async def add_direct_download(listener, path, parallel=0):
     details = listener.link
     if not (contents := details.get("contents")):
         await listener.on_download_error("There is nothing to download!")
@@ -26,6 +32,7 @@ async def add_direct_download(listener, path):
 
     msg, button = await stop_duplicate_check(listener)
     if msg:
+        _stop_crawl(contents)
         await listener.on_download_error(msg, button)
         return
 
@@ -40,12 +47,13 @@ async def add_direct_download(listener, path):
             await send_status_message(listener.message)
         await event.wait()
         if listener.is_cancelled:
+            _stop_crawl(contents)
             return
 
     a2c_opt = {"follow-torrent": "false", "follow-metalink": "false"}
     if header := details.get("header"):
         a2c_opt["header"] = header
-    directListener = DirectListener(path, listener, a2c_opt)
+    directListener = DirectListener(path, listener, a2c_opt, parallel)
 
     async with task_dict_lock:
         task_dict[listener.mid] = DirectStatus(listener, directListener, gid)
@@ -58,4 +66,4 @@ async def add_direct_download(listener, path):
         if listener.multi <= 1:
             await send_status_message(listener.message)
 
-    await sync_to_async(directListener.download, contents)
+    await sync_to_async(directListener.download, contents, pool="transfer")
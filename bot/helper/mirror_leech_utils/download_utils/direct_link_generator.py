@@ -6,14 +6,18 @@ from lxml.etree import HTML
 from os import path as ospath
 from re import findall, match, search
 from requests import Session, post, get, RequestException
-from requests.adapters import HTTPAdapter
-from time import sleep
+from collections import defaultdict
+from contextlib import contextmanager
+from copy import deepcopy
+from threading import Lock, Condition, BoundedSemaphore, get_ident
+from time import sleep, time
 from urllib.parse import parse_qs, urlparse
-from urllib3.util.retry import Retry
 from uuid import uuid4
 from base64 import b64decode
 
+from .... import LOGGER
 from ....core.config_manager import Config
+from ...ext_utils.bot_utils import TaskPool, current_slot
 from ...ext_utils.exceptions import DirectDownloadLinkException
 from ...ext_utils.help_messages import PASSWORD_ERROR_MESSAGE
 from ...ext_utils.links_utils import is_share_link
@@ -23,9 +27,260 @@ user_agent = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:122.0) Gecko/20100101 Firefox/122.0"
 )
 
+RESOLVED_LINK_TTL = 600
+CRAWL_WORKERS = 8
+CRAWL_HOST_LIMIT = 4
+# the cloudflare bypass is a shared third party service, folder crawls must not flood it
+CF_BYPASS_LIMIT = 2
+
+
+class SessionPool:
+    """idle sessions per host, reused across resolver calls"""
+
+    def __init__(self, max_idle=4, idle_timeout=300):
+        self._max_idle = max_idle
+        self._idle_timeout = idle_timeout
+        self._idle = {}
+        self._lock = Lock()
+
+    def acquire(self, host, scraper=True):
+        key = (host, scraper)
+        with self._lock:
+            sessions = self._idle.get(key, [])
+            while sessions:
+                session, last_used = sessions.pop()
+                if time() - last_used < self._idle_timeout:
+                    return session
+                session.close()
+        session = create_scraper() if scraper else Session()
+        session.pool_headers = session.headers.copy()
+        return session
+
+    def release(self, host, scraper, session):
+        key = (host, scraper)
+        # resolvers add their own headers, don't hand them to the next one. Cookies
+        # stay, the pool is per host and they carry its login and clearance
+        session.headers.clear()
+        session.headers.update(session.pool_headers)
+        with self._lock:
+            sessions = self._idle.setdefault(key, [])
+            if len(sessions) < self._max_idle:
+                sessions.append((session, time()))
+                return
+        session.close()
+
+
+session_pool = SessionPool()
+resolved_links = {}
+resolved_links_lock = Lock()
+
+
+@contextmanager
+def pooled_session(url, scraper=True):
+    host = urlparse(url).hostname
+    session = session_pool.acquire(host, scraper)
+    healthy = True
+    try:
+        yield session
+    except:
+        # resolvers wrap network errors too, so any failure may leave it broken
+        healthy = False
+        raise
+    finally:
+        if healthy:
+            session_pool.release(host, scraper, session)
+        else:
+            session.close()
+
+
+host_limits = defaultdict(lambda: BoundedSemaphore(CRAWL_HOST_LIMIT))
+host_limits_lock = Lock()
+cf_bypass_limit = BoundedSemaphore(CF_BYPASS_LIMIT)
+
+
+def request_with_retry(session, method, url, retries=3, backoff=1, **kwargs):
+    host = urlparse(url).hostname
+    with host_limits_lock:
+        limit = host_limits[host]
+    for attempt in range(retries + 1):
+        try:
+            with limit:
+                res = session.request(method, url, **kwargs)
+            if res.status_code != 429 and res.status_code < 500:
+                return res
+            if attempt == retries:
+                return res
+        except RequestException:
+            if attempt == retries:
+                raise
+        sleep(backoff * 2**attempt)
+
+
+class FolderContents:
+    """contents of a folder link, filled while the folder is still being crawled"""
+
+    def __init__(self):
+        self._items = []
+        self._cond = Condition()
+        self.total_size = 0
+        self.done = False
+        self.cancelled = False
+        self.error = None
+
+    def append(self, item, size=0):
+        with self._cond:
+            self._items.append(item)
+            self.total_size += size
+            self._cond.notify_all()
+
+    def finish(self, error=None):
+        with self._cond:
+            if self.error is None:
+                self.error = error
+            self.done = True
+            self._cond.notify_all()
+
+    def cancel(self, error=None):
+        self.cancelled = True
+        self.finish(error)
+
+    def wait(self, count):
+        with self._cond:
+            self._cond.wait_for(lambda: self.done or len(self._items) >= count)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __iter__(self):
+        index = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self.done or len(self._items) > index)
+                if index >= len(self._items):
+                    return
+                item = self._items[index]
+            yield item
+            index += 1
+
+
+class FolderCrawler:
+    """fans a folder tree out over worker threads and streams found files"""
+
+    def __init__(self, new_session, close_session=None, workers=CRAWL_WORKERS):
+        self.contents = FolderContents()
+        self.error = None
+        self._new_session = new_session
+        self._close_session = close_session
+        self._sessions = []
+        self._slot_sessions = {}
+        self._executor = TaskPool(workers)
+        self._pending = 0
+        self._lock = Lock()
+
+    @property
+    def session(self):
+        # requests sessions aren't thread safe, every crawler slot gets its own
+        key = current_slot() or get_ident()
+        if (session := self._slot_sessions.get(key)) is None:
+            session = self._slot_sessions[key] = self._new_session()
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def add(self, item, size=0):
+        if self.contents.cancelled:
+            return
+        if isinstance(size, str):
+            size = float(size) if size.isdigit() else 0
+        self.contents.append(item, size)
+
+    def run(self, func, *args):
+        with self._lock:
+            self._pending += 1
+        try:
+            func(*args)
+        except:
+            self.contents.cancel()
+            raise
+        finally:
+            self._task_done()
+
+    def submit(self, func, *args):
+        if self.contents.cancelled:
+            return
+        with self._lock:
+            self._pending += 1
+        self._executor.submit(self._run, func, *args)
+
+    def _run(self, func, *args):
+        try:
+            if not self.contents.cancelled:
+                func(*args)
+        except Exception as e:
+            LOGGER.error(f"Folder crawl: {e}")
+            if not isinstance(e, DirectDownloadLinkException):
+                e = DirectDownloadLinkException(f"ERROR: {e.__class__.__name__}")
+            with self._lock:
+                if self.error is None:
+                    self.error = e
+            # a partial folder is a failed task, don't crawl the rest of it
+            self.contents.cancel(self.error)
+        finally:
+            self._task_done()
+
+    def _task_done(self):
+        with self._lock:
+            self._pending -= 1
+            finished = self._pending == 0
+        if finished:
+            self._executor.shutdown(wait=False)
+            for session in self._sessions:
+                try:
+                    if self._close_session is not None:
+                        self._close_session(session)
+                    else:
+                        session.close()
+                except Exception as e:
+                    LOGGER.error(f"Folder crawl, while closing session: {e}")
+            self._sessions.clear()
+            self._slot_sessions.clear()
+            self.contents.finish(self.error)
+
+    def result(self, details):
+        self.contents.wait(2)
+        if self.contents.done:
+            if self.error is not None:
+                raise self.error
+            details["contents"] = list(self.contents)
+            details["total_size"] = self.contents.total_size
+        else:
+            # the size and any crawl error are only final once contents.done is set
+            details["contents"] = self.contents
+        return details
+
 
 def direct_link_generator(link):
     """direct links generator"""
+    with resolved_links_lock:
+        cached = resolved_links.get(link)
+    if cached and time() - cached[0] < RESOLVED_LINK_TTL:
+        return deepcopy(cached[1])
+    result = _resolve_link(link)
+    if isinstance(result, dict) and isinstance(result["contents"], FolderContents):
+        return result
+    with resolved_links_lock:
+        now = time()
+        for key, (ts, _) in list(resolved_links.items()):
+            if now - ts >= RESOLVED_LINK_TTL:
+                del resolved_links[key]
+        resolved_links[link] = (now, result)
+    return deepcopy(result)
+
+
+def _resolve_link(link):
     domain = urlparse(link).hostname
     if not domain:
         raise DirectDownloadLinkException("ERROR: Invalid URL")
@@ -318,7 +573,7 @@ def mediafire(url, session=None):
 
 
 def osdn(url):
-    with create_scraper() as session:
+    with pooled_session(url) as session:
         try:
             html = HTML(session.get(url).text)
         except Exception as e:
@@ -350,7 +605,7 @@ def github(url):
         findall(r"\bhttps?://.*github\.com.*releases\S+", url)[0]
     except IndexError as e:
         raise DirectDownloadLinkException("No GitHub Releases links found") from e
-    with create_scraper() as session:
+    with pooled_session(url) as session:
         _res = session.get(url, stream=True, allow_redirects=False)
         if "location" in _res.headers:
             return _res.headers["location"]
@@ -366,7 +621,7 @@ def hxfile(url):
     except Exception as e:
         raise DirectDownloadLinkException(f"ERROR: {e.__class__.__name__}") from e
     cookies = {cookie.name: cookie.value for cookie in jar}
-    with Session() as session:
+    with pooled_session(url, scraper=False) as session:
         try:
             file_code = url.split("/")[-1]
             html = HTML(
@@ -387,7 +642,7 @@ def hxfile(url):
 def onedrive(link):
     """Onedrive direct link generator
     By https://github.com/junedkh"""
-    with create_scraper() as session:
+    with pooled_session(link) as session:
         try:
             link = session.get(link).url
             parsed_link = urlparse(link)
@@ -430,7 +685,7 @@ def pixeldrain(url):
     else:
         info_link = f"https://pixeldrain.com/api/file/{file_id}/info"
         dl_link = f"https://pixeldrain.com/api/file/{file_id}?download"
-    with create_scraper() as session:
+    with pooled_session(url) as session:
         try:
             resp = session.get(info_link).json()
         except Exception as e:
@@ -447,7 +702,7 @@ def streamtape(url):
     splitted_url = url.split("/")
     _id = splitted_url[4] if len(splitted_url) >= 6 else splitted_url[-1]
     try:
-        with Session() as session:
+        with pooled_session(url, scraper=False) as session:
             html = HTML(session.get(url).text)
     except Exception as e:
         raise DirectDownloadLinkException(f"ERROR: {e.__class__.__name__}") from e
@@ -462,7 +717,7 @@ def streamtape(url):
 
 
 def racaty(url):
-    with create_scraper() as session:
+    with pooled_session(url) as session:
         try:
             url = session.get(url).url
             json_data = {"op": "download2", "id": url.split("/")[-1]}
@@ -553,7 +808,7 @@ def solidfiles(url):
     """Solidfiles direct link generator
     Based on https://github.com/Xonshiz/SolidFiles-Downloader
     By https://github.com/Jusidama18"""
-    with create_scraper() as session:
+    with pooled_session(url) as session:
         try:
             headers = {
                 "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_9_4) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/36.0.1985.125 Safari/537.36"
@@ -568,7 +823,7 @@ def solidfiles(url):
 
 
 def krakenfiles(url):
-    with Session() as session:
+    with pooled_session(url, scraper=False) as session:
         try:
             _res = session.get(url)
         except Exception as e:
@@ -596,7 +851,7 @@ def krakenfiles(url):
 
 
 def uploadee(url):
-    with create_scraper() as session:
+    with pooled_session(url) as session:
         try:
             html = HTML(session.get(url).text)
         except Exception as e:
@@ -674,7 +929,7 @@ def terabox(url, video_quality="HD Video", save_dir="HD_Video"):
 
 
 def filepress(url):
-    with create_scraper() as session:
+    with pooled_session(url) as session:
         try:
             url = session.get(url).url
             raw = urlparse(url)
@@ -804,7 +1059,7 @@ def sharer_scraper(url):
 
 
 def wetransfer(url):
-    with create_scraper() as session:
+    with pooled_session(url) as session:
         try:
             url = session.get(url).url
             splited_url = url.split("/")
@@ -826,7 +1081,7 @@ def wetransfer(url):
 
 
 def akmfiles(url):
-    with create_scraper() as session:
+    with pooled_session(url) as session:
         try:
             html = HTML(
                 session.post(
@@ -843,7 +1098,7 @@ def akmfiles(url):
 
 
 def shrdsk(url):
-    with create_scraper() as session:
+    with pooled_session(url) as session:
         try:
             _json = session.get(
                 f'https://us-central1-affiliate2apk.cloudfunctions.net/get_data?shortid={url.split("/")[-1]}',
@@ -873,9 +1128,11 @@ def linkBox(url: str):
 
     details = {"contents": [], "title": "", "total_size": 0}
 
-    def __singleItem(session, itemId):
+    def __singleItem(itemId):
         try:
-            _json = session.get(
+            _json = request_with_retry(
+                crawler.session,
+                "GET",
                 "https://www.linkbox.to/api/file/detail",
                 params={"itemId": itemId},
             ).json()
@@ -900,21 +1157,18 @@ def linkBox(url: str):
             "filename": filename,
             "url": itemInfo["url"],
         }
-        if "size" in itemInfo:
-            size = itemInfo["size"]
-            if isinstance(size, str) and size.isdigit():
-                size = float(size)
-            details["total_size"] += size
-        details["contents"].append(item)
-
-    def __fetch_links(session, _id=0, folderPath=""):
+        crawler.add(item, itemInfo.get("size", 0))
+
+    def __fetch_links(_id=0, folderPath=""):
         params = {
             "shareToken": shareToken,
             "pageSize": 1000,
             "pid": _id,
         }
         try:
-            _json = session.get(
+            _json = request_with_retry(
+                crawler.session,
+                "GET",
                 "https://www.linkbox.to/api/file/share_out_list",
                 params=params,
             ).json()
@@ -927,7 +1181,7 @@ def linkBox(url: str):
             raise DirectDownloadLinkException("ERROR: data not found")
         try:
             if data["shareType"] == "singleItem":
-                return __singleItem(session, data["itemId"])
+                return __singleItem(data["itemId"])
         except:
             pass
         if not details["title"]:
@@ -943,7 +1197,7 @@ def linkBox(url: str):
                     newFolderPath = ospath.join(folderPath, content["name"])
                 if not details["title"]:
                     details["title"] = content["name"]
-                __fetch_links(session, content["id"], newFolderPath)
+                crawler.submit(__fetch_links, content["id"], newFolderPath)
             elif "url" in content:
                 if not folderPath:
                     folderPath = details["title"]
@@ -957,19 +1211,15 @@ def linkBox(url: str):
                     "filename": filename,
                     "url": content["url"],
                 }
-                if "size" in content:
-                    size = content["size"]
-                    if isinstance(size, str) and size.isdigit():
-                        size = float(size)
-                    details["total_size"] += size
-                details["contents"].append(item)
+                crawler.add(item, content.get("size", 0))
 
-    try:
-        with Session() as session:
-            __fetch_links(session)
-    except DirectDownloadLinkException as e:
-        raise e
-    return details
+    host = parsed_url.hostname
+    crawler = FolderCrawler(
+        lambda: session_pool.acquire(host, False),
+        lambda session: session_pool.release(host, False, session),
+    )
+    crawler.run(__fetch_links)
+    return crawler.result(details)
 
 
 def gofile(url):
@@ -1000,7 +1250,7 @@ def gofile(url):
         except Exception as e:
             raise e
 
-    def __fetch_links(session, _id, folderPath=""):
+    def __fetch_links(_id, folderPath=""):
         _url = f"https://api.gofile.io/contents/{_id}?wt=4fd6sg89d7s6&cache=true"
         headers = {
             "User-Agent": user_agent,
@@ -1012,7 +1262,9 @@ def gofile(url):
         if _password:
             _url += f"&password={_password}"
         try:
-            _json = session.get(_url, headers=headers).json()
+            _json = request_with_retry(
+                crawler.session, "GET", _url, headers=headers
+            ).json()
         except Exception as e:
             raise DirectDownloadLinkException(f"ERROR: {e.__class__.__name__}")
         if _json["status"] in "error-passwordRequired":
@@ -1042,7 +1294,7 @@ def gofile(url):
                     newFolderPath = ospath.join(details["title"], content["name"])
                 else:
                     newFolderPath = ospath.join(folderPath, content["name"])
-                __fetch_links(session, content["id"], newFolderPath)
+                crawler.submit(__fetch_links, content["id"], newFolderPath)
             else:
                 if not folderPath:
                     folderPath = details["title"]
@@ -1051,24 +1303,25 @@ def gofile(url):
                     "filename": content["name"],
                     "url": content["link"],
                 }
-                if "size" in content:
-                    size = content["size"]
-                    if isinstance(size, str) and size.isdigit():
-                        size = float(size)
-                    details["total_size"] += size
-                details["contents"].append(item)
+                crawler.add(item, content.get("size", 0))
 
     details = {"contents": [], "title": "", "total_size": 0}
-    with Session() as session:
+    with pooled_session(url, scraper=False) as session:
         try:
             token = __get_token(session)
         except Exception as e:
             raise DirectDownloadLinkException(f"ERROR: {e.__class__.__name__}")
-        details["header"] = f"Cookie: accountToken={token}"
-        try:
-            __fetch_links(session, _id)
-        except Exception as e:
-            raise DirectDownloadLinkException(e)
+    details["header"] = f"Cookie: accountToken={token}"
+    host = urlparse(url).hostname
+    crawler = FolderCrawler(
+        lambda: session_pool.acquire(host, False),
+        lambda session: session_pool.release(host, False, session),
+    )
+    try:
+        crawler.run(__fetch_links, _id)
+    except Exception as e:
+        raise DirectDownloadLinkException(e)
+    crawler.result(details)
 
     if len(details["contents"]) == 1:
         return (details["contents"][0]["url"], details["header"])
@@ -1091,24 +1344,15 @@ def mediafireFolder(url):
         folderkey = folderkey[0]
     details = {"contents": [], "title": "", "total_size": 0, "header": ""}
 
-    session = create_scraper()
-    adapter = HTTPAdapter(
-        max_retries=Retry(total=10, read=10, connect=10, backoff_factor=0.3)
-    )
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
-    session = create_scraper(
-        browser={"browser": "firefox", "platform": "windows", "mobile": False},
-        delay=10,
-        sess=session,
-    )
     folder_infos = []
 
     def __get_info(folderkey):
         try:
             if isinstance(folderkey, list):
                 folderkey = ",".join(folderkey)
-            _json = session.post(
+            _json = request_with_retry(
+                crawler.session,
+                "POST",
                 "https://www.mediafire.com/api/1.5/folder/get_info.php",
                 data={
                     "recursive": "yes",
@@ -1130,28 +1374,21 @@ def mediafireFolder(url):
         else:
             raise DirectDownloadLinkException("ERROR: something went wrong!")
 
-    try:
-        __get_info(folderkey)
-    except Exception as e:
-        raise DirectDownloadLinkException(e)
-
-    details["title"] = folder_infos[0]["name"]
-
     def __scraper(url):
-        session = create_scraper()
+        session = crawler.session
         parsed_url = urlparse(url)
         url = f"{parsed_url.scheme}://{parsed_url.netloc}{parsed_url.path}"
 
         def __repair_download(url):
             try:
-                html = HTML(session.get(url).text)
+                html = HTML(request_with_retry(session, "GET", url).text)
                 if new_link := html.xpath('//a[@id="continue-btn"]/@href'):
                     return __scraper(f"https://mediafire.com/{new_link[0]}")
             except:
                 return
 
         try:
-            html = HTML(session.get(url).text)
+            html = HTML(request_with_retry(session, "GET", url).text)
         except:
             return
         if html.xpath("//div[@class='passwordPrompt']"):
@@ -1160,7 +1397,11 @@ def mediafireFolder(url):
                     f"ERROR: {PASSWORD_ERROR_MESSAGE}".format(url)
                 )
             try:
-                html = HTML(session.post(url, data={"downloadp": _password}).text)
+                html = HTML(
+                    request_with_retry(
+                        session, "POST", url, data={"downloadp": _password}
+                    ).text
+                )
             except:
                 return
             if html.xpath("//div[@class='passwordPrompt']"):
@@ -1172,6 +1413,18 @@ def mediafireFolder(url):
         if repair_link := html.xpath("//a[@class='retry']/@href"):
             return __repair_download(repair_link[0])
 
+    def __get_file(file, folderPath):
+        if not (_url := __scraper(file["links"]["normal_download"])):
+            raise DirectDownloadLinkException(
+                f"ERROR: Direct link not found for {file['filename']}"
+            )
+        item = {
+            "filename": file["filename"],
+            "path": ospath.join(folderPath or details["title"]),
+            "url": _url,
+        }
+        crawler.add(item, file.get("size", 0))
+
     def __get_content(folderKey, folderPath="", content_type="folders"):
         try:
             params = {
@@ -1179,7 +1432,9 @@ def mediafireFolder(url):
                 "folder_key": folderKey,
                 "response_format": "json",
             }
-            _json = session.get(
+            _json = request_with_retry(
+                crawler.session,
+                "GET",
                 "https://www.mediafire.com/api/1.5/folder/get_content.php",
                 params=params,
             ).json()
@@ -1198,33 +1453,28 @@ def mediafireFolder(url):
                     newFolderPath = ospath.join(folderPath, folder["name"])
                 else:
                     newFolderPath = ospath.join(folder["name"])
-                __get_content(folder["folderkey"], newFolderPath)
-            __get_content(folderKey, folderPath, "files")
+                crawler.submit(__get_content, folder["folderkey"], newFolderPath)
+            crawler.submit(__get_content, folderKey, folderPath, "files")
         else:
-            files = _folder_content["files"]
-            for file in files:
-                item = {}
-                if not (_url := __scraper(file["links"]["normal_download"])):
-                    continue
-                item["filename"] = file["filename"]
-                if not folderPath:
-                    folderPath = details["title"]
-                item["path"] = ospath.join(folderPath)
-                item["url"] = _url
-                if "size" in file:
-                    size = file["size"]
-                    if isinstance(size, str) and size.isdigit():
-                        size = float(size)
-                    details["total_size"] += size
-                details["contents"].append(item)
+            for file in _folder_content["files"]:
+                crawler.submit(__get_file, file, folderPath)
 
-    try:
+    def __crawl():
+        try:
+            __get_info(folderkey)
+        except Exception as e:
+            raise DirectDownloadLinkException(e)
+        details["title"] = folder_infos[0]["name"]
         for folder in folder_infos:
-            __get_content(folder["folderkey"], folder["name"])
-    except Exception as e:
-        raise DirectDownloadLinkException(e)
-    finally:
-        session.close()
+            crawler.submit(__get_content, folder["folderkey"], folder["name"])
+
+    host = urlparse(url).hostname
+    crawler = FolderCrawler(
+        lambda: session_pool.acquire(host),
+        lambda session: session_pool.release(host, True, session),
+    )
+    crawler.run(__crawl)
+    crawler.result(details)
     if len(details["contents"]) == 1:
         return (details["contents"][0]["url"], details["header"])
     return details
@@ -1234,11 +1484,12 @@ def cf_bypass(url):
     "DO NOT ABUSE THIS"
     try:
         data = {"cmd": "request.get", "url": url, "maxTimeout": 60000}
-        _json = post(
-            "https://cf.jmdkh.eu.org/v1",
-            headers={"Content-Type": "application/json"},
-            json=data,
-        ).json()
+        with cf_bypass_limit:
+            _json = post(
+                "https://cf.jmdkh.eu.org/v1",
+                headers={"Content-Type": "application/json"},
+                json=data,
+            ).json()
         if _json["status"] == "ok":
             return _json["solution"]["response"]
     except Exception as e:
@@ -1253,7 +1504,7 @@ def send_cm_file(url, file_id=None):
     else:
         _password = ""
     _passwordNeed = False
-    with create_scraper() as session:
+    with pooled_session(url) as session:
         if file_id is None:
             try:
                 html = HTML(session.get(url).text)
@@ -1301,7 +1552,6 @@ def send_cm(url):
         details["title"] = splitted_url[5]
     else:
         details["title"] = splitted_url[-1]
-    session = Session()
 
     def __collectFolders(html):
         folders = []
@@ -1316,17 +1566,29 @@ def send_cm(url):
             )
         return folders
 
-    def __getFile_link(file_id):
+    def __getFile_link(file, folderPath):
         try:
-            _res = session.post(
+            _res = request_with_retry(
+                crawler.session,
+                "POST",
                 "https://send.cm/",
-                data={"op": "download2", "id": file_id},
+                data={"op": "download2", "id": file["file_id"]},
                 allow_redirects=False,
             )
-            if "Location" in _res.headers:
-                return _res.headers["Location"]
-        except:
-            pass
+        except Exception as e:
+            raise DirectDownloadLinkException(
+                f"ERROR: {e.__class__.__name__} While getting {file['file_name']}"
+            ) from e
+        if "Location" not in _res.headers:
+            raise DirectDownloadLinkException(
+                f"ERROR: Direct link not found for {file['file_name']}"
+            )
+        item = {
+            "url": _res.headers["Location"],
+            "filename": file["file_name"],
+            "path": folderPath,
+        }
+        crawler.add(item, file["size"])
 
     def __getFiles(html):
         files = []
@@ -1343,40 +1605,41 @@ def send_cm(url):
             )
         return files
 
+    def __getFolder(folder_link, folderPath):
+        __writeContents(HTML(cf_bypass(folder_link)), folderPath)
+
     def __writeContents(html_text, folderPath=""):
-        folders = __collectFolders(html_text)
-        for folder in folders:
-            _html = HTML(cf_bypass(folder["folder_link"]))
-            __writeContents(_html, ospath.join(folderPath, folder["folder_name"]))
-        files = __getFiles(html_text)
-        for file in files:
-            if not (link := __getFile_link(file["file_id"])):
-                continue
-            item = {"url": link, "filename": file["filename"], "path": folderPath}
-            details["total_size"] += file["size"]
-            details["contents"].append(item)
+        for folder in __collectFolders(html_text):
+            crawler.submit(
+                __getFolder,
+                folder["folder_link"],
+                ospath.join(folderPath, folder["folder_name"]),
+            )
+        for file in __getFiles(html_text):
+            crawler.submit(__getFile_link, file, folderPath)
 
     try:
         mainHtml = HTML(cf_bypass(url))
     except DirectDownloadLinkException as e:
-        session.close()
         raise e
     except Exception as e:
-        session.close()
         raise DirectDownloadLinkException(
             f"ERROR: {e.__class__.__name__} While getting mainHtml"
         )
+    host = urlparse(url).hostname
+    crawler = FolderCrawler(
+        lambda: session_pool.acquire(host, False),
+        lambda session: session_pool.release(host, False, session),
+    )
     try:
-        __writeContents(mainHtml, details["title"])
+        crawler.run(__writeContents, mainHtml, details["title"])
     except DirectDownloadLinkException as e:
-        session.close()
         raise e
     except Exception as e:
-        session.close()
         raise DirectDownloadLinkException(
             f"ERROR: {e.__class__.__name__} While writing Contents"
         )
-    session.close()
+    crawler.result(details)
     if len(details["contents"]) == 1:
         return (details["contents"][0]["url"], details["header"])
     return details
@@ -1386,7 +1649,7 @@ def doods(url):
     if "/e/" in url:
         url = url.replace("/e/", "/d/")
     parsed_url = urlparse(url)
-    with create_scraper() as session:
+    with pooled_session(url) as session:
         try:
             html = HTML(session.get(url).text)
         except Exception as e:
@@ -1417,7 +1680,7 @@ def easyupload(url):
     else:
         _password = ""
     file_id = url.split("/")[-1]
-    with create_scraper() as session:
+    with pooled_session(url) as session:
         try:
             _res = session.get(url)
         except Exception as e:
@@ -1514,7 +1777,7 @@ def filelions_and_streamwish(url):
         quality = spited_file_code[1]
         file_code = spited_file_code[0]
     url = f"{scheme}://{hostname}/{file_code}"
-    with Session() as session:
+    with pooled_session(url, scraper=False) as session:
         try:
             _res = session.get(
                 f"{apiUrl}/api/file/direct_link",
@@ -1548,7 +1811,7 @@ def streamvid(url: str):
     parsed_url = urlparse(url)
     url = f"{parsed_url.scheme}://{parsed_url.hostname}/d/{file_code}"
     quality_defined = bool(url.endswith(("_o", "_h", "_n", "_l")))
-    with create_scraper() as session:
+    with pooled_session(url) as session:
         try:
             html = HTML(session.get(url).text)
         except Exception as e:
@@ -1599,7 +1862,7 @@ def streamhub(url):
     file_code = url.split("/")[-1]
     parsed_url = urlparse(url)
     url = f"{parsed_url.scheme}://{parsed_url.hostname}/d/{file_code}"
-    with create_scraper() as session:
+    with pooled_session(url) as session:
         try:
             html = HTML(session.get(url).text)
         except Exception as e:
@@ -1626,7 +1889,7 @@ def streamhub(url):
 
 
 def pcloud(url):
-    with create_scraper() as session:
+    with pooled_session(url) as session:
         try:
             res = session.get(url)
         except Exception as e:
@@ -1653,7 +1916,7 @@ def tmpsend(url):
 def qiwi(url):
     """qiwi.gg link generator
     based on https://github.com/aenulrofik"""
-    with Session() as session:
+    with pooled_session(url, scraper=False) as session:
         file_id = url.split("/")[-1]
         try:
             res = session.get(url).text
@@ -1668,7 +1931,7 @@ def qiwi(url):
 
 
 def mp4upload(url):
-    with Session() as session:
+    with pooled_session(url, scraper=False) as session:
         try:
             url = url.replace("embed-", "")
             req = session.get(url).text
@@ -1704,7 +1967,7 @@ def mp4upload(url):
 def berkasdrive(url):
     """berkasdrive.com link generator
     by https://github.com/aenulrofik"""
-    with Session() as session:
+    with pooled_session(url, scraper=False) as session:
         try:
             sesi = session.get(url).text
         except Exception as e:
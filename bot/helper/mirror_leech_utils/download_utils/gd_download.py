@@ -13,7 +13,7 @@ from ...telegram_helper.message_utils import send_status_message
 async def add_gd_download(listener, path):
     drive = GoogleDriveCount()
     name, mime_type, listener.size, _, _ = await sync_to_async(
-        drive.count, listener.link, listener.user_id
+        drive.count, listener.link, listener.user_id, pool="transfer"
     )
     if mime_type is None:
         await listener.on_download_error(name)
@@ -51,4 +51,4 @@ async def add_gd_download(listener, path):
         if listener.multi <= 1:
             await send_status_message(listener.message)
 
-    await sync_to_async(drive.download)
+    await sync_to_async(drive.download, pool="transfer")
@@ -126,7 +126,7 @@ class YoutubeDLHelper:
 
     def _on_download_error(self, error):
         self._listener.is_cancelled = True
-        async_to_sync(self._listener.on_download_error, error)
+        async_to_sync(self._listener.on_download_error, error, wait=False)
 
     def _extract_meta_data(self):
         if self._listener.link.startswith(("rtmp", "mms", "rstp", "rtmps")):
@@ -181,7 +181,7 @@ class YoutubeDLHelper:
                 return
             if self._listener.is_cancelled:
                 return
-            async_to_sync(self._listener.on_download_complete)
+            async_to_sync(self._listener.on_download_complete, wait=False)
         except:
             pass
 
@@ -227,7 +227,7 @@ class YoutubeDLHelper:
 
         self.opts["format"] = qual
 
-        await sync_to_async(self._extract_meta_data)
+        await sync_to_async(self._extract_meta_data, pool="transfer")
         if self._listener.is_cancelled:
             return
 
@@ -329,7 +329,7 @@ class YoutubeDLHelper:
         if not add_to_queue:
             LOGGER.info(f"Download with YT_DLP: {self._listener.name}")
 
-        await sync_to_async(self._download, path)
+        await sync_to_async(self._download, path, pool="transfer")
 
     async def cancel_task(self):
         self._listener.is_cancelled = True
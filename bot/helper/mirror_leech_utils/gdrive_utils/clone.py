@@ -1,3 +1,5 @@
+from collections import deque
+from concurrent.futures import as_completed
 from googleapiclient.errors import HttpError
 from logging import getLogger
 from os import path as ospath
@@ -8,9 +10,11 @@ from tenacity import (
     retry_if_exception_type,
     RetryError,
 )
+from threading import Lock
 from time import time
 
-from ...ext_utils.bot_utils import async_to_sync
+from ....core.config_manager import Config
+from ...ext_utils.bot_utils import async_to_sync, TaskPool
 from ...mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
 
 LOGGER = getLogger(__name__)
@@ -22,6 +26,7 @@ class GoogleDriveClone(GoogleDriveHelper):
         self._start_time = time()
         super().__init__()
         self.is_cloning = True
+        self._lock = Lock()
         self.user_setting()
 
     def user_setting(self):
@@ -99,42 +104,75 @@ class GoogleDriveClone(GoogleDriveHelper):
                 msg = "File not found."
             else:
                 msg = f"Error.\n{err}"
-            async_to_sync(self.listener.on_upload_error, msg)
+            async_to_sync(self.listener.on_upload_error, msg, wait=False)
             return None, None, None, None, None
 
+    def _copy_worker(self, file, dest_id):
+        if self.listener.is_cancelled:
+            return
+        self._copy_file(file.get("id"), dest_id, self.get_worker())
+        with self._lock:
+            self.total_files += 1
+            self.proc_bytes += int(file.get("size", 0))
+            self.total_time = int(time() - self._start_time)
+
     def _clone_folder(self, folder_name, folder_id, dest_id):
-        LOGGER.info(f"Syncing: {folder_name}")
-        files = self.get_files_by_folder_id(folder_id)
-        if len(files) == 0:
-            return dest_id
-        for file in files:
-            if file.get("mimeType") == self.G_DRIVE_DIR_MIME_TYPE:
-                self.total_folders += 1
-                file_path = ospath.join(folder_name, file.get("name"))
-                current_dir_id = self.create_directory(file.get("name"), dest_id)
-                self._clone_folder(file_path, file.get("id"), current_dir_id)
-            elif (
-                not file.get("name")
-                .lower()
-                .endswith(tuple(self.listener.extension_filter))
-            ):
-                self.total_files += 1
-                self._copy_file(file.get("id"), dest_id)
-                self.proc_bytes += int(file.get("size", 0))
-                self.total_time = int(time() - self._start_time)
-            if self.listener.is_cancelled:
-                break
+        folders = deque([(folder_name, folder_id, dest_id)])
+        futures = []
+        with TaskPool(Config.GDRIVE_WORKERS or 1) as pool:
+            try:
+                while folders and not self.listener.is_cancelled:
+                    folder_name, folder_id, dest_id = folders.popleft()
+                    LOGGER.info(f"Syncing: {folder_name}")
+                    for file in self.get_files_by_folder_id(folder_id):
+                        if file.get("mimeType") == self.G_DRIVE_DIR_MIME_TYPE:
+                            self.total_folders += 1
+                            current_dir_id = self.create_directory(
+                                file.get("name"), dest_id
+                            )
+                            folders.append(
+                                (
+                                    ospath.join(folder_name, file.get("name")),
+                                    file.get("id"),
+                                    current_dir_id,
+                                )
+                            )
+                        elif (
+                            not file.get("name")
+                            .lower()
+                            .endswith(tuple(self.listener.extension_filter))
+                        ):
+                            # stop walking the tree on the first failed copy
+                            futures = self._check_copies(futures)
+                            futures.append(pool.submit(self._copy_worker, file, dest_id))
+                    futures = self._check_copies(futures)
+                for future in as_completed(futures):
+                    future.result()
+            except:
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    @staticmethod
+    def _check_copies(futures):
+        pending = []
+        for future in futures:
+            if future.done():
+                future.result()
+            else:
+                pending.append(future)
+        return pending
 
     @retry(
         wait=wait_exponential(multiplier=2, min=3, max=6),
         stop=stop_after_attempt(3),
         retry=retry_if_exception_type(Exception),
     )
-    def _copy_file(self, file_id, dest_id):
+    def _copy_file(self, file_id, dest_id, drive=None):
+        drive = drive or self
         body = {"parents": [dest_id]}
         try:
             return (
-                self.service.files()
+                drive.service.files()
                 .copy(fileId=file_id, body=body, supportsAllDrives=True)
                 .execute()
             )
@@ -149,17 +187,17 @@ class GoogleDriveClone(GoogleDriveHelper):
                     raise err
                 if reason == "cannotCopyFile":
                     LOGGER.error(err)
-                elif self.use_sa:
-                    if self.sa_count >= self.sa_number:
+                elif drive.use_sa:
+                    if drive.sa_count >= drive.sa_number:
                         LOGGER.info(
-                            f"Reached maximum number of service accounts switching, which is {self.sa_count}"
+                            f"Reached maximum number of service accounts switching, which is {drive.sa_count}"
                         )
                         raise err
                     else:
                         if self.listener.is_cancelled:
                             return
-                        self.switch_service_account()
-                        return self._copy_file(file_id, dest_id)
+                        drive.switch_service_account()
+                        return self._copy_file(file_id, dest_id, drive)
                 else:
                     LOGGER.error(f"Got: {reason}")
                     raise err
@@ -1,10 +1,30 @@
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, wait
 from logging import getLogger
-from tenacity import RetryError
+from tenacity import (
+    retry,
+    wait_exponential,
+    stop_after_attempt,
+    retry_if_exception_type,
+    RetryError,
+)
+from threading import Lock
+from time import time
 
+from ....core.config_manager import Config
+from ...ext_utils.bot_utils import TaskPool
 from ...mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
 
 LOGGER = getLogger(__name__)
 
+COUNT_CACHE_TTL = 120
+# parent ids or-ed into a single files.list query
+COUNT_BATCH_SIZE = 20
+
+# (use_sa, token_path, folder_id): (time, size, files, folders)
+_count_cache = {}
+_cache_lock = Lock()
+
 
 class GoogleDriveCount(GoogleDriveHelper):
     def __init__(self):
@@ -61,20 +81,138 @@ class GoogleDriveCount(GoogleDriveHelper):
         self.proc_bytes += size
 
     def _gdrive_directory(self, drive_folder):
-        files = self.get_files_by_folder_id(drive_folder["id"])
-        if len(files) == 0:
-            return
-        for filee in files:
-            shortcut_details = filee.get("shortcutDetails")
-            if shortcut_details is not None:
-                mime_type = shortcut_details["targetMimeType"]
-                file_id = shortcut_details["targetId"]
-                filee = self.get_file_metadata(file_id)
-            else:
-                mime_type = filee.get("mimeType")
-            if mime_type == self.G_DRIVE_DIR_MIME_TYPE:
-                self.total_folders += 1
-                self._gdrive_directory(filee)
+        size, files, folders = self._count_folder(drive_folder["id"])
+        self.proc_bytes += size
+        self.total_files += files
+        self.total_folders += folders
+
+    def _cache_key(self, folder_id):
+        return self.use_sa, self.token_path, folder_id
+
+    def _get_cached(self, folder_id):
+        with _cache_lock:
+            entry = _count_cache.get(self._cache_key(folder_id))
+        if entry is not None and time() - entry[0] < COUNT_CACHE_TTL:
+            return entry[1:]
+        return None
+
+    def _memoize(self, totals):
+        now = time()
+        with _cache_lock:
+            for key, entry in list(_count_cache.items()):
+                if now - entry[0] >= COUNT_CACHE_TTL:
+                    del _count_cache[key]
+            for folder_id, (size, files, folders) in totals.items():
+                _count_cache[self._cache_key(folder_id)] = (now, size, files, folders)
+
+    @retry(
+        wait=wait_exponential(multiplier=2, min=3, max=6),
+        stop=stop_after_attempt(3),
+        retry=retry_if_exception_type(Exception),
+    )
+    def _get_children_page(self, drive, query, page_token=None):
+        response = (
+            drive.service.files()
+            .list(
+                supportsAllDrives=True,
+                includeItemsFromAllDrives=True,
+                q=query,
+                spaces="drive",
+                pageSize=1000,
+                fields="nextPageToken, files(id, size, mimeType, parents, shortcutDetails)",
+                pageToken=page_token,
+            )
+            .execute()
+        )
+        return response.get("files", []), response.get("nextPageToken")
+
+    def _list_children(self, folder_ids):
+        drive = self.get_worker()
+        query = " or ".join(f"'{folder_id}' in parents" for folder_id in folder_ids)
+        query = f"({query}) and trashed = false"
+        children = defaultdict(list)
+        page_token = None
+        while True:
+            page, page_token = self._get_children_page(drive, query, page_token)
+            for item in page:
+                for parent in item.get("parents", []):
+                    if parent in folder_ids:
+                        children[parent].append(item)
+            if page_token is None:
+                break
+        return children
+
+    @staticmethod
+    def _is_ancestor(nodes, index, folder_id):
+        while index is not None:
+            if nodes[index][0] == folder_id:
+                return True
+            index = nodes[index][1]
+        return False
+
+    def _add_item(self, nodes, index, item, pending):
+        node = nodes[index]
+        shortcut_details = item.get("shortcutDetails")
+        if shortcut_details is not None:
+            mime_type = shortcut_details["targetMimeType"]
+            file_id = shortcut_details["targetId"]
+        else:
+            mime_type = item.get("mimeType")
+            file_id = item["id"]
+        if mime_type == self.G_DRIVE_DIR_MIME_TYPE:
+            node[4] += 1
+            if self._is_ancestor(nodes, index, file_id):
+                LOGGER.warning(f"Skipping shortcut loop to folder: {file_id}")
+            elif (totals := self._get_cached(file_id)) is not None:
+                node[2] += totals[0]
+                node[3] += totals[1]
+                node[4] += totals[2]
             else:
-                self.total_files += 1
-                self._gdrive_file(filee)
+                nodes.append([file_id, index, 0, 0, 0])
+                pending.append(len(nodes) - 1)
+        else:
+            if shortcut_details is not None:
+                item = self.get_file_metadata(file_id)
+            node[2] += int(item.get("size", 0))
+            node[3] += 1
+
+    def _count_folder(self, folder_id):
+        if (totals := self._get_cached(folder_id)) is not None:
+            return totals
+        # [folder_id, parent node, size, files, folders], children always come
+        # after their parent so totals can be summed up in reverse order
+        nodes = [[folder_id, None, 0, 0, 0]]
+        pending = deque([0])
+        in_flight = {}
+        max_workers = Config.GDRIVE_WORKERS or 1
+        with TaskPool(max_workers) as pool:
+            try:
+                while pending or in_flight:
+                    while pending and (
+                        len(pending) >= COUNT_BATCH_SIZE or len(in_flight) < max_workers
+                    ):
+                        batch = [
+                            pending.popleft()
+                            for _ in range(min(COUNT_BATCH_SIZE, len(pending)))
+                        ]
+                        future = pool.submit(
+                            self._list_children, {nodes[i][0] for i in batch}
+                        )
+                        in_flight[future] = batch
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        batch = in_flight.pop(future)
+                        children = future.result()
+                        for index in batch:
+                            for item in children.get(nodes[index][0], []):
+                                self._add_item(nodes, index, item, pending)
+            except:
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+        for node in reversed(nodes[1:]):
+            parent = nodes[node[1]]
+            parent[2] += node[2]
+            parent[3] += node[3]
+            parent[4] += node[4]
+        self._memoize({node[0]: node[2:] for node in nodes})
+        return nodes[0][2:]
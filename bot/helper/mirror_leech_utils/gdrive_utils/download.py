@@ -1,3 +1,4 @@
+from concurrent.futures import FIRST_COMPLETED, as_completed, wait
 from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaIoBaseDownload
 from io import FileIO
@@ -11,12 +12,19 @@ from tenacity import (
     RetryError,
 )
 
+from ....core.config_manager import Config
 from ...ext_utils.bot_utils import async_to_sync
-from ...ext_utils.bot_utils import SetInterval
+from ...ext_utils.bot_utils import SetInterval, TaskPool
 from ...mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
 
 LOGGER = getLogger(__name__)
 
+# files from this size on are fetched as parallel range requests of RANGE_PART_SIZE,
+# each part streamed to disk RANGE_CHUNK_SIZE at a time
+RANGE_MIN_SIZE = 128 * 1024 * 1024
+RANGE_PART_SIZE = 32 * 1024 * 1024
+RANGE_CHUNK_SIZE = 8 * 1024 * 1024
+
 
 class GoogleDriveDownload(GoogleDriveHelper):
     def __init__(self, listener, path):
@@ -26,6 +34,14 @@ class GoogleDriveDownload(GoogleDriveHelper):
         super().__init__()
         self.is_downloading = True
 
+    async def progress(self):
+        # each worker only writes its own counters, summing them needs no lock
+        self.proc_bytes = sum(
+            worker.proc_bytes + worker.file_processed_bytes
+            for worker in list(self.workers)
+        )
+        self.total_time += self.update_interval
+
     def download(self):
         file_id = self.get_id_from_url(self.listener.link, self.listener.user_id)
         self.service = self.authorize()
@@ -36,9 +52,18 @@ class GoogleDriveDownload(GoogleDriveHelper):
                 self._download_folder(file_id, self._path, self.listener.name)
             else:
                 makedirs(self._path, exist_ok=True)
-                self._download_file(
-                    file_id, self._path, self.listener.name, meta.get("mimeType")
-                )
+                with TaskPool(Config.GDRIVE_WORKERS or 1) as pool:
+                    self._wait_downloads(
+                        pool,
+                        self._submit_file(
+                            pool,
+                            file_id,
+                            self._path,
+                            self.listener.name,
+                            meta.get("mimeType"),
+                            int(meta.get("size", 0)),
+                        ),
+                    )
         except Exception as err:
             if isinstance(err, RetryError):
                 LOGGER.info(f"Total Attempts: {err.last_attempt.attempt_number}")
@@ -52,111 +77,252 @@ class GoogleDriveDownload(GoogleDriveHelper):
                     self.use_sa = False
                     LOGGER.error("File not found. Trying with token.pickle...")
                     self._updater.cancel()
+                    self.workers = []
+                    self._slot_workers = {}
                     return self.download()
                 err = "File not found!"
-            async_to_sync(self.listener.on_download_error, err)
+            async_to_sync(self.listener.on_download_error, err, wait=False)
             self.listener.is_cancelled = True
         finally:
             self._updater.cancel()
             if self.listener.is_cancelled:
                 return
-            async_to_sync(self.listener.on_download_complete)
+            async_to_sync(self.listener.on_download_complete, wait=False)
+
+    @staticmethod
+    def _make_dir(path, folder_name):
+        path += f"/{folder_name.replace('/', '')}"
+        makedirs(path, exist_ok=True)
+        return path
+
+    def _list_folder(self, folder_id, path):
+        if self.listener.is_cancelled:
+            return path, []
+        result = self.get_worker().get_files_by_folder_id(folder_id)
+        return path, sorted(result, key=lambda k: k["name"])
 
     def _download_folder(self, folder_id, path, folder_name):
-        folder_name = folder_name.replace("/", "")
-        if not ospath.exists(f"{path}/{folder_name}"):
-            makedirs(f"{path}/{folder_name}")
-        path += f"/{folder_name}"
-        result = self.get_files_by_folder_id(folder_id)
-        if len(result) == 0:
+        # sub folders are listed by their own pool so crawling never waits
+        # behind the file downloads queued from the folders found so far
+        max_workers = Config.GDRIVE_WORKERS or 1
+        downloads = []
+        with TaskPool(max_workers) as lister, TaskPool(max_workers) as pool:
+            try:
+                listings = {
+                    lister.submit(
+                        self._list_folder, folder_id, self._make_dir(path, folder_name)
+                    )
+                }
+                while listings and not self.listener.is_cancelled:
+                    done, listings = wait(listings, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        path, result = future.result()
+                        for item in result:
+                            if self.listener.is_cancelled:
+                                break
+                            file_id = item["id"]
+                            filename = item["name"]
+                            shortcut_details = item.get("shortcutDetails")
+                            if shortcut_details is not None:
+                                file_id = shortcut_details["targetId"]
+                                mime_type = shortcut_details["targetMimeType"]
+                            else:
+                                mime_type = item.get("mimeType")
+                            if mime_type == self.G_DRIVE_DIR_MIME_TYPE:
+                                listings.add(
+                                    lister.submit(
+                                        self._list_folder,
+                                        file_id,
+                                        self._make_dir(path, filename),
+                                    )
+                                )
+                            elif not ospath.isfile(
+                                f"{path}/{filename}"
+                            ) and not filename.lower().endswith(
+                                tuple(self.listener.extension_filter)
+                            ):
+                                downloads.extend(
+                                    self._submit_file(
+                                        pool,
+                                        file_id,
+                                        path,
+                                        filename,
+                                        mime_type,
+                                        int(item.get("size", 0)),
+                                    )
+                                )
+                self._wait_downloads(pool, downloads)
+            except:
+                lister.shutdown(wait=False, cancel_futures=True)
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    @staticmethod
+    def _wait_downloads(pool, futures):
+        try:
+            for future in as_completed(futures):
+                future.result()
+        except:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    def _submit_file(self, pool, file_id, path, filename, mime_type, size):
+        # shortcut targets and google docs come without a size, they use one stream
+        if size < RANGE_MIN_SIZE:
+            return [
+                pool.submit(self._download_worker, file_id, path, filename, mime_type)
+            ]
+        file_path = f"{path}/{self._file_name(filename)}"
+        with open(file_path, "wb") as f:
+            f.truncate(size)
+        return [
+            pool.submit(
+                self._download_part,
+                file_id,
+                file_path,
+                start,
+                min(start + RANGE_PART_SIZE, size) - 1,
+            )
+            for start in range(0, size, RANGE_PART_SIZE)
+        ]
+
+    def _file_name(self, filename, export=False):
+        filename = filename.replace("/", "")
+        if export:
+            filename = f"{filename}.pdf"
+        if len(filename.encode()) > 255:
+            ext = ospath.splitext(filename)[1]
+            filename = f"{filename[:245]}{ext}"
+
+            if self.listener.name.endswith(ext):
+                self.listener.name = filename
+        return filename
+
+    @staticmethod
+    def _get_reason(err):
+        if err.resp.get("content-type", "").startswith("application/json"):
+            return eval(err.content).get("error").get("errors")[0].get("reason")
+        return ""
+
+    def _switch_on_quota(self, err, reason, drive):
+        if reason not in [
+            "downloadQuotaExceeded",
+            "dailyLimitExceeded",
+        ]:
+            raise err
+        if not drive.use_sa:
+            LOGGER.error(f"Got: {reason}")
+            raise err
+        if drive.sa_count >= drive.sa_number:
+            LOGGER.info(
+                f"Reached maximum number of service accounts switching, which is {drive.sa_count}"
+            )
+            raise err
+        drive.switch_service_account()
+        LOGGER.info(f"Got: {reason}, Trying Again...")
+
+    def _download_worker(self, file_id, path, filename, mime_type):
+        if self.listener.is_cancelled:
             return
-        result = sorted(result, key=lambda k: k["name"])
-        for item in result:
-            file_id = item["id"]
-            filename = item["name"]
-            shortcut_details = item.get("shortcutDetails")
-            if shortcut_details is not None:
-                file_id = shortcut_details["targetId"]
-                mime_type = shortcut_details["targetMimeType"]
-            else:
-                mime_type = item.get("mimeType")
-            if mime_type == self.G_DRIVE_DIR_MIME_TYPE:
-                self._download_folder(file_id, path, filename)
-            elif not ospath.isfile(
-                f"{path}{filename}"
-            ) and not filename.lower().endswith(tuple(self.listener.extension_filter)):
-                self._download_file(file_id, path, filename, mime_type)
-            if self.listener.is_cancelled:
-                break
+        self._download_file(
+            file_id, path, filename, mime_type, drive=self.get_worker()
+        )
+
+    @retry(
+        wait=wait_exponential(multiplier=2, min=3, max=6),
+        stop=stop_after_attempt(3),
+        retry=(retry_if_exception_type(Exception)),
+    )
+    def _download_part(self, file_id, file_path, start, end):
+        drive = self.get_worker()
+        offset = start
+        retries = 0
+        try:
+            with FileIO(file_path, "r+b") as fh:
+                while offset <= end and not self.listener.is_cancelled:
+                    size = min(RANGE_CHUNK_SIZE, end - offset + 1)
+                    fh.seek(offset)
+                    request = drive.service.files().get_media(
+                        fileId=file_id, supportsAllDrives=True, acknowledgeAbuse=True
+                    )
+                    downloader = MediaIoBaseDownload(fh, request, chunksize=size)
+                    # MediaIoBaseDownload ranges from byte 0, start it at this offset
+                    downloader._progress = offset
+                    try:
+                        status, _ = downloader.next_chunk()
+                    except HttpError as err:
+                        LOGGER.error(err)
+                        if (
+                            err.resp.status in [500, 502, 503, 504, 429]
+                            and retries < 10
+                        ):
+                            retries += 1
+                            continue
+                        self._switch_on_quota(err, self._get_reason(err), drive)
+                        continue
+                    # a server that ignores the range answers 200 with the whole
+                    # file, anything but exactly this range would corrupt the part
+                    if status.resumable_progress - offset != size:
+                        raise Exception(
+                            f"Range {offset}-{offset + size - 1} of {file_id} returned "
+                            f"{status.resumable_progress - offset} bytes"
+                        )
+                    offset += size
+                    drive.proc_bytes += size
+        except:
+            # the retry downloads the whole part again
+            drive.proc_bytes -= offset - start
+            raise
 
     @retry(
         wait=wait_exponential(multiplier=2, min=3, max=6),
         stop=stop_after_attempt(3),
         retry=(retry_if_exception_type(Exception)),
     )
-    def _download_file(self, file_id, path, filename, mime_type, export=False):
+    def _download_file(
+        self, file_id, path, filename, mime_type, export=False, drive=None
+    ):
+        drive = drive or self
         if export:
-            request = self.service.files().export_media(
+            request = drive.service.files().export_media(
                 fileId=file_id, mimeType="application/pdf"
             )
         else:
-            request = self.service.files().get_media(
+            request = drive.service.files().get_media(
                 fileId=file_id, supportsAllDrives=True, acknowledgeAbuse=True
             )
-        filename = filename.replace("/", "")
-        if export:
-            filename = f"{filename}.pdf"
-        if len(filename.encode()) > 255:
-            ext = ospath.splitext(filename)[1]
-            filename = f"{filename[:245]}{ext}"
-
-            if self.listener.name.endswith(ext):
-                self.listener.name = filename
+        filename = self._file_name(filename, export)
         if self.listener.is_cancelled:
             return
+        drive.file_processed_bytes = 0
         fh = FileIO(f"{path}/{filename}", "wb")
         downloader = MediaIoBaseDownload(fh, request, chunksize=50 * 1024 * 1024)
         done = False
         retries = 0
         while not done:
             if self.listener.is_cancelled:
-                fh.close()
                 break
             try:
-                self.status, done = downloader.next_chunk()
+                drive.status, done = downloader.next_chunk()
+                drive.file_processed_bytes = drive.status.resumable_progress
             except HttpError as err:
                 LOGGER.error(err)
                 if err.resp.status in [500, 502, 503, 504, 429] and retries < 10:
                     retries += 1
                     continue
-                if err.resp.get("content-type", "").startswith("application/json"):
-                    reason = (
-                        eval(err.content).get("error").get("errors")[0].get("reason")
+                reason = self._get_reason(err)
+                if "fileNotDownloadable" in reason and "document" in mime_type:
+                    fh.close()
+                    return self._download_file(
+                        file_id, path, filename, mime_type, True, drive
                     )
-                    if "fileNotDownloadable" in reason and "document" in mime_type:
-                        return self._download_file(
-                            file_id, path, filename, mime_type, True
-                        )
-                    if reason not in [
-                        "downloadQuotaExceeded",
-                        "dailyLimitExceeded",
-                    ]:
-                        raise err
-                    if self.use_sa:
-                        if self.sa_count >= self.sa_number:
-                            LOGGER.info(
-                                f"Reached maximum number of service accounts switching, which is {self.sa_count}"
-                            )
-                            raise err
-                        else:
-                            if self.listener.is_cancelled:
-                                return
-                            self.switch_service_account()
-                            LOGGER.info(f"Got: {reason}, Trying Again...")
-                            return self._download_file(
-                                file_id, path, filename, mime_type
-                            )
-                    else:
-                        LOGGER.error(f"Got: {reason}")
-                        raise err
-        self.file_processed_bytes = 0
+                self._switch_on_quota(err, reason, drive)
+                if self.listener.is_cancelled:
+                    break
+                fh.close()
+                return self._download_file(
+                    file_id, path, filename, mime_type, drive=drive
+                )
+        fh.close()
+        drive.proc_bytes += drive.file_processed_bytes
+        drive.file_processed_bytes = 0
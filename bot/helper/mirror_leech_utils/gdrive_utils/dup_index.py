@@ -0,0 +1,305 @@
+from asyncio import Lock as AsyncLock
+from json import dump, load
+from logging import getLogger
+from os import path as ospath, replace
+from threading import Lock
+from time import time
+
+from .... import bot_loop, drives_ids
+from ....core.config_manager import Config
+from ...ext_utils.bot_utils import sync_to_async
+from ...ext_utils.links_utils import is_gdrive_id
+from ...mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
+
+LOGGER = getLogger(__name__)
+
+# an index not synced with the changes api for this long is caught up before use
+DUP_INDEX_TTL = 120
+DUP_INDEX_RETRY = 10
+DUP_INDEX_FILE = "drive_index.json"
+
+
+def _key(name):
+    return name.strip().casefold()
+
+
+class DriveIndex(GoogleDriveHelper):
+    """names under one upload destination, kept current with the changes api"""
+
+    def __init__(self, dest_id, use_sa):
+        super().__init__()
+        self.dest_id = dest_id
+        self.use_sa = use_sa
+        # shared drive ids are short, for folders only direct children are indexed
+        self.is_folder = len(dest_id) > 23
+        self.drive_id = None if self.is_folder else dest_id
+        self.page_token = None
+        self.synced = 0
+        self.sync_time = 0
+        self.dirty = False
+        self._files = {}
+        self._names = {}
+        self._lock = Lock()
+
+    @property
+    def is_fresh(self):
+        return self.page_token is not None and time() - self.synced < DUP_INDEX_TTL
+
+    def has_name(self, name):
+        with self._lock:
+            return _key(name) in self._names
+
+    def add(self, file_id, name):
+        with self._lock:
+            self._add(file_id, name)
+
+    def _add(self, file_id, name):
+        self._discard(file_id)
+        self._files[file_id] = name
+        self._names.setdefault(_key(name), set()).add(file_id)
+        self.dirty = True
+
+    def _discard(self, file_id):
+        if (name := self._files.pop(file_id, None)) is None:
+            return
+        key = _key(name)
+        if ids := self._names.get(key):
+            ids.discard(file_id)
+            if not ids:
+                del self._names[key]
+        self.dirty = True
+
+    def _apply_change(self, change):
+        if (file_id := change.get("fileId")) is None:
+            return
+        file = change.get("file")
+        if (
+            change.get("removed")
+            or not file
+            or file.get("trashed")
+            or self.is_folder
+            and self.dest_id not in file.get("parents", [])
+        ):
+            self._discard(file_id)
+        else:
+            self._add(file_id, file["name"])
+
+    def sync(self):
+        self.sync_time = time()
+        try:
+            if self.service is None:
+                self.service = self.authorize()
+            if self.page_token is None:
+                self._build()
+            else:
+                self._sync_changes()
+            self.synced = time()
+        except Exception as e:
+            LOGGER.error(f"While syncing Drive index of {self.dest_id}: {e}")
+
+    def _drive_kwargs(self):
+        if self.drive_id is None:
+            return {}
+        return {"driveId": self.drive_id}
+
+    def _build(self):
+        if self.is_folder:
+            meta = (
+                self.service.files()
+                .get(fileId=self.dest_id, supportsAllDrives=True, fields="driveId")
+                .execute()
+            )
+            self.drive_id = meta.get("driveId")
+        # take the token first so changes made while listing are replayed later
+        page_token = (
+            self.service.changes()
+            .getStartPageToken(supportsAllDrives=True, **self._drive_kwargs())
+            .execute()["startPageToken"]
+        )
+        if self.is_folder:
+            kwargs = {"q": f"'{self.dest_id}' in parents and trashed = false"}
+        else:
+            kwargs = {
+                "q": "trashed = false",
+                "corpora": "drive",
+                "driveId": self.drive_id,
+            }
+        files = {}
+        next_page = None
+        while True:
+            response = (
+                self.service.files()
+                .list(
+                    supportsAllDrives=True,
+                    includeItemsFromAllDrives=True,
+                    spaces="drive",
+                    pageSize=1000,
+                    fields="nextPageToken, files(id, name)",
+                    pageToken=next_page,
+                    **kwargs,
+                )
+                .execute()
+            )
+            for file in response.get("files", []):
+                files[file["id"]] = file["name"]
+            if (next_page := response.get("nextPageToken")) is None:
+                break
+        with self._lock:
+            self._files = {}
+            self._names = {}
+            for file_id, name in files.items():
+                self._add(file_id, name)
+            self.page_token = page_token
+        LOGGER.info(f"Drive index built for {self.dest_id}: {len(files)} items")
+
+    def _sync_changes(self):
+        page_token = self.page_token
+        while page_token is not None:
+            response = (
+                self.service.changes()
+                .list(
+                    pageToken=page_token,
+                    pageSize=1000,
+                    spaces="drive",
+                    supportsAllDrives=True,
+                    includeItemsFromAllDrives=True,
+                    fields="nextPageToken, newStartPageToken, changes(fileId, removed, file(name, parents, trashed))",
+                    **self._drive_kwargs(),
+                )
+                .execute()
+            )
+            with self._lock:
+                for change in response.get("changes", []):
+                    self._apply_change(change)
+                if new_token := response.get("newStartPageToken"):
+                    self.page_token = new_token
+                elif next_page := response.get("nextPageToken"):
+                    self.page_token = next_page
+            page_token = response.get("nextPageToken")
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "use_sa": self.use_sa,
+                "drive_id": self.drive_id,
+                "page_token": self.page_token,
+                "files": dict(self._files),
+            }
+
+    @classmethod
+    def from_dict(cls, dest_id, data):
+        index = cls(dest_id, data["use_sa"])
+        index.drive_id = data["drive_id"]
+        index.page_token = data["page_token"]
+        for file_id, name in data["files"].items():
+            index._add(file_id, name)
+        index.dirty = False
+        return index
+
+
+class DriveIndexes:
+    """local name lookups for stop duplicate, None means ask the live search"""
+
+    def __init__(self):
+        self._indexes = None
+        self._load_lock = AsyncLock()
+        self._save_lock = Lock()
+        self._syncs = {}
+
+    @staticmethod
+    def _parse_dest(dest):
+        if (
+            not isinstance(dest, str)
+            or dest.startswith("mtp:")
+            or not is_gdrive_id(dest)
+        ):
+            return None, False
+        use_sa = Config.USE_SERVICE_ACCOUNTS
+        if dest.startswith("tp:") or len(drives_ids) > 1:
+            use_sa = False
+        if dest.startswith("sa:"):
+            use_sa = True
+        dest_id = dest.split(":", 1)[-1]
+        if dest_id in ["root", "gdl"]:
+            return None, False
+        return dest_id, use_sa
+
+    @staticmethod
+    def _read():
+        indexes = {}
+        if not ospath.exists(DUP_INDEX_FILE):
+            return indexes
+        try:
+            with open(DUP_INDEX_FILE) as f:
+                data = load(f)
+            for dest_id, index in data.items():
+                indexes[dest_id] = DriveIndex.from_dict(dest_id, index)
+        except Exception as e:
+            LOGGER.error(f"While loading {DUP_INDEX_FILE}: {e}")
+        return indexes
+
+    async def _load(self):
+        async with self._load_lock:
+            if self._indexes is None:
+                self._indexes = await sync_to_async(self._read, pool="fs")
+
+    async def lookup(self, dest, name):
+        dest_id, use_sa = self._parse_dest(dest)
+        if dest_id is None:
+            return None
+        await self._load()
+        index = self._indexes.get(dest_id)
+        if index is None:
+            index = self._indexes[dest_id] = DriveIndex(dest_id, use_sa)
+        if not index.is_fresh and (task := self._start_sync(index)) is not None:
+            # catching up with the changes api is a page or two, wait for it
+            if index.page_token is not None:
+                await task
+        if index.is_fresh:
+            return index.has_name(name)
+        return None
+
+    def _start_sync(self, index):
+        if (task := self._syncs.get(index.dest_id)) is not None:
+            return task
+        # failed syncs are retried at most every DUP_INDEX_RETRY seconds
+        failed = index.synced < index.sync_time
+        if failed and time() - index.sync_time < DUP_INDEX_RETRY:
+            return None
+        task = self._syncs[index.dest_id] = bot_loop.create_task(self._sync(index))
+        return task
+
+    async def _sync(self, index):
+        try:
+            await sync_to_async(index.sync, pool="rpc")
+            if index.dirty:
+                await sync_to_async(self.save, pool="fs")
+        finally:
+            del self._syncs[index.dest_id]
+
+    def add(self, dest, name, file_id):
+        # our own uploads show up before the next changes sync
+        if self._indexes is None:
+            return
+        dest_id, _ = self._parse_dest(dest)
+        if (
+            index := self._indexes.get(dest_id)
+        ) is not None and index.page_token is not None:
+            index.add(file_id, name)
+
+    def save(self):
+        with self._save_lock:
+            data = {}
+            for dest_id, index in list(self._indexes.items()):
+                if index.page_token is not None:
+                    index.dirty = False
+                    data[dest_id] = index.to_dict()
+            try:
+                with open(f"{DUP_INDEX_FILE}.tmp", "w") as f:
+                    dump(data, f)
+                replace(f"{DUP_INDEX_FILE}.tmp", DUP_INDEX_FILE)
+            except Exception as e:
+                LOGGER.error(f"While saving {DUP_INDEX_FILE}: {e}")
+
+
+drive_index = DriveIndexes()
@@ -7,6 +7,7 @@ from os import path as ospath, listdir
 from pickle import load as pload
 from random import randrange
 from re import search as re_search
+from threading import get_ident
 from urllib.parse import parse_qs, urlparse
 from tenacity import (
     retry,
@@ -16,6 +17,7 @@ from tenacity import (
 )
 
 from ....core.config_manager import Config
+from ...ext_utils.bot_utils import current_slot
 from ...ext_utils.links_utils import is_gdrive_id
 
 LOGGER = getLogger(__name__)
@@ -47,6 +49,8 @@ class GoogleDriveHelper:
         self.status = None
         self.update_interval = 3
         self.use_sa = Config.USE_SERVICE_ACCOUNTS
+        self.workers = []
+        self._slot_workers = {}
 
     @property
     def speed(self):
@@ -89,6 +93,24 @@ class GoogleDriveHelper:
         authorized_http.http.disable_ssl_certificate_validation = True
         return build("drive", "v3", http=authorized_http, cache_discovery=False)
 
+    def new_worker(self):
+        # googleapiclient services aren't thread safe, give each worker its own
+        worker = GoogleDriveHelper()
+        worker.token_path = self.token_path
+        worker.use_sa = self.use_sa
+        worker.service = worker.authorize()
+        return worker
+
+    def get_worker(self):
+        # TaskPool jobs hop between shared threads, one worker per slot keeps the
+        # number of authorized services at the task's own GDRIVE_WORKERS
+        key = current_slot() or get_ident()
+        if (worker := self._slot_workers.get(key)) is None:
+            worker = self.new_worker()
+            self._slot_workers[key] = worker
+            self.workers.append(worker)
+        return worker
+
     def switch_service_account(self):
         if self.sa_index == self.sa_number - 1:
             self.sa_index = 0
@@ -159,32 +181,35 @@ class GoogleDriveHelper:
         stop=stop_after_attempt(3),
         retry=retry_if_exception_type(Exception),
     )
-    def get_files_by_folder_id(self, folder_id, item_type=""):
-        page_token = None
-        files = []
+    def get_files_page(self, folder_id, item_type="", page_token=None):
         if not item_type:
             q = f"'{folder_id}' in parents and trashed = false"
         elif item_type == "folders":
             q = f"'{folder_id}' in parents and mimeType = '{self.G_DRIVE_DIR_MIME_TYPE}' and trashed = false"
         else:
             q = f"'{folder_id}' in parents and mimeType != '{self.G_DRIVE_DIR_MIME_TYPE}' and trashed = false"
-        while True:
-            response = (
-                self.service.files()
-                .list(
-                    supportsAllDrives=True,
-                    includeItemsFromAllDrives=True,
-                    q=q,
-                    spaces="drive",
-                    pageSize=200,
-                    fields="nextPageToken, files(id, name, mimeType, size, shortcutDetails)",
-                    orderBy="folder, name",
-                    pageToken=page_token,
-                )
-                .execute()
+        response = (
+            self.service.files()
+            .list(
+                supportsAllDrives=True,
+                includeItemsFromAllDrives=True,
+                q=q,
+                spaces="drive",
+                pageSize=200,
+                fields="nextPageToken, files(id, name, mimeType, size, shortcutDetails)",
+                orderBy="folder, name",
+                pageToken=page_token,
             )
-            files.extend(response.get("files", []))
-            page_token = response.get("nextPageToken")
+            .execute()
+        )
+        return response.get("files", []), response.get("nextPageToken")
+
+    def get_files_by_folder_id(self, folder_id, item_type=""):
+        page_token = None
+        files = []
+        while True:
+            page, page_token = self.get_files_page(folder_id, item_type, page_token)
+            files.extend(page)
             if page_token is None:
                 break
         return files
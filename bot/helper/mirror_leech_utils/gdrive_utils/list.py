@@ -8,9 +8,11 @@ from pyrogram.handlers import CallbackQueryHandler
 from tenacity import RetryError
 from time import time
 
+from .... import bot_loop
 from ....core.config_manager import Config
-from ...ext_utils.bot_utils import update_user_ldata, new_task
+from ...ext_utils.bot_utils import update_user_ldata, new_task, sync_to_async
 from ...ext_utils.db_handler import database
+from ...ext_utils.listing_cache import listing_cache
 from ...ext_utils.status_utils import get_readable_file_size, get_readable_time
 from ...mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
 from ...telegram_helper.button_build import ButtonMaker
@@ -79,6 +81,8 @@ async def id_updates(_, query, obj):
     elif data[1] == "itype":
         obj.item_type = data[2]
         await obj.get_items()
+    elif data[1] == "refresh":
+        await obj.get_items(refresh=True)
     elif data[1] == "cur":
         await delete_message(message)
         obj.event.set()
@@ -131,6 +135,7 @@ class GoogleDriveList(GoogleDriveHelper):
         self.parents = []
         self.list_status = ""
         self.items_list = []
+        self._listing = None
         self.iter_start = 0
         self.page_step = 1
         super().__init__()
@@ -202,6 +207,7 @@ class GoogleDriveList(GoogleDriveHelper):
             buttons.data_button("Back", "gdq back pa", position="footer")
         if len(self.parents) > 1:
             buttons.data_button("Back To Root", "gdq root", position="footer")
+        buttons.data_button("Refresh", "gdq refresh", position="footer")
         buttons.data_button("Cancel", "gdq cancel", position="footer")
         button = buttons.build_menu(f_cols=2)
         msg = "Choose Path:" + (
@@ -215,6 +221,8 @@ class GoogleDriveList(GoogleDriveHelper):
             )
             msg += f"\nDefault Gdrive ID: {default_id}" if default_id else ""
         msg += f"\n\nItems: {items_no}"
+        if self._listing is not None and not self._listing.done:
+            msg += "+ (listing...)"
         if items_no > LIST_LIMIT:
             msg += f" | Page: {int(page)}/{pages} | Page Step: {self.page_step}"
         msg += f"\n\nItem Type: {self.item_type}\nToken Path: {self.token_path}"
@@ -223,28 +231,75 @@ class GoogleDriveList(GoogleDriveHelper):
         msg += f"\nTimeout: {get_readable_time(self._timeout - (time() - self._time))}"
         await self._send_list_message(msg, button)
 
-    async def get_items(self, itype=""):
+    async def _list_items(self, folder_id, item_type, listing):
+        page_token = None
+        worker = None
+        while True:
+            try:
+                # the menu can move on while this streams, don't share its service
+                if worker is None:
+                    worker = await sync_to_async(self.new_worker)
+                files, page_token = await sync_to_async(
+                    worker.get_files_page, folder_id, item_type, page_token
+                )
+            except Exception as err:
+                if isinstance(err, RetryError):
+                    LOGGER.info(f"Total Attempts: {err.last_attempt.attempt_number}")
+                    err = err.last_attempt.exception()
+                listing.finish(err)
+                return
+            listing.extend(files)
+            if page_token is None:
+                break
+        listing.finish()
+
+    async def _update_when_listed(self, listing):
+        await listing.wait()
+        if (
+            self._listing is listing
+            and not self.event.is_set()
+            and not self.listener.is_cancelled
+        ):
+            # a user paging through the streamed list keeps arrival order
+            if self.iter_start == 0:
+                self.items_list = natsorted(listing.items)
+            await self.get_items_buttons()
+
+    async def get_items(self, itype="", refresh=False):
         if self.list_status == "gdu":
             self.item_type = "folders"
         elif itype:
             self.item_type = itype
-        try:
-            files = self.get_files_by_folder_id(self.id, self.item_type)
-            if self.listener.is_cancelled:
-                return
-        except Exception as err:
-            if isinstance(err, RetryError):
-                LOGGER.info(f"Total Attempts: {err.last_attempt.attempt_number}")
-                err = err.last_attempt.exception()
-            self.id = str(err).replace(">", "").replace("<", "")
+        key = ("gd", self.token_path, self.id, self.item_type)
+        if refresh:
+            listing_cache.invalidate(key)
+        listing = listing_cache.get(
+            key, partial(self._list_items, self.id, self.item_type)
+        )
+        await listing.wait(LIST_LIMIT)
+        if self.listener.is_cancelled:
+            return
+        if listing.error is not None and not listing.items:
+            self.id = str(listing.error).replace(">", "").replace("<", "")
             self.event.set()
             return
-        if len(files) == 0 and itype != self.item_type and self.list_status == "gdd":
+        if (
+            listing.done
+            and len(listing.items) == 0
+            and itype != self.item_type
+            and self.list_status == "gdd"
+        ):
             itype = "folders" if self.item_type == "files" else "files"
             self.item_type = itype
             await self.get_items(itype)
         else:
-            self.items_list = natsorted(files)
+            self._listing = listing
+            if listing.done:
+                self.items_list = natsorted(listing.items)
+            else:
+                # keep arrival order while streaming so button indexes stay valid
+                self.items_list = listing.items
+                bot_loop.create_task(self._update_when_listed(listing))
             self.iter_start = 0
             await self.get_items_buttons()
 
@@ -1,11 +1,18 @@
+from concurrent.futures import wait
+from functools import partial
 from logging import getLogger
+from threading import local
 
 from .... import drives_names, drives_ids, index_urls, user_data
+from ....core.config_manager import Config
+from ....helper.ext_utils.bot_utils import THREAD_POOLS
 from ....helper.ext_utils.status_utils import get_readable_file_size
 from ....helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
 
 LOGGER = getLogger(__name__)
 
+search_local = local()
+
 
 class GoogleDriveSearch(GoogleDriveHelper):
 
@@ -16,8 +23,19 @@ class GoogleDriveSearch(GoogleDriveHelper):
         self._is_recursive = is_recursive
         self._item_type = item_type
 
+    def get_worker(self):
+        # search threads outlive every search, building and authorizing a service
+        # per query was most of its cost, so each thread keeps one per account
+        if (workers := getattr(search_local, "workers", None)) is None:
+            workers = search_local.workers = {}
+        key = (self.use_sa, self.token_path)
+        if (worker := workers.get(key)) is None:
+            worker = workers[key] = self.new_worker()
+        return worker
+
     def _drive_query(self, dir_id, file_name, is_recursive):
         try:
+            drive = self.get_worker()
             if is_recursive:
                 if self._stop_dup:
                     query = f"name = '{file_name}' and "
@@ -35,7 +53,7 @@ class GoogleDriveSearch(GoogleDriveHelper):
                 query += "trashed = false"
                 if dir_id == "root":
                     return (
-                        self.service.files()
+                        drive.service.files()
                         .list(
                             q=f"{query} and 'me' in owners",
                             pageSize=200,
@@ -47,7 +65,7 @@ class GoogleDriveSearch(GoogleDriveHelper):
                     )
                 else:
                     return (
-                        self.service.files()
+                        drive.service.files()
                         .list(
                             supportsAllDrives=True,
                             includeItemsFromAllDrives=True,
@@ -76,7 +94,7 @@ class GoogleDriveSearch(GoogleDriveHelper):
                         query += f"mimeType = '{self.G_DRIVE_DIR_MIME_TYPE}' and "
                 query += "trashed = false"
                 return (
-                    self.service.files()
+                    drive.service.files()
                     .list(
                         supportsAllDrives=True,
                         includeItemsFromAllDrives=True,
@@ -119,13 +137,16 @@ class GoogleDriveSearch(GoogleDriveHelper):
         ):
             self.use_sa = False
 
-        self.service = self.authorize()
+        drives = list(drives)
+        if self._no_multi:
+            drives = drives[:1]
+        responses = self._query_drives(drives, file_name)
+        timed_out = []
 
-        for drive_name, dir_id, index_url in drives:
-            isRecur = (
-                False if self._is_recursive and len(dir_id) > 23 else self._is_recursive
-            )
-            response = self._drive_query(dir_id, file_name, isRecur)
+        for (drive_name, dir_id, index_url), response in zip(drives, responses):
+            if response is None:
+                timed_out.append(drive_name)
+                continue
             if not response["files"]:
                 if self._no_multi:
                     break
@@ -169,11 +190,45 @@ class GoogleDriveSearch(GoogleDriveHelper):
             if self._no_multi:
                 break
 
+        # only worth a note next to real results, an empty list must stay empty
+        if contents_no and timed_out:
+            msg += f"<i>Search timed out for: {', '.join(timed_out)}</i><br>"
         if msg != "":
             telegraph_content.append(msg)
 
         return telegraph_content, contents_no
 
+    def _query_drives(self, drives, file_name):
+        """query all drives at once, None for the ones that didn't answer in time"""
+        if not drives:
+            return []
+        pool = THREAD_POOLS["search"]
+        futures = []
+        for _, dir_id, _ in drives:
+            is_recursive = (
+                False if self._is_recursive and len(dir_id) > 23 else self._is_recursive
+            )
+            futures.append(
+                pool.submit(
+                    partial(self._drive_query, dir_id, file_name, is_recursive)
+                )
+            )
+        wait(futures, timeout=Config.GDRIVE_SEARCH_TIMEOUT or None)
+        # slow drives keep their thread until the api call returns, don't wait for it
+        for future in futures:
+            future.cancel()
+        responses = []
+        for (drive_name, _, _), future in zip(drives, futures):
+            if not future.done() or future.cancelled():
+                LOGGER.warning(f"Drive search timed out for: {drive_name}")
+                responses.append(None)
+            elif err := future.exception():
+                LOGGER.error(f"Drive search failed for {drive_name}: {err}")
+                responses.append({"files": []})
+            else:
+                responses.append(future.result())
+        return responses
+
     def get_user_drive(self, target_id, user_id):
         dest_id = target_id.replace("mtp:", "", 1)
         self.token_path = f"tokens/{user_id}.pickle"
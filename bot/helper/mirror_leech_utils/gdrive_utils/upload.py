@@ -1,7 +1,8 @@
+from concurrent.futures import as_completed
 from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
 from logging import getLogger
-from os import path as ospath, listdir, remove
+from os import path as ospath, remove, walk
 from tenacity import (
     retry,
     wait_exponential,
@@ -9,9 +10,10 @@ from tenacity import (
     retry_if_exception_type,
     RetryError,
 )
+from threading import Lock
 
 from ....core.config_manager import Config
-from ...ext_utils.bot_utils import async_to_sync, SetInterval
+from ...ext_utils.bot_utils import async_to_sync, SetInterval, TaskPool
 from ...ext_utils.files_utils import get_mime_type
 from ...mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
 
@@ -24,9 +26,18 @@ class GoogleDriveUpload(GoogleDriveHelper):
         self._updater = None
         self._path = path
         self._is_errored = False
+        self._lock = Lock()
         super().__init__()
         self.is_uploading = True
 
+    async def progress(self):
+        # each worker only writes its own counters, summing them needs no lock
+        self.proc_bytes = sum(
+            worker.proc_bytes + worker.file_processed_bytes
+            for worker in list(self.workers)
+        )
+        self.total_time += self.update_interval
+
     def user_setting(self):
         if self.listener.up_dest.startswith("mtp:"):
             self.token_path = f"tokens/{self.listener.user_id}.pickle"
@@ -57,6 +68,7 @@ class GoogleDriveUpload(GoogleDriveHelper):
                     mime_type,
                     self.listener.up_dest,
                     in_dir=False,
+                    drive=self.get_worker(),
                 )
                 if self.listener.is_cancelled:
                     return
@@ -81,7 +93,7 @@ class GoogleDriveUpload(GoogleDriveHelper):
                 LOGGER.info(f"Total Attempts: {err.last_attempt.attempt_number}")
                 err = err.last_attempt.exception()
             err = str(err).replace(">", "").replace("<", "")
-            async_to_sync(self.listener.on_upload_error, err)
+            async_to_sync(self.listener.on_upload_error, err, wait=False)
             self._is_errored = True
         finally:
             self._updater.cancel()
@@ -101,31 +113,50 @@ class GoogleDriveUpload(GoogleDriveHelper):
                 self.total_folders,
                 mime_type,
                 dir_id=self.get_id_from_url(link),
+                wait=False,
             )
 
+    def _upload_worker(self, file_path, dest_id):
+        if self.listener.is_cancelled:
+            return
+        mime_type = get_mime_type(file_path)
+        file_name = ospath.basename(file_path)
+        self._upload_file(
+            file_path, file_name, mime_type, dest_id, drive=self.get_worker()
+        )
+        with self._lock:
+            self.total_files += 1
+
     def _upload_dir(self, input_directory, dest_id):
-        list_dirs = listdir(input_directory)
-        if len(list_dirs) == 0:
-            return dest_id
-        new_id = None
-        for item in list_dirs:
-            current_file_name = ospath.join(input_directory, item)
-            if ospath.isdir(current_file_name):
-                current_dir_id = self.create_directory(item, dest_id)
-                new_id = self._upload_dir(current_file_name, current_dir_id)
-                self.total_folders += 1
-            elif not item.lower().endswith(tuple(self.listener.extension_filter)):
-                mime_type = get_mime_type(current_file_name)
-                file_name = current_file_name.split("/")[-1]
-                self._upload_file(current_file_name, file_name, mime_type, dest_id)
-                self.total_files += 1
-                new_id = dest_id
-            else:
-                remove(current_file_name)
-                new_id = "filter"
+        # create the whole folder skeleton first, then upload files in parallel
+        dir_ids = {input_directory: dest_id}
+        uploads = []
+        for dirpath, dirnames, filenames in walk(input_directory):
             if self.listener.is_cancelled:
-                break
-        return new_id
+                return None
+            parent_id = dir_ids[dirpath]
+            for dirname in dirnames:
+                dir_ids[ospath.join(dirpath, dirname)] = self.create_directory(
+                    dirname, parent_id
+                )
+                self.total_folders += 1
+            for filename in filenames:
+                file_path = ospath.join(dirpath, filename)
+                if filename.lower().endswith(tuple(self.listener.extension_filter)):
+                    remove(file_path)
+                else:
+                    uploads.append((file_path, parent_id))
+        with TaskPool(Config.GDRIVE_WORKERS or 1) as pool:
+            futures = [pool.submit(self._upload_worker, *upload) for upload in uploads]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except:
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+        if self.listener.is_cancelled:
+            return None
+        return dest_id
 
     @retry(
         wait=wait_exponential(multiplier=2, min=3, max=6),
@@ -133,8 +164,9 @@ class GoogleDriveUpload(GoogleDriveHelper):
         retry=(retry_if_exception_type(Exception)),
     )
     def _upload_file(
-        self, file_path, file_name, mime_type, dest_id, in_dir=True
+        self, file_path, file_name, mime_type, dest_id, in_dir=True, drive=None
     ):
+        drive = drive or self
         # File body description
         file_metadata = {
             "name": file_name,
@@ -144,20 +176,21 @@ class GoogleDriveUpload(GoogleDriveHelper):
         if dest_id is not None:
             file_metadata["parents"] = [dest_id]
 
-        if ospath.getsize(file_path) == 0:
+        file_size = ospath.getsize(file_path)
+        if file_size == 0:
             media_body = MediaFileUpload(file_path, mimetype=mime_type, resumable=False)
             response = (
-                self.service.files()
+                drive.service.files()
                 .create(
                     body=file_metadata, media_body=media_body, supportsAllDrives=True
                 )
                 .execute()
             )
             if not Config.IS_TEAM_DRIVE:
-                self.set_permission(response["id"])
+                drive.set_permission(response["id"])
 
             drive_file = (
-                self.service.files()
+                drive.service.files()
                 .get(fileId=response["id"], supportsAllDrives=True)
                 .execute()
             )
@@ -167,14 +200,16 @@ class GoogleDriveUpload(GoogleDriveHelper):
         )
 
         # Insert a file
-        drive_file = self.service.files().create(
+        drive_file = drive.service.files().create(
             body=file_metadata, media_body=media_body, supportsAllDrives=True
         )
         response = None
         retries = 0
         while response is None and not self.listener.is_cancelled:
             try:
-                self.status, response = drive_file.next_chunk()
+                drive.status, response = drive_file.next_chunk()
+                if drive.status is not None:
+                    drive.file_processed_bytes = drive.status.resumable_progress
             except HttpError as err:
                 if err.resp.status in [500, 502, 503, 504, 429] and retries < 10:
                     retries += 1
@@ -188,16 +223,16 @@ class GoogleDriveUpload(GoogleDriveHelper):
                         "dailyLimitExceeded",
                     ]:
                         raise err
-                    if self.use_sa:
-                        if self.sa_count >= self.sa_number:
+                    if drive.use_sa:
+                        if drive.sa_count >= drive.sa_number:
                             LOGGER.info(
-                                f"Reached maximum number of service accounts switching, which is {self.sa_count}"
+                                f"Reached maximum number of service accounts switching, which is {drive.sa_count}"
                             )
                             raise err
                         else:
                             if self.listener.is_cancelled:
                                 return
-                            self.switch_service_account()
+                            drive.switch_service_account()
                             LOGGER.info(f"Got: {reason}, Trying Again.")
                             return self._upload_file(
                                 file_path,
@@ -205,6 +240,7 @@ class GoogleDriveUpload(GoogleDriveHelper):
                                 mime_type,
                                 dest_id,
                                 in_dir,
+                                drive,
                             )
                     else:
                         LOGGER.error(f"Got: {reason}")
@@ -215,14 +251,15 @@ class GoogleDriveUpload(GoogleDriveHelper):
             remove(file_path)
         except:
             pass
-        self.file_processed_bytes = 0
+        drive.proc_bytes += file_size
+        drive.file_processed_bytes = 0
         # Insert new permissions
         if not Config.IS_TEAM_DRIVE:
-            self.set_permission(response["id"])
+            drive.set_permission(response["id"])
         # Define file instance and get url for download
         if not in_dir:
             drive_file = (
-                self.service.files()
+                drive.service.files()
                 .get(fileId=response["id"], supportsAllDrives=True)
                 .execute()
             )
@@ -1,6 +1,7 @@
 from aiofiles import open as aiopen
 from aiofiles.os import path as aiopath
-from asyncio import wait_for, Event, gather
+from asyncio import wait_for, Event, gather, create_subprocess_exec
+from asyncio.subprocess import PIPE
 from configparser import RawConfigParser
 from functools import partial
 from json import loads
@@ -8,10 +9,11 @@ from pyrogram.filters import regex, user
 from pyrogram.handlers import CallbackQueryHandler
 from time import time
 
-from .... import LOGGER
+from .... import LOGGER, bot_loop
 from ....core.config_manager import Config
-from ...ext_utils.bot_utils import cmd_exec, update_user_ldata, new_task
+from ...ext_utils.bot_utils import update_user_ldata, new_task
 from ...ext_utils.db_handler import database
+from ...ext_utils.listing_cache import listing_cache
 from ...ext_utils.status_utils import get_readable_file_size, get_readable_time
 from ...telegram_helper.button_build import ButtonMaker
 from ...telegram_helper.message_utils import (
@@ -19,6 +21,7 @@ from ...telegram_helper.message_utils import (
     edit_message,
     delete_message,
 )
+from .rc import rclone_rc
 
 LIST_LIMIT = 6
 
@@ -101,6 +104,8 @@ async def path_updates(_, query, obj):
     elif data[1] == "root":
         obj.path = ""
         await obj.get_path()
+    elif data[1] == "refresh":
+        await obj.get_path(refresh=True)
     elif data[1] == "itype":
         obj.item_type = data[2]
         await obj.get_path()
@@ -149,6 +154,7 @@ class RcloneList:
         self.path = ""
         self.list_status = ""
         self.path_list = []
+        self._listing = None
         self.iter_start = 0
         self.page_step = 1
         self.select = False
@@ -234,6 +240,7 @@ class RcloneList:
             buttons.data_button("Back", "rcq back pa", position="footer")
         if self.path:
             buttons.data_button("Back To Root", "rcq root", position="footer")
+        buttons.data_button("Refresh", "rcq refresh", position="footer")
         buttons.data_button("Cancel", "rcq cancel", position="footer")
         button = buttons.build_menu(f_cols=2)
         msg = "Choose Path:" + (
@@ -245,6 +252,8 @@ class RcloneList:
             default_path = Config.RCLONE_PATH
             msg += f"\nDefault Rclone Path: {default_path}" if default_path else ""
         msg += f"\n\nItems: {items_no}"
+        if self._listing is not None and not self._listing.done:
+            msg += "+ (listing...)"
         if items_no > LIST_LIMIT:
             msg += f" | Page: {int(page)}/{pages} | Page Step: {self.page_step}"
         msg += f"\n\nItem Type: {self.item_type}\nConfig Path: {self.config_path}"
@@ -252,16 +261,31 @@ class RcloneList:
         msg += f"\nTimeout: {get_readable_time(self._timeout - (time() - self._time))}"
         await self._send_list_message(msg, button)
 
-    async def get_path(self, itype=""):
-        if self.list_status == "rcu":
-            self.item_type = "--dirs-only"
-        elif itype:
-            self.item_type = itype
+    async def _list_path(self, listing):
+        if rclone_rc.usable():
+            try:
+                res = await rclone_rc.call(
+                    self.config_path,
+                    "operations/list",
+                    fs=self.remote,
+                    remote=self.path.strip("/"),
+                    opt={
+                        "noModTime": True,
+                        "noMimeType": True,
+                        "dirsOnly": self.item_type == "--dirs-only",
+                        "filesOnly": self.item_type == "--files-only",
+                    },
+                )
+            except Exception as e:
+                listing.finish(str(e))
+                return
+            listing.extend(res["list"])
+            listing.finish()
+            return
         cmd = [
             "rclone",
             "lsjson",
             self.item_type,
-            "--fast-list",
             "--no-mimetype",
             "--no-modtime",
             "--config",
@@ -272,36 +296,78 @@ class RcloneList:
             "--log-file",
             "rlog.txt",
         ]
-        if self.listener.is_cancelled:
-            return
-        res, err, code = await cmd_exec(cmd)
+        # lsjson prints one item per line, hand them over a page at a time
+        proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
+        batch = []
+        async for line in proc.stdout:
+            line = line.decode().strip().rstrip(",")
+            if line in ["", "[", "]"]:
+                continue
+            batch.append(loads(line))
+            if len(batch) == LIST_LIMIT:
+                listing.extend(batch)
+                batch = []
+        listing.extend(batch)
+        stderr = (await proc.stderr.read()).decode().strip()
+        code = await proc.wait()
         if code in [0, -9]:
-            result = loads(res)
-            if (
-                len(result) == 0
-                and itype != self.item_type
-                and self.list_status == "rcd"
-            ):
-                itype = (
-                    "--dirs-only"
-                    if self.item_type == "--files-only"
-                    else "--files-only"
-                )
-                self.item_type = itype
-                await self.get_path(itype)
-            else:
-                self.path_list = sorted(result, key=lambda x: x["Path"])
-                self.iter_start = 0
-                await self.get_path_buttons()
+            listing.finish()
         else:
-            if not err:
-                err = "Use <code>/shell cat rlog.txt</code> to see more information"
+            listing.finish(
+                stderr or "Use <code>/shell cat rlog.txt</code> to see more information"
+            )
+
+    async def _update_when_listed(self, listing):
+        await listing.wait()
+        if (
+            self._listing is listing
+            and not self.event.is_set()
+            and not self.listener.is_cancelled
+        ):
+            # a user paging through the streamed list keeps arrival order
+            if self.iter_start == 0:
+                self.path_list = sorted(listing.items, key=lambda x: x["Path"])
+            await self.get_path_buttons()
+
+    async def get_path(self, itype="", refresh=False):
+        if self.list_status == "rcu":
+            self.item_type = "--dirs-only"
+        elif itype:
+            self.item_type = itype
+        if self.listener.is_cancelled:
+            return
+        key = ("rc", self.config_path, self.remote, self.path, self.item_type)
+        if refresh:
+            listing_cache.invalidate(key)
+        listing = listing_cache.get(key, self._list_path)
+        await listing.wait(LIST_LIMIT)
+        if listing.error is not None and not listing.items:
+            err = str(listing.error)
             LOGGER.error(
                 f"While rclone listing. Path: {self.remote}{self.path}. Stderr: {err}"
             )
             self.remote = err[:4000]
             self.path = ""
             self.event.set()
+        elif (
+            listing.done
+            and len(listing.items) == 0
+            and itype != self.item_type
+            and self.list_status == "rcd"
+        ):
+            itype = "--dirs-only" if self.item_type == "--files-only" else "--files-only"
+            self.item_type = itype
+            await self.get_path(itype)
+        else:
+            self._listing = listing
+            if listing.done:
+                self.path_list = sorted(listing.items, key=lambda x: x["Path"])
+            else:
+                # keep arrival order while streaming so button indexes stay valid
+                self.path_list = listing.items
+                bot_loop.create_task(self._update_when_listed(listing))
+            self.iter_start = 0
+            await self.get_path_buttons()
 
     async def list_remotes(self):
         config = RawConfigParser()
@@ -0,0 +1,204 @@
+from asyncio import Lock, create_subprocess_exec, sleep
+from httpx import AsyncClient, BasicAuth, HTTPError
+from os import environ
+from secrets import token_urlsafe
+from socket import socket
+from time import time
+
+from .... import LOGGER
+from ....core.config_manager import Config
+
+RCD_IDLE_TIMEOUT = 600
+
+
+class RcloneRcError(Exception):
+    pass
+
+
+def _free_port():
+    with socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class RcloneDaemon:
+    def __init__(self, config_path):
+        self.config_path = config_path
+        self._proc = None
+        self._client = None
+        self._url = ""
+        self.jobs = 0
+        self.retired = False
+        self.last_used = time()
+
+    @property
+    def is_alive(self):
+        return self._proc is not None and self._proc.returncode is None
+
+    async def start(self):
+        port = _free_port()
+        user, password = token_urlsafe(8), token_urlsafe(16)
+        cmd = [
+            "rclone",
+            "rcd",
+            "--rc-addr",
+            f"127.0.0.1:{port}",
+            "--config",
+            self.config_path,
+            "--fast-list",
+            "-L",
+            "-M",
+            "--retries-sleep",
+            "3s",
+            "--low-level-retries",
+            "1",
+            "--drive-acknowledge-abuse",
+            "--drive-chunk-size",
+            "128M",
+            "--drive-upload-cutoff",
+            "128M",
+            "-v",
+            "--log-systemd",
+            "--log-file",
+            "rlog.txt",
+        ]
+        # credentials on the command line would show up in ps for every local user
+        self._proc = await create_subprocess_exec(
+            *cmd, env={**environ, "RCLONE_RC_USER": user, "RCLONE_RC_PASS": password}
+        )
+        self._url = f"http://127.0.0.1:{port}"
+        self._client = AsyncClient(auth=BasicAuth(user, password), timeout=None)
+        for _ in range(50):
+            if not self.is_alive:
+                break
+            try:
+                await self.call("rc/noop")
+                LOGGER.info(f"rclone rcd started for {self.config_path}")
+                return
+            except (HTTPError, RcloneRcError):
+                await sleep(0.2)
+        await self.stop()
+        raise RcloneRcError(f"Unable to start rclone rcd for {self.config_path}")
+
+    async def call(self, command, **params):
+        self.last_used = time()
+        res = await self._client.post(f"{self._url}/{command}", json=params)
+        if res.status_code != 200:
+            # auth failures and proxies answer with plain text, not rclone's json
+            try:
+                error = res.json().get("error")
+            except:
+                error = ""
+            raise RcloneRcError(error or res.text)
+        return res.json()
+
+    async def stop(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self.is_alive:
+            try:
+                self._proc.kill()
+                await self._proc.wait()
+            except:
+                pass
+        self._proc = None
+
+
+class RcloneRc:
+    """long-lived rclone rcd daemons, one per config file"""
+
+    def __init__(self):
+        self._daemons = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def usable(rc_flags=""):
+        # free-form rclone flags can't be mapped to rc options, keep the subprocess
+        return Config.RCLONE_RCD and not rc_flags and not Config.RCLONE_FLAGS
+
+    async def get(self, config_path):
+        async with self._lock:
+            for path, daemon in list(self._daemons.items()):
+                if (
+                    path != config_path
+                    and not daemon.jobs
+                    and time() - daemon.last_used > RCD_IDLE_TIMEOUT
+                ):
+                    del self._daemons[path]
+                    await daemon.stop()
+            daemon = self._daemons.get(config_path)
+            if daemon is None or not daemon.is_alive:
+                daemon = RcloneDaemon(config_path)
+                await daemon.start()
+                self._daemons[config_path] = daemon
+            return daemon
+
+    async def clear_cache(self, config_path):
+        if (daemon := self._daemons.get(config_path)) and daemon.is_alive:
+            try:
+                await daemon.call("fscache/clear")
+            except Exception as e:
+                LOGGER.error(f"While clearing rclone rcd cache: {e}")
+
+    async def reset(self):
+        async with self._lock:
+            daemons = list(self._daemons.values())
+            self._daemons.clear()
+        # busy daemons finish their jobs first, the last one out stops them
+        for daemon in daemons:
+            daemon.retired = True
+            if not daemon.jobs:
+                await daemon.stop()
+
+    async def _release(self, daemon):
+        daemon.jobs -= 1
+        if daemon.retired and not daemon.jobs:
+            await daemon.stop()
+
+    async def run_job(self, config_path, command, on_stats=None, **params):
+        daemon = await self.get(config_path)
+        daemon.jobs += 1
+        try:
+            jobid = (await daemon.call(command, _async=True, **params))["jobid"]
+            group = f"job/{jobid}"
+            job = RcloneJob(daemon, jobid)
+            if on_stats is not None:
+                on_stats(job, None)
+            while True:
+                status = await daemon.call("job/status", jobid=jobid)
+                if on_stats is not None:
+                    on_stats(job, await daemon.call("core/stats", group=group))
+                if status["finished"]:
+                    break
+                await sleep(1)
+            try:
+                await daemon.call("core/stats-delete", group=group)
+            except RcloneRcError:
+                pass
+            return status["success"], status["error"]
+        finally:
+            await self._release(daemon)
+
+    async def call(self, config_path, command, **params):
+        daemon = await self.get(config_path)
+        daemon.jobs += 1
+        try:
+            return await daemon.call(command, **params)
+        finally:
+            await self._release(daemon)
+
+
+class RcloneJob:
+    def __init__(self, daemon, jobid):
+        self._daemon = daemon
+        self.jobid = jobid
+
+    async def stop(self):
+        try:
+            await self._daemon.call("job/stop", jobid=self.jobid)
+        except Exception as e:
+            LOGGER.error(f"While stopping rclone job {self.jobid}: {e}")
+
+
+rclone_rc = RcloneRc()
@@ -14,9 +14,19 @@ from ...ext_utils.files_utils import (
     get_mime_type,
     count_files_and_folders,
 )
+from ...ext_utils.status_utils import get_readable_file_size, get_readable_time
+from .rc import rclone_rc
 
 LOGGER = getLogger(__name__)
 
+# per-call rclone flags and the rc _config keys they map to
+RC_CONFIG_FLAGS = {
+    "--transfers": ("Transfers", int),
+    "--tpslimit": ("TPSLimit", float),
+    "--retries-sleep": ("RetriesInterval", str),
+    "--low-level-retries": ("LowLevelRetries", int),
+}
+
 
 class RcloneTransferHelper:
     def __init__(self, listener):
@@ -34,6 +44,8 @@ class RcloneTransferHelper:
         self._sa_number = 0
         self._use_service_accounts = Config.USE_SERVICE_ACCOUNTS
         self._rclone_select = False
+        self._use_rcd = rclone_rc.usable(listener.rc_flags)
+        self._rc_job = None
 
     @property
     def transferred_size(self):
@@ -81,6 +93,148 @@ class RcloneTransferHelper:
                 ) = data[0]
             await sleep(0.05)
 
+    def _on_rc_stats(self, job, stats):
+        self._rc_job = job
+        if not stats:
+            return
+        done = stats.get("bytes", 0)
+        total = stats.get("totalBytes", 0)
+        self._transferred_size = get_readable_file_size(done)
+        self._size = get_readable_file_size(total)
+        self._percentage = f"{round(done / total * 100)}%" if total else "0%"
+        self._speed = f"{get_readable_file_size(stats.get('speed', 0))}/s"
+        self._eta = get_readable_time(stats["eta"]) if stats.get("eta") else "-"
+
+    @staticmethod
+    def _split_remote(path):
+        if path.startswith("/"):
+            parent, _, name = path.rstrip("/").rpartition("/")
+            return parent or "/", name
+        remote, _, rpath = path.partition(":")
+        parent, _, name = rpath.rstrip("/").rpartition("/")
+        return f"{remote}:{parent}", name
+
+    async def _rc_transfer(self, cmd, method, config_path, source, destination):
+        _filter = {"IgnoreCase": True}
+        if self._rclone_select:
+            _filter["FilesFrom"] = [self._listener.link]
+        else:
+            _filter["ExcludeRule"] = [cmd[cmd.index("--exclude") + 1]]
+        _config = {}
+        # later flags win, like they do on the rclone command line
+        for index, flag in enumerate(cmd[:-1]):
+            if flag in RC_CONFIG_FLAGS:
+                key, convert = RC_CONFIG_FLAGS[flag]
+                _config[key] = convert(cmd[index + 1])
+        try:
+            if source.startswith("/"):
+                is_dir = await aiopath.isdir(source)
+            elif source.endswith(":"):
+                is_dir = True
+            else:
+                remote, rpath = source.split(":", 1)
+                item = (
+                    await rclone_rc.call(
+                        config_path, "operations/stat", fs=f"{remote}:", remote=rpath
+                    )
+                )["item"]
+                is_dir = item is None or item["IsDir"]
+            if is_dir:
+                command = f"sync/{method}"
+                params = {
+                    "srcFs": source,
+                    "dstFs": destination,
+                    "createEmptySrcDirs": True,
+                }
+            else:
+                src_fs, name = self._split_remote(source)
+                command = f"operations/{method}file"
+                params = {
+                    "srcFs": src_fs,
+                    "srcRemote": name,
+                    "dstFs": destination,
+                    "dstRemote": name,
+                }
+            success, error = await rclone_rc.run_job(
+                config_path,
+                command,
+                on_stats=self._on_rc_stats,
+                _filter=_filter,
+                _config=_config,
+                **params,
+            )
+        except Exception as e:
+            return 1, str(e)
+        finally:
+            self._rc_job = None
+        if self._listener.is_cancelled:
+            return -9, ""
+        return (0, "") if success else (1, error)
+
+    async def _transfer(self, cmd, method, config_path, source, destination):
+        if self._use_rcd:
+            return await self._rc_transfer(
+                cmd, method, config_path, source, destination
+            )
+        self._proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
+        await self._progress()
+        _, stderr = await self._proc.communicate()
+        return self._proc.returncode, stderr.decode().strip()
+
+    async def _lsjson(self, config_path, path):
+        if not self._use_rcd:
+            cmd = [
+                "rclone",
+                "lsjson",
+                "--fast-list",
+                "--no-mimetype",
+                "--no-modtime",
+                "--config",
+                config_path,
+                path,
+                "-v",
+                "--log-systemd",
+                "--log-file",
+                "rlog.txt",
+            ]
+            res, err, code = await cmd_exec(cmd)
+            return (loads(res) if code == 0 else None), err, code
+        remote, rpath = path.split(":", 1)
+        try:
+            res = await rclone_rc.call(
+                config_path,
+                "operations/list",
+                fs=f"{remote}:",
+                remote=rpath,
+                opt={"noModTime": True, "noMimeType": True},
+            )
+        except Exception as e:
+            return None, str(e), 1
+        return res["list"], "", 0
+
+    async def _public_link(self, config_path, path):
+        if not self._use_rcd:
+            cmd = [
+                "rclone",
+                "link",
+                "--config",
+                config_path,
+                path,
+                "-v",
+                "--log-systemd",
+                "--log-file",
+                "rlog.txt",
+            ]
+            return await cmd_exec(cmd)
+        remote, rpath = path.split(":", 1)
+        try:
+            res = await rclone_rc.call(
+                config_path, "operations/publiclink", fs=f"{remote}:", remote=rpath
+            )
+        except Exception as e:
+            return "", str(e), 1
+        return res["url"], "", 0
+
     def _switch_service_account(self):
         if self._sa_index == self._sa_number - 1:
             self._sa_index = 0
@@ -116,11 +270,10 @@ class RcloneTransferHelper:
             await f.write(text)
         return sa_conf_file
 
-    async def _start_download(self, cmd, remote_type):
-        self._proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-        await self._progress()
-        _, stderr = await self._proc.communicate()
-        return_code = self._proc.returncode
+    async def _start_download(self, cmd, remote_type, config_path, source, destination):
+        return_code, stderr = await self._transfer(
+            cmd, "copy", config_path, source, destination
+        )
         if self._listener.is_cancelled:
             return
 
@@ -128,7 +281,7 @@ class RcloneTransferHelper:
             await self._listener.on_download_complete()
         elif return_code != -9:
             error = (
-                stderr.decode().strip()
+                stderr
                 or "Use <code>/shell cat rlog.txt</code> to see more information"
             )
             if not error and remote_type == "drive" and self._use_service_accounts:
@@ -145,10 +298,13 @@ class RcloneTransferHelper:
             ):
                 if self._sa_count < self._sa_number:
                     remote = self._switch_service_account()
-                    cmd[6] = f"{remote}:{cmd[6].split(':', 1)[1]}"
+                    source = f"{remote}:{source.split(':', 1)[1]}"
+                    cmd[6] = source
                     if self._listener.is_cancelled:
                         return
-                    return await self._start_download(cmd, remote_type)
+                    return await self._start_download(
+                        cmd, remote_type, config_path, source, destination
+                    )
                 else:
                     LOGGER.info(
                         f"Reached maximum number of service accounts switching, which is {self._sa_count}"
@@ -180,9 +336,8 @@ class RcloneTransferHelper:
                 remote = f"sa{self._sa_index:03}"
                 LOGGER.info(f"Download with service account {remote}")
 
-        cmd = self._get_updated_command(
-            config_path, f"{remote}:{self._listener.link}", path, "copy"
-        )
+        source = self._get_source(f"{remote}:{self._listener.link}")
+        cmd = self._get_updated_command(config_path, source, path, "copy")
 
         if (
             remote_type == "drive"
@@ -193,28 +348,13 @@ class RcloneTransferHelper:
         elif remote_type != "drive":
             cmd.extend(("--retries-sleep", "3s"))
 
-        await self._start_download(cmd, remote_type)
+        await self._start_download(cmd, remote_type, config_path, source, path)
 
     async def _get_gdrive_link(self, config_path, destination, mime_type):
         epath = destination.rsplit("/", 1)[0] if mime_type == "Folder" else destination
-        cmd = [
-            "rclone",
-            "lsjson",
-            "--fast-list",
-            "--no-mimetype",
-            "--no-modtime",
-            "--config",
-            config_path,
-            epath,
-            "-v",
-            "--log-systemd",
-            "--log-file",
-            "rlog.txt",
-        ]
-        res, err, code = await cmd_exec(cmd)
+        result, err, code = await self._lsjson(config_path, epath)
 
         if code == 0:
-            result = loads(res)
             fid = next(
                 (r["ID"] for r in result if r["Path"] == self._listener.name), "err"
             )
@@ -232,11 +372,10 @@ class RcloneTransferHelper:
             link = ""
         return link
 
-    async def _start_upload(self, cmd, remote_type):
-        self._proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-        await self._progress()
-        _, stderr = await self._proc.communicate()
-        return_code = self._proc.returncode
+    async def _start_upload(self, cmd, remote_type, config_path, source, destination):
+        return_code, stderr = await self._transfer(
+            cmd, "move", config_path, source, destination
+        )
 
         if self._listener.is_cancelled:
             return False
@@ -246,7 +385,7 @@ class RcloneTransferHelper:
             return True
         else:
             error = (
-                stderr.decode().strip()
+                stderr
                 or "Use <code>/shell cat rlog.txt</code> to see more information"
                 or (
                     "Mostly your service accounts don't have access to this drive or RATE_LIMIT_EXCEEDED"
@@ -263,11 +402,14 @@ class RcloneTransferHelper:
             ):
                 if self._sa_count < self._sa_number:
                     remote = self._switch_service_account()
-                    cmd[7] = f"{remote}:{cmd[7].split(':', 1)[1]}"
+                    destination = f"{remote}:{destination.split(':', 1)[1]}"
+                    cmd[7] = destination
                     return (
                         False
                         if self._listener.is_cancelled
-                        else await self._start_upload(cmd, remote_type)
+                        else await self._start_upload(
+                            cmd, remote_type, config_path, source, destination
+                        )
                     )
                 else:
                     LOGGER.info(
@@ -300,7 +442,7 @@ class RcloneTransferHelper:
                     "This file extension is excluded by extension filter!"
                 )
                 return
-            mime_type = await sync_to_async(get_mime_type, path)
+            mime_type = await sync_to_async(get_mime_type, path, pool="fs")
             folders = 0
             files = 1
 
@@ -328,10 +470,8 @@ class RcloneTransferHelper:
                 fremote = f"sa{self._sa_index:03}"
                 LOGGER.info(f"Upload with service account {fremote}")
 
-        method = "move"
-        cmd = self._get_updated_command(
-            fconfig_path, path, f"{fremote}:{rc_path}", method
-        )
+        fdestination = f"{fremote}:{rc_path}"
+        cmd = self._get_updated_command(fconfig_path, path, fdestination, "move")
         if (
             remote_type == "drive"
             and not Config.RCLONE_FLAGS
@@ -339,7 +479,9 @@ class RcloneTransferHelper:
         ):
             cmd.extend(("--drive-chunk-size", "128M", "--drive-upload-cutoff", "128M"))
 
-        result = await self._start_upload(cmd, remote_type)
+        result = await self._start_upload(
+            cmd, remote_type, fconfig_path, path, fdestination
+        )
         if not result:
             return
 
@@ -353,18 +495,7 @@ class RcloneTransferHelper:
         if remote_type == "drive":
             link = await self._get_gdrive_link(oconfig_path, destination, mime_type)
         else:
-            cmd = [
-                "rclone",
-                "link",
-                "--config",
-                oconfig_path,
-                destination,
-                "-v",
-                "--log-systemd",
-                "--log-file",
-                "rlog.txt",
-            ]
-            res, err, code = await cmd_exec(cmd)
+            res, err, code = await self._public_link(oconfig_path, destination)
 
             if code == 0:
                 link = res
@@ -398,19 +529,17 @@ class RcloneTransferHelper:
             dst_remote_opt["type"],
         )
 
-        cmd = self._get_updated_command(
-            config_path, f"{src_remote}:{src_path}", destination, method
-        )
+        source = self._get_source(f"{src_remote}:{src_path}")
+        cmd = self._get_updated_command(config_path, source, destination, method)
         if not self._listener.rc_flags and not Config.RCLONE_FLAGS:
             if src_remote_type == "drive" and dst_remote_type != "drive":
                 cmd.append("--drive-acknowledge-abuse")
             elif src_remote_type == "drive":
                 cmd.extend(("--tpslimit", "3", "--transfers", "3"))
 
-        self._proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-        await self._progress()
-        _, stderr = await self._proc.communicate()
-        return_code = self._proc.returncode
+        return_code, stderr = await self._transfer(
+            cmd, method, config_path, source, destination
+        )
 
         if self._listener.is_cancelled:
             return None, None
@@ -428,18 +557,7 @@ class RcloneTransferHelper:
                     (None, None) if self._listener.is_cancelled else (link, destination)
                 )
             else:
-                cmd = [
-                    "rclone",
-                    "link",
-                    "--config",
-                    config_path,
-                    destination,
-                    "-v",
-                    "--log-systemd",
-                    "--log-file",
-                    "rlog.txt",
-                ]
-                res, err, code = await cmd_exec(cmd)
+                res, err, code = await self._public_link(config_path, destination)
 
                 if self._listener.is_cancelled:
                     return None, None
@@ -456,13 +574,19 @@ class RcloneTransferHelper:
 
         else:
             error = (
-                stderr.decode().strip()
+                stderr
                 or "Use <code>/shell cat rlog.txt</code> to see more information"
             )
             LOGGER.error(error)
             await self._listener.on_upload_error(error[:4000])
             return None, None
 
+    def _get_source(self, source):
+        if source.split(":")[-1].startswith("rclone_select"):
+            self._rclone_select = True
+            return f"{source.split(":")[0]}:"
+        return source
+
     def _get_updated_command(
         self,
         config_path,
@@ -470,11 +594,6 @@ class RcloneTransferHelper:
         destination,
         method,
     ):
-        if source.split(":")[-1].startswith("rclone_select"):
-            source = f"{source.split(":")[0]}:"
-            self._rclone_select = True
-        else:
-            ext = "*.{" + ",".join(self._listener.extension_filter) + "}"
         cmd = [
             "rclone",
             method,
@@ -499,6 +618,7 @@ class RcloneTransferHelper:
         if self._rclone_select:
             cmd.extend(("--files-from", self._listener.link))
         else:
+            ext = "*.{" + ",".join(self._listener.extension_filter) + "}"
             cmd.extend(("--exclude", ext))
         if rcflags := self._listener.rc_flags or Config.RCLONE_FLAGS:
             rcflags = rcflags.split("|")
@@ -526,6 +646,8 @@ class RcloneTransferHelper:
                 self._proc.kill()
             except:
                 pass
+        if self._rc_job is not None:
+            await self._rc_job.stop()
         if self._is_download:
             LOGGER.info(f"Cancelling Download: {self._listener.name}")
             await self._listener.on_download_error("Stopped by user!")
@@ -1,15 +1,17 @@
 from time import time
 
-from .... import aria2, LOGGER
+from .... import aria2, task_dict, LOGGER
+from ...ext_utils.aria2_sync import aria2_sync
 from ...ext_utils.bot_utils import sync_to_async
 from ...ext_utils.status_utils import MirrorStatus, get_readable_time
-from aria2p import client
-from requests import exceptions
+
 
 def get_download(gid, old_info=None):
+    if (res := aria2_sync.get(gid)) is not None:
+        return res
+    # just added or outside the snapshot window, ask aria2 for this gid only
     try:
-        res = aria2.get_download(gid)
-        return res or old_info
+        return aria2.get_download(gid) or old_info
     except Exception as e:
         LOGGER.error(f"{e}: Aria2c, Error while getting torrent info")
         return old_info
@@ -26,15 +28,13 @@ class Aria2Status:
 
     def update(self):
         try:
-            if self._download is None:
-                self._download = get_download(self._gid, self._download)
-            else:
-                self._download = self._download.live
+            self._download = get_download(self._gid, self._download)
             if self._download.followed_by_ids:
                 self._gid = self._download.followed_by_ids[0]
-                self._download = get_download(self._gid)
-        except (client.ClientException, exceptions.RequestException) as e:
-            LOGGER.error(f"Failed to update aria2c download message")
+                self._download = get_download(self._gid, self._download)
+                task_dict.alias(self._gid, self)
+        except Exception as e:
+            LOGGER.error(f"{e}: Failed to update aria2c download message")
 
     def progress(self):
         return self._download.progress_string()
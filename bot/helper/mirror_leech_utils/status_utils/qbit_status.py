@@ -1,7 +1,14 @@
 from asyncio import sleep, gather
 
-from .... import LOGGER, qbittorrent_client, qb_torrents, qb_listener_lock
+from .... import (
+    LOGGER,
+    qbittorrent_client,
+    qb_torrents,
+    qb_listener_lock,
+    task_dict,
+)
 from ...ext_utils.bot_utils import sync_to_async
+from ...ext_utils.qbit_sync import qb_sync
 from ...ext_utils.status_utils import (
     MirrorStatus,
     get_readable_file_size,
@@ -10,12 +17,8 @@ from ...ext_utils.status_utils import (
 
 
 def get_download(tag, old_info=None):
-    try:
-        res = qbittorrent_client.torrents_info(tag=tag)[0]
-        return res or old_info
-    except Exception as e:
-        LOGGER.error(f"{e}: Qbittorrent, while getting torrent info. Tag: {tag}")
-        return old_info
+    qb_sync.refresh()
+    return qb_sync.get_by_tag(tag) or old_info
 
 
 class QbittorrentStatus:
@@ -23,10 +26,13 @@ class QbittorrentStatus:
         self.queued = queued
         self.seeding = seeding
         self.listener = listener
-        self._info = None
+        self._info = qb_sync.get_by_tag(f"{listener.mid}")
 
     def update(self):
+        indexed = self._info is not None
         self._info = get_download(f"{self.listener.mid}", self._info)
+        if not indexed and self._info is not None:
+            task_dict.index(self)
 
     def progress(self):
         return f"{round(self._info.progress * 100, 2)}%"
@@ -33,6 +33,7 @@ from ..telegram_helper.message_utils import delete_message
 from ..ext_utils.media_utils import (
     get_media_info,
     get_document_type,
+    probe_cache,
     get_video_thumbnail,
     get_audio_thumbnail,
     get_multiple_frames_thumbnail,
@@ -117,7 +118,8 @@ class TelegramUploader:
                 return False
         elif self._user_session:
             self._sent_msg = await TgClient.user.get_messages(
-                chat_id=self._listener.message.chat.id, message_ids=self._listener.mid
+                chat_id=self._listener.message.chat.id,
+                message_ids=self._listener.message.id,
             )
             if self._sent_msg is None:
                 self._sent_msg = await TgClient.user.send_message(
@@ -136,6 +138,7 @@ class TelegramUploader:
             self._lprefix = re_sub("<.*?>", "", self._lprefix)
             new_path = ospath.join(dirpath, f"{self._lprefix} {file_}")
             await rename(self._up_path, new_path)
+            probe_cache.move(self._up_path, new_path)
             self._up_path = new_path
         else:
             cap_mono = f"<code>{file_}</code>"
@@ -157,6 +160,7 @@ class TelegramUploader:
             name = name[:remain]
             new_path = ospath.join(dirpath, f"{name}{ext}")
             await rename(self._up_path, new_path)
+            probe_cache.move(self._up_path, new_path)
             self._up_path = new_path
         return cap_mono
 
@@ -219,7 +223,9 @@ class TelegramUploader:
         res = await self._msg_to_reply()
         if not res:
             return
-        for dirpath, _, files in natsorted(await sync_to_async(walk, self._path)):
+        for dirpath, _, files in natsorted(
+            await sync_to_async(lambda: list(walk(self._path)), pool="fs")
+        ):
             if dirpath.endswith("/yt-dlp-thumb"):
                 continue
             if dirpath.endswith("_mltbss"):
@@ -71,7 +71,7 @@ async def send_file(message, file, caption=""):
         return str(e)
 
 
-async def send_rss(text, chat_id, thread_id):
+async def send_rss(text, chat_id, thread_id, block=True):
     try:
         app = TgClient.user or TgClient.bot
         return await app.send_message(
@@ -83,8 +83,10 @@ async def send_rss(text, chat_id, thread_id):
         )
     except (FloodWait, FloodPremiumWait) as f:
         LOGGER.warning(str(f))
+        if not block:
+            raise
         await sleep(f.value * 1.2)
-        return await send_rss(text)
+        return await send_rss(text, chat_id, thread_id)
     except Exception as e:
         LOGGER.error(str(e))
         return str(e)
@@ -286,5 +288,5 @@ async def send_status_message(msg, user_id=0):
             }
         if not intervals["status"].get(sid) and not is_user:
             intervals["status"][sid] = SetInterval(
-                Config.STATUS_UPDATE_INTERVAL, update_status_message, sid
+                Config.STATUS_UPDATE_INTERVAL, update_status_message, sid, align=True
             )
@@ -35,12 +35,13 @@ from ..helper.ext_utils.bot_utils import (
     sync_to_async,
     new_task,
 )
-from ..core.config_manager import Config
+from ..core.config_manager import Config, FLOAT_VARS
 from ..core.mltb_client import TgClient
 from ..core.startup import update_qb_options, update_nzb_options, update_variables
 from ..helper.ext_utils.db_handler import database
 from ..helper.ext_utils.jdownloader_booter import jdownloader
 from ..helper.ext_utils.task_manager import start_from_queued
+from ..helper.mirror_leech_utils.rclone_utils.rc import rclone_rc
 from ..helper.mirror_leech_utils.rclone_utils.serve import rclone_serve_booter
 from ..helper.telegram_helper.button_build import ButtonMaker
 from ..helper.telegram_helper.message_utils import (
@@ -64,6 +65,8 @@ DEFAULT_VALUES = {
     "SEARCH_LIMIT": 0,
     "UPSTREAM_BRANCH": "master",
     "DEFAULT_UPLOAD": "rc",
+    "BULK_ADMISSION_RATE": 1.0,
+    "GDRIVE_SEARCH_TIMEOUT": 15,
 }
 
 
@@ -275,7 +278,7 @@ async def edit_variable(_, message, pre_message, key):
             for cid, intvl in list(st.items()):
                 intvl.cancel()
                 intervals["status"][cid] = SetInterval(
-                    value, update_status_message, cid
+                    value, update_status_message, cid, align=True
                 )
     elif key == "TORRENT_TIMEOUT":
         value = int(value)
@@ -293,6 +296,8 @@ async def edit_variable(_, message, pre_message, key):
         aria2_options["bt-stop-timeout"] = f"{value}"
     elif key == "LEECH_SPLIT_SIZE":
         value = min(int(value), TgClient.MAX_SPLIT_SIZE)
+    elif key in FLOAT_VARS:
+        value = float(value)
     elif key == "BASE_URL_PORT":
         value = int(value)
         if Config.BASE_URL:
@@ -349,6 +354,8 @@ async def edit_variable(_, message, pre_message, key):
         "RCLONE_SERVE_PASS",
     ]:
         await rclone_serve_booter()
+    elif key == "RCLONE_RCD" and not value:
+        await rclone_rc.reset()
     elif key in ["JD_EMAIL", "JD_PASS"]:
         await jdownloader.boot()
     elif key == "RSS_DELAY":
@@ -540,6 +547,7 @@ async def update_private_file(_, message, pre_message):
             await delete_message(message)
     if file_name == "rclone.conf":
         await rclone_serve_booter()
+        await rclone_rc.clear_cache("rclone.conf")
     await update_buttons(pre_message)
     await database.update_private_file(file_name)
     if await aiopath.exists("accounts.zip"):
@@ -615,7 +623,7 @@ async def edit_bot_settings(client, query):
                 for key, intvl in list(st.items()):
                     intvl.cancel()
                     intervals["status"][key] = SetInterval(
-                        value, update_status_message, key
+                        value, update_status_message, key, align=True
                     )
         elif data[2] == "EXTENSION_FILTER":
             extension_filter.clear()
@@ -910,7 +918,7 @@ async def load_config():
         for key, intvl in list(st.items()):
             intvl.cancel()
             intervals["status"][key] = SetInterval(
-                Config.STATUS_UPDATE_INTERVAL, update_status_message, key
+                Config.STATUS_UPDATE_INTERVAL, update_status_message, key, align=True
             )
 
     downloads = aria2.get_downloads()
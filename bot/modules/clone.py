@@ -124,7 +124,9 @@ class Clone(TaskListener):
     async def _proceed_to_clone(self, sync):
         if is_share_link(self.link):
             try:
-                self.link = await sync_to_async(direct_link_generator, self.link)
+                self.link = await sync_to_async(
+                    direct_link_generator, self.link, pool="transfer"
+                )
                 LOGGER.info(f"Generated link: {self.link}")
             except DirectDownloadLinkException as e:
                 LOGGER.error(str(e))
@@ -133,7 +135,7 @@ class Clone(TaskListener):
                     return
         if is_gdrive_link(self.link) or is_gdrive_id(self.link):
             self.name, mime_type, self.size, files, _ = await sync_to_async(
-                GoogleDriveCount().count, self.link, self.user_id
+                GoogleDriveCount().count, self.link, self.user_id, pool="transfer"
             )
             if mime_type is None:
                 await send_message(self.message, self.name)
@@ -156,7 +158,9 @@ class Clone(TaskListener):
                     task_dict[self.mid] = GoogleDriveStatus(self, drive, gid, "cl")
                 if self.multi <= 1:
                     await send_status_message(self.message)
-            flink, mime_type, files, folders, dir_id = await sync_to_async(drive.clone)
+            flink, mime_type, files, folders, dir_id = await sync_to_async(
+                drive.clone, pool="transfer"
+            )
             if msg:
                 await delete_message(msg)
             if not flink:
@@ -21,7 +21,7 @@ async def count_node(_, message):
     if is_gdrive_link(link):
         msg = await send_message(message, f"Counting: <code>{link}</code>")
         name, mime_type, size, files, folders = await sync_to_async(
-            GoogleDriveCount().count, link, user.id
+            GoogleDriveCount().count, link, user.id, pool="transfer"
         )
         if mime_type is None:
             await send_message(message, name)
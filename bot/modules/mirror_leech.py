@@ -10,6 +10,7 @@ from ..helper.ext_utils.bot_utils import (
     arg_parser,
     COMMAND_USAGE,
 )
+from ..helper.ext_utils.bulk_job import BulkJob
 from ..helper.ext_utils.exceptions import DirectDownloadLinkException
 from ..helper.ext_utils.links_utils import (
     is_url,
@@ -108,6 +109,7 @@ class Mirror(TaskListener):
             "-tl": "",
             "-ff": set(),
             "-ms": "",
+            "-pd": 0,
         }
 
         arg_parser(input_list[1:], args)
@@ -141,6 +143,11 @@ class Mirror(TaskListener):
         is_bulk = args["-b"]
         max_download_speed = args["-ms"]
 
+        try:
+            parallel_downloads = int(args["-pd"])
+        except:
+            parallel_downloads = 0
+
         bulk_start = 0
         bulk_end = 0
         ratio = None
@@ -196,11 +203,9 @@ class Mirror(TaskListener):
                                 if fd_name != self.folder_name:
                                     self.same_dir[fd_name]["total"] -= 1
                         else:
-                            self.same_dir = {
-                                self.folder_name: {
-                                    "total": self.multi,
-                                    "tasks": {self.mid},
-                                }
+                            self.same_dir[self.folder_name] = {
+                                "total": self.multi,
+                                "tasks": {self.mid},
                             }
                 elif self.same_dir:
                     async with task_dict_lock:
@@ -232,29 +237,8 @@ class Mirror(TaskListener):
 
         if isinstance(reply_to, list):
             self.bulk = reply_to
-            b_msg = input_list[:1]
             self.options = " ".join(input_list[1:])
-            b_msg.append(f"{self.bulk[0]} -i {len(self.bulk)} {self.options}")
-            nextmsg = await send_message(self.message, " ".join(b_msg))
-            nextmsg = await self.client.get_messages(
-                chat_id=self.message.chat.id, message_ids=nextmsg.id
-            )
-            if self.message.from_user:
-                nextmsg.from_user = self.user
-            else:
-                nextmsg.sender_chat = self.user
-            await Mirror(
-                self.client,
-                nextmsg,
-                self.is_qbit,
-                self.is_leech,
-                self.is_jd,
-                self.is_nzb,
-                self.same_dir,
-                self.bulk,
-                self.multi_tag,
-                self.options,
-            ).new_event()
+            await BulkJob(self, Mirror, input_list[0], self.bulk, self.options).run()
             return
 
         if reply_to:
@@ -322,10 +306,19 @@ class Mirror(TaskListener):
             and file_ is None
             and not is_gdrive_id(self.link)
         ):
+            # the same probe spots torrents served without a .torrent suffix
             content_type = await get_content_type(self.link)
-            if content_type is None or re_match(r"text/html|text/plain", content_type):
+            if content_type is not None and content_type.startswith(
+                "application/x-bittorrent"
+            ):
+                self.is_torrent = True
+            elif content_type is None or re_match(
+                r"text/html|text/plain", content_type
+            ):
                 try:
-                    self.link = await sync_to_async(direct_link_generator, self.link)
+                    self.link = await sync_to_async(
+                        direct_link_generator, self.link, pool="transfer"
+                    )
                     if isinstance(self.link, tuple):
                         self.link, headers = self.link
                     elif isinstance(self.link, str):
@@ -344,7 +337,7 @@ class Mirror(TaskListener):
                 reply_to, f"{path}/", session
             )
         elif isinstance(self.link, dict):
-            await add_direct_download(self, path)
+            await add_direct_download(self, path, parallel_downloads)
         elif self.is_jd:
             await add_jd_download(self, path)
         elif self.is_qbit:
@@ -1,16 +1,19 @@
-from httpx import AsyncClient
+from httpx import AsyncClient, Limits
 from apscheduler.triggers.interval import IntervalTrigger
-from asyncio import Lock, sleep
+from asyncio import Lock, Semaphore, Queue, sleep, gather
+from collections import defaultdict
 from datetime import datetime, timedelta
 from feedparser import parse as feed_parse
 from functools import partial
 from io import BytesIO
+from pyrogram.errors import FloodWait, FloodPremiumWait
 from pyrogram.filters import create
 from pyrogram.handlers import MessageHandler
 from time import time
 from re import compile, I
+from urllib.parse import urlparse
 
-from .. import scheduler, rss_dict, LOGGER
+from .. import scheduler, rss_dict, LOGGER, bot_loop
 from ..core.config_manager import Config
 from ..helper.ext_utils.bot_utils import new_task, arg_parser, get_size_bytes
 from ..helper.ext_utils.status_utils import get_readable_file_size
@@ -37,6 +40,112 @@ headers = {
     "Accept-Language": "en-US,en;q=0.5",
 }
 
+RSS_HOST_CONCURRENCY = 4
+rss_client = None
+host_semaphores = defaultdict(lambda: Semaphore(RSS_HOST_CONCURRENCY))
+feed_cache = {}
+
+
+def get_rss_client():
+    global rss_client
+    if rss_client is None or rss_client.is_closed:
+        rss_client = AsyncClient(
+            headers=headers,
+            follow_redirects=True,
+            timeout=60,
+            verify=False,
+            limits=Limits(max_connections=64, max_keepalive_connections=32),
+        )
+    return rss_client
+
+
+class RssSendQueue:
+    def __init__(self, interval=3, max_interval=60):
+        self._min_interval = interval
+        self._max_interval = max_interval
+        self._chats = {}
+        # (user, title): newest (link, title) queued but not sent yet
+        self.pending = {}
+
+    def put(self, texts, chat_id, thread_id, on_sent=None):
+        if chat_id not in self._chats:
+            self._chats[chat_id] = {
+                "queue": Queue(),
+                "interval": self._min_interval,
+                "task": None,
+            }
+        chat = self._chats[chat_id]
+        chat["queue"].put_nowait((texts, thread_id, on_sent))
+        if chat["task"] is None or chat["task"].done():
+            chat["task"] = bot_loop.create_task(self._drain(chat_id, chat))
+
+    async def _drain(self, chat_id, chat):
+        queue = chat["queue"]
+        while not queue.empty():
+            texts, thread_id, on_sent = queue.get_nowait()
+            for text in texts:
+                while True:
+                    try:
+                        await send_rss(text, chat_id, thread_id, block=False)
+                        break
+                    except (FloodWait, FloodPremiumWait) as f:
+                        chat["interval"] = min(
+                            chat["interval"] * 2, self._max_interval
+                        )
+                        await sleep(f.value * 1.2)
+                await sleep(chat["interval"])
+                chat["interval"] = max(chat["interval"] * 0.9, self._min_interval)
+            if on_sent is not None:
+                try:
+                    await on_sent()
+                except Exception as e:
+                    LOGGER.error(f"While saving rss last feed: {e}")
+
+
+rss_queue = RssSendQueue()
+
+
+async def _save_last_feed(user, title, last_link, last_title):
+    # only called once the items up to last_link were sent, so a restart before
+    # that re-sends them instead of skipping them
+    if rss_queue.pending.get((user, title)) == (last_link, last_title):
+        del rss_queue.pending[(user, title)]
+    async with rss_dict_lock:
+        if user not in rss_dict or not rss_dict[user].get(title, False):
+            return
+        rss_dict[user][title].update({"last_feed": last_link, "last_title": last_title})
+    await database.rss_update(user)
+
+
+async def fetch_feed(link):
+    cached = feed_cache.get(link)
+    req_headers = {}
+    if cached:
+        if cached["etag"]:
+            req_headers["If-None-Match"] = cached["etag"]
+        if cached["modified"]:
+            req_headers["If-Modified-Since"] = cached["modified"]
+    tries = 0
+    async with host_semaphores[urlparse(link).netloc]:
+        while True:
+            try:
+                res = await get_rss_client().get(link, headers=req_headers)
+                break
+            except:
+                tries += 1
+                if tries > 3:
+                    raise
+                continue
+    if res.status_code == 304 and cached:
+        return cached["feed"]
+    rss_d = feed_parse(res.text)
+    feed_cache[link] = {
+        "etag": res.headers.get("ETag"),
+        "modified": res.headers.get("Last-Modified"),
+        "feed": rss_d,
+    }
+    return rss_d
+
 
 async def rss_menu(event):
     user_id = event.from_user.id
@@ -133,10 +242,7 @@ async def rss_sub(_, message, pre_event):
             cmd = None
             stv = False
         try:
-            async with AsyncClient(
-                headers=headers, follow_redirects=True, timeout=60, verify=False
-            ) as client:
-                res = await client.get(feed_link)
+            res = await get_rss_client().get(feed_link)
             html = res.text
             rss_d = feed_parse(html)
             last_title = rss_d.entries[0]["title"]
@@ -346,10 +452,7 @@ async def rss_get(_, message, pre_event):
                 msg = await send_message(
                     message, f"Getting the last <b>{count}</b> item(s) from {title}"
                 )
-                async with AsyncClient(
-                    headers=headers, follow_redirects=True, timeout=60, verify=False
-                ) as client:
-                    res = await client.get(data["link"])
+                res = await get_rss_client().get(data["link"])
                 html = res.text
                 rss_d = feed_parse(html)
                 item_info = ""
@@ -680,131 +783,130 @@ async def rss_monitor():
         )
     elif chat.lstrip("-").isdigit():
         rss_chat_id = int(chat)
-    for user, items in list(rss_dict.items()):
-        for title, data in items.items():
+    subscriptions = [
+        (user, title, data)
+        for user, items in list(rss_dict.items())
+        for title, data in list(items.items())
+        if not data["paused"]
+    ]
+    links = list({data["link"] for _, _, data in subscriptions})
+    for link in feed_cache.keys() - set(links):
+        del feed_cache[link]
+    feeds = dict(
+        zip(
+            links,
+            await gather(*(fetch_feed(link) for link in links), return_exceptions=True),
+        )
+    )
+    for user, title, data in subscriptions:
+        try:
+            if scheduler.get_job(job_id="RSS") is None:
+                raise RssShutdownException("Rss Monitor Stopped!")
+            rss_d = feeds[data["link"]]
+            if isinstance(rss_d, Exception):
+                raise rss_d
             try:
-                if data["paused"]:
-                    continue
-                tries = 0
-                while True:
-                    try:
-                        async with AsyncClient(
-                            headers=headers,
-                            follow_redirects=True,
-                            timeout=60,
-                            verify=False,
-                        ) as client:
-                            res = await client.get(data["link"])
-                        html = res.text
-                        break
-                    except:
-                        tries += 1
-                        if tries > 3:
-                            raise
-                        continue
-                rss_d = feed_parse(html)
+                last_link = rss_d.entries[0]["links"][1]["href"]
+            except IndexError:
+                last_link = rss_d.entries[0]["link"]
+            finally:
+                all_paused = False
+            last_title = rss_d.entries[0]["title"]
+            seen_link, seen_title = rss_queue.pending.get(
+                (user, title), (data["last_feed"], data["last_title"])
+            )
+            if seen_link == last_link or seen_title == last_title:
+                continue
+            feed_count = 0
+            feed_msgs = []
+            while True:
                 try:
-                    last_link = rss_d.entries[0]["links"][1]["href"]
-                except IndexError:
-                    last_link = rss_d.entries[0]["link"]
-                finally:
-                    all_paused = False
-                last_title = rss_d.entries[0]["title"]
-                if data["last_feed"] == last_link or data["last_title"] == last_title:
-                    continue
-                feed_count = 0
-                while True:
-                    try:
-                        await sleep(10)
-                    except:
-                        raise RssShutdownException("Rss Monitor Stopped!")
+                    item_title = rss_d.entries[feed_count]["title"]
                     try:
-                        item_title = rss_d.entries[feed_count]["title"]
-                        try:
-                            url = rss_d.entries[feed_count]["links"][1]["href"]
-                        except IndexError:
-                            url = rss_d.entries[feed_count]["link"]
-                        if data["last_feed"] == url or data["last_title"] == item_title:
-                            break
-                        if rss_d.entries[feed_count].get("size"):
-                            size = int(rss_d.entries[feed_count]["size"])
-                        elif rss_d.entries[feed_count].get("summary"):
-                            summary = rss_d.entries[feed_count]["summary"]
-                            matches = size_regex.findall(summary)
-                            sizes = [match[0] for match in matches]
-                            size = get_size_bytes(sizes[0])
-                        else:
-                            size = 0
+                        url = rss_d.entries[feed_count]["links"][1]["href"]
                     except IndexError:
-                        LOGGER.warning(
-                            f"Reached Max index no. {feed_count} for this feed: {title}. Maybe you need to use less RSS_DELAY to not miss some torrents"
-                        )
+                        url = rss_d.entries[feed_count]["link"]
+                    if seen_link == url or seen_title == item_title:
                         break
-                    parse = True
-                    for flist in data["inf"]:
-                        if (
-                            data.get("sensitive", False)
-                            and all(x.lower() not in item_title.lower() for x in flist)
-                        ) or (
-                            not data.get("sensitive", False)
-                            and all(x not in item_title for x in flist)
-                        ):
-                            parse = False
-                            feed_count += 1
-                            break
-                    if not parse:
-                        continue
-                    for flist in data["exf"]:
-                        if (
-                            data.get("sensitive", False)
-                            and any(x.lower() in item_title.lower() for x in flist)
-                        ) or (
-                            not data.get("sensitive", False)
-                            and any(x in item_title for x in flist)
-                        ):
-                            parse = False
-                            feed_count += 1
-                            break
-                    if not parse:
-                        continue
-                    if command := data["command"]:
-                        if (
-                            size
-                            and Config.RSS_SIZE_LIMIT
-                            and Config.RSS_SIZE_LIMIT < size
-                        ):
-                            feed_count += 1
-                            continue
-                        cmd = command.split(maxsplit=1)
-                        cmd.insert(1, url)
-                        feed_msg = " ".join(cmd)
-                        if not feed_msg.startswith("/"):
-                            feed_msg = f"/{feed_msg}"
+                    if rss_d.entries[feed_count].get("size"):
+                        size = int(rss_d.entries[feed_count]["size"])
+                    elif rss_d.entries[feed_count].get("summary"):
+                        summary = rss_d.entries[feed_count]["summary"]
+                        matches = size_regex.findall(summary)
+                        sizes = [match[0] for match in matches]
+                        size = get_size_bytes(sizes[0])
                     else:
-                        feed_msg = f"<b>Name: </b><code>{item_title.replace('>', '').replace('<', '')}</code>"
-                        feed_msg += f"\n\n<b>Link: </b><code>{url}</code>"
-                        if size:
-                            feed_msg += f"\n<b>Size: </b>{get_readable_file_size(size)}"
-                    feed_msg += (
-                        f"\n<b>Tag: </b><code>{data['tag']}</code> <code>{user}</code>"
+                        size = 0
+                except IndexError:
+                    LOGGER.warning(
+                        f"Reached Max index no. {feed_count} for this feed: {title}. Maybe you need to use less RSS_DELAY to not miss some torrents"
                     )
-                    await send_rss(feed_msg, rss_chat_id, rss_topic_id)
-                    feed_count += 1
-                async with rss_dict_lock:
-                    if user not in rss_dict or not rss_dict[user].get(title, False):
+                    break
+                parse = True
+                for flist in data["inf"]:
+                    if (
+                        data.get("sensitive", False)
+                        and all(x.lower() not in item_title.lower() for x in flist)
+                    ) or (
+                        not data.get("sensitive", False)
+                        and all(x not in item_title for x in flist)
+                    ):
+                        parse = False
+                        feed_count += 1
+                        break
+                if not parse:
+                    continue
+                for flist in data["exf"]:
+                    if (
+                        data.get("sensitive", False)
+                        and any(x.lower() in item_title.lower() for x in flist)
+                    ) or (
+                        not data.get("sensitive", False)
+                        and any(x in item_title for x in flist)
+                    ):
+                        parse = False
+                        feed_count += 1
+                        break
+                if not parse:
+                    continue
+                if command := data["command"]:
+                    if (
+                        size
+                        and Config.RSS_SIZE_LIMIT
+                        and Config.RSS_SIZE_LIMIT < size
+                    ):
+                        feed_count += 1
                         continue
-                    rss_dict[user][title].update(
-                        {"last_feed": last_link, "last_title": last_title}
-                    )
-                await database.rss_update(user)
-                LOGGER.info(f"Feed Name: {title}")
-                LOGGER.info(f"Last item: {last_link}")
-            except RssShutdownException as ex:
-                LOGGER.info(ex)
-                break
-            except Exception as e:
-                LOGGER.error(f"{e} - Feed Name: {title} - Feed Link: {data['link']}")
-                continue
+                    cmd = command.split(maxsplit=1)
+                    cmd.insert(1, url)
+                    feed_msg = " ".join(cmd)
+                    if not feed_msg.startswith("/"):
+                        feed_msg = f"/{feed_msg}"
+                else:
+                    feed_msg = f"<b>Name: </b><code>{item_title.replace('>', '').replace('<', '')}</code>"
+                    feed_msg += f"\n\n<b>Link: </b><code>{url}</code>"
+                    if size:
+                        feed_msg += f"\n<b>Size: </b>{get_readable_file_size(size)}"
+                feed_msg += (
+                    f"\n<b>Tag: </b><code>{data['tag']}</code> <code>{user}</code>"
+                )
+                feed_msgs.append(feed_msg)
+                feed_count += 1
+            rss_queue.pending[(user, title)] = (last_link, last_title)
+            rss_queue.put(
+                feed_msgs,
+                rss_chat_id,
+                rss_topic_id,
+                partial(_save_last_feed, user, title, last_link, last_title),
+            )
+            LOGGER.info(f"Feed Name: {title}")
+            LOGGER.info(f"Last item: {last_link}")
+        except RssShutdownException as ex:
+            LOGGER.info(ex)
+            break
+        except Exception as e:
+            LOGGER.error(f"{e} - Feed Name: {title} - Feed Link: {data['link']}")
+            continue
     if all_paused:
         scheduler.pause()
 
@@ -14,7 +14,8 @@ from psutil import (
 
 from .. import bot_start_time
 from ..helper.ext_utils.status_utils import get_readable_file_size, get_readable_time, get_cpu_temp
-from ..helper.ext_utils.bot_utils import cmd_exec, new_task
+from ..helper.ext_utils.adaptive_poller import POLLERS
+from ..helper.ext_utils.bot_utils import cmd_exec, new_task, THREAD_POOLS
 from ..helper.telegram_helper.message_utils import send_message
 
 commands = {
@@ -34,6 +35,14 @@ async def bot_stats(_, message):
     total, used, free, disk = disk_usage("/")
     swap = swap_memory()
     memory = virtual_memory()
+    pools = ""
+    for name, pool in THREAD_POOLS.items():
+        st = pool.stats()
+        pools += f"\n<b>{name}:</b> {st['running']}/{st['workers']} | <b>Queued:</b> {st['queued']} | <b>Wait:</b> {st['avg_wait']:.2f}s/{st['max_wait']:.2f}s"
+    listeners = ""
+    for name, poller in POLLERS.items():
+        st = poller.stats()
+        listeners += f"\n<b>{name}:</b> {st['interval']}s | <b>Ticks:</b> {st['ticks']} | <b>RPC:</b> {st['rpc_calls']} | <b>Tick:</b> {st['avg_latency']:.2f}s/{st['max_latency']:.2f}s"
     stats = f"""
 <b>Commit Date:</b> {commands["commit"]}
 
@@ -67,6 +76,10 @@ async def bot_stats(_, message):
 <b>yt-dlp:</b> {commands["yt-dlp"]}
 <b>ffmpeg:</b> {commands["ffmpeg"]}
 <b>7z:</b> {commands["7z"]}
+
+<b>Thread Pools (busy/size | queued | avg/max wait):</b>{pools}
+
+<b>Listeners (interval | ticks | rpc calls | avg/max tick):</b>{listeners}
 """
     await send_message(message, stats)
 
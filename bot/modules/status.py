@@ -16,6 +16,7 @@ from ..helper.ext_utils.status_utils import (
     get_readable_time,
     speed_string_to_bytes,
     get_cpu_temp,
+    clear_render_cache,
 )
 from ..helper.telegram_helper.bot_commands import BotCommands
 from ..helper.telegram_helper.message_utils import (
@@ -63,6 +64,7 @@ async def status_pages(_, query):
     key = int(data[1])
     await query.answer()
     if data[2] == "ref":
+        clear_render_cache()
         await update_status_message(key, force=True)
     elif data[2] in ["nex", "pre"]:
         async with task_dict_lock:
@@ -384,11 +384,9 @@ class YtDlp(TaskListener):
                                 if fd_name != self.folder_name:
                                     self.same_dir[fd_name]["total"] -= 1
                         else:
-                            self.same_dir = {
-                                self.folder_name: {
-                                    "total": self.multi,
-                                    "tasks": {self.mid},
-                                }
+                            self.same_dir[self.folder_name] = {
+                                "total": self.multi,
+                                "tasks": {self.mid},
                             }
                 elif self.same_dir:
                     async with task_dict_lock:
@@ -457,7 +455,9 @@ class YtDlp(TaskListener):
         options["playlist_items"] = "0"
 
         try:
-            result = await sync_to_async(extract_info, self.link, options)
+            result = await sync_to_async(
+                extract_info, self.link, options, pool="transfer"
+            )
         except Exception as e:
             msg = str(e).replace("<", " ").replace(">", " ")
             await send_message(self.message, f"{self.tag} {msg}")
@@ -21,14 +21,21 @@ YT_DLP_OPTIONS = ""
 USE_SERVICE_ACCOUNTS = False
 NAME_SUBSTITUTE = ""
 FFMPEG_CMDS = {}
+MEDIA_PROBE_CONCURRENCY = 0
+BULK_ADMISSION_RATE = 1
+DIRECT_PARALLEL_DOWNLOADS = 4
+LISTENER_MAX_INTERVAL = 30
 # GDrive Tools
 GDRIVE_ID = ""
 IS_TEAM_DRIVE = False
+GDRIVE_WORKERS = 8
+GDRIVE_SEARCH_TIMEOUT = 15
 STOP_DUPLICATE = False
 INDEX_URL = ""
 # Rclone
 RCLONE_PATH = ""
 RCLONE_FLAGS = ""
+RCLONE_RCD = False
 RCLONE_SERVE_URL = ""
 RCLONE_SERVE_PORT = 0
 RCLONE_SERVE_USER = ""